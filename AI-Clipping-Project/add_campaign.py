@@ -2,28 +2,38 @@
 Helper script to add a new Whop.com campaign
 Creates the campaign folder structure and guidelines.json
 """
-import json
+import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Callable, Dict, List
 
-def create_campaign():
-    """Interactive campaign creation"""
+from campaign_manager import CampaignManager
+from json_io import read_json
+
+
+def _prompt_spec(ask: Callable[[str], str] = input) -> Dict:
+    """
+    Interactively collect a campaign spec
+    
+    Args:
+        ask: Prompt function returning one line of input (defaults to input())
+    """
     print("=" * 60)
     print("Add New Whop.com Campaign")
     print("=" * 60)
     print()
     
     # Get campaign details
-    campaign_id = input("Campaign ID (e.g., 'addicted', 'creator_name'): ").strip().lower()
-    campaign_name = input("Campaign Name (full title): ").strip()
-    whop_url = input("Whop.com Campaign URL: ").strip()
+    campaign_id = ask("Campaign ID (e.g., 'addicted', 'creator_name'): ").strip().lower()
+    campaign_name = ask("Campaign Name (full title): ").strip()
+    whop_url = ask("Whop.com Campaign URL: ").strip()
     
     print("\n--- Clipping Rules ---")
     critical_rules = []
     print("Enter critical clipping rules (one per line, empty to finish):")
     while True:
-        rule = input("  Rule: ").strip()
+        rule = ask("  Rule: ").strip()
         if not rule:
             break
         critical_rules.append(rule)
@@ -31,7 +41,7 @@ def create_campaign():
     focus_points = []
     print("\nWhat to focus on (one per line, empty to finish):")
     while True:
-        point = input("  Focus: ").strip()
+        point = ask("  Focus: ").strip()
         if not point:
             break
         focus_points.append(point)
@@ -50,7 +60,7 @@ def create_campaign():
     }
     
     while True:
-        source_input = input("  Source: ").strip()
+        source_input = ask("  Source: ").strip()
         if not source_input:
             break
         
@@ -71,41 +81,85 @@ def create_campaign():
                 print(f"  ⚠ Could not determine type for '{source_input}', skipping")
     
     print("\n--- Tagging Requirements ---")
-    instagram_tags = input("Instagram tags (comma-separated, or empty): ").strip()
-    youtube_tags = input("YouTube tags (comma-separated, or empty): ").strip()
+    instagram_tags = ask("Instagram tags (comma-separated, or empty): ").strip()
+    youtube_tags = ask("YouTube tags (comma-separated, or empty): ").strip()
     
     print("\n--- Caption Guidelines ---")
-    caption_style = input("Caption style/guidelines: ").strip() or "flexible, engaging"
-    caption_tone = input("Caption tone (e.g., exciting, high-energy): ").strip() or "exciting"
+    caption_style = ask("Caption style/guidelines: ").strip() or "flexible, engaging"
+    caption_tone = ask("Caption tone (e.g., exciting, high-energy): ").strip() or "exciting"
     
     print("\n--- Requirements ---")
-    keep_live_days = input("Keep posts live for (days, default 30): ").strip() or "30"
-    min_engagement = input("Minimum engagement rate (e.g., 0.01 for 1%): ").strip() or "0.01"
+    keep_live_days = ask("Keep posts live for (days, default 30): ").strip() or "30"
+    min_engagement = ask("Minimum engagement rate (e.g., 0.01 for 1%): ").strip() or "0.01"
     
-    # Build guidelines structure
-    guidelines = {
-        "campaign_name": campaign_name,
+    return {
         "campaign_id": campaign_id,
-        "whop_campaign_url": whop_url,
+        "campaign_name": campaign_name,
+        "whop_url": whop_url,
+        "critical_rules": critical_rules,
+        "focus_on": focus_points,
+        "approved_sources": sources,
+        "instagram_tags": [t.strip() for t in instagram_tags.split(",") if t.strip()],
+        "youtube_tags": [t.strip() for t in youtube_tags.split(",") if t.strip()],
+        "caption_style": caption_style,
+        "caption_tone": caption_tone,
+        "keep_live_days": keep_live_days,
+        "min_engagement": min_engagement
+    }
+
+
+def _stdin_reader() -> Callable[[str], str]:
+    """
+    Pick the prompt function for _prompt_spec
+    
+    Piped stdin (e.g. CI seeding with echo -e) is read in a single call and
+    served line by line; a terminal keeps the normal input() prompts.
+    """
+    if sys.stdin.isatty():
+        return input
+    
+    lines = iter(sys.stdin.read().splitlines())
+    return lambda prompt="": next(lines, "")
+
+
+def _build_guidelines(spec: Dict) -> Dict:
+    """
+    Build the guidelines.json structure from a campaign spec
+    
+    Args:
+        spec: Campaign spec (same keys as produced by the interactive prompts)
+        
+    Returns:
+        Guidelines dictionary
+    """
+    instagram_tags = spec.get("instagram_tags", [])
+    youtube_tags = spec.get("youtube_tags", [])
+    keep_live_days = int(spec.get("keep_live_days", 30))
+    min_engagement = float(spec.get("min_engagement", 0.01))
+    
+    return {
+        "campaign_name": spec.get("campaign_name", ""),
+        "campaign_id": spec["campaign_id"],
+        "whop_campaign_url": spec.get("whop_url", ""),
         "clipping_rules": {
-            "critical": critical_rules,
-            "focus_on": focus_points,
+            "critical": spec.get("critical_rules", []),
+            "focus_on": spec.get("focus_on", []),
             "goal": "attention + excitement"
         },
-        "approved_sources": sources,
+        "approved_sources": spec.get("approved_sources", {}),
         "tagging_requirements": {
             "instagram": {
                 "required": bool(instagram_tags),
-                "tags": [t.strip() for t in instagram_tags.split(",") if t.strip()]
+                "tags": instagram_tags
             },
             "youtube": {
                 "required": bool(youtube_tags),
-                "tags": [t.strip() for t in youtube_tags.split(",") if t.strip()]
+                "tags": youtube_tags
             }
         },
         "caption_guidelines": {
-            "style": caption_style,
-            "tone": caption_tone,
+            "style": spec.get("caption_style") or "flexible, engaging",
+            "tone": spec.get("caption_tone") or "exciting",
             "rejection_reason": "If it makes 0 sense to the content you posted, it will be rejected"
         },
         "on_screen_text": {
@@ -117,10 +171,10 @@ def create_campaign():
             "tag_in_caption": True,
             "high_quality": True,
             "english_only": True,
-            "keep_live_days": int(keep_live_days),
+            "keep_live_days": keep_live_days,
             "engagement_rate": {
-                "minimum": float(min_engagement),
-                "example": f"1,000 views = {int(1000 * float(min_engagement))} likes"
+                "minimum": min_engagement,
+                "example": f"1,000 views = {int(1000 * min_engagement)} likes"
             }
         },
         "not_allowed": [],
@@ -129,28 +183,81 @@ def create_campaign():
             "required": False
         }
     }
+
+
+def create_batch(
+    specs: List[Dict],
+    campaigns_dir: str = "campaigns",
+    pretty: bool = False
+) -> List[Path]:
+    """
+    Create several campaigns, rewriting the campaign index only once
+    
+    Args:
+        specs: List of campaign specs
+        campaigns_dir: Directory containing campaign folders
+        pretty: Write indented guidelines.json for hand editing
+        
+    Returns:
+        Paths to the created campaign folders
+    """
+    manager = CampaignManager(campaigns_dir)
+    folders = []
     
-    # Create campaign folder
-    campaigns_dir = Path("campaigns")
-    campaigns_dir.mkdir(exist_ok=True)
+    for spec in specs:
+        guidelines = _build_guidelines(spec)
+        folders.append(
+            manager.create_campaign_folder(
+                spec["campaign_id"], guidelines, update_index=False, pretty=pretty
+            )
+        )
     
-    campaign_folder = campaigns_dir / campaign_id
-    campaign_folder.mkdir(exist_ok=True)
+    manager.flush_index()
+    return folders
+
+
+def _load_specs(path: str) -> List[Dict]:
+    """Read one spec or a list of specs from a JSON file"""
+    specs = read_json(path)
     
-    # Save guidelines
-    guidelines_file = campaign_folder / "guidelines.json"
-    with open(guidelines_file, 'w', encoding='utf-8') as f:
-        json.dump(guidelines, f, indent=2, ensure_ascii=False)
+    return specs if isinstance(specs, list) else [specs]
+
+
+def create_campaign(from_file: str = None, pretty: bool = False):
+    """
+    Create a campaign interactively, or in bulk from a JSON spec file
+    
+    Args:
+        from_file: Optional path to a JSON spec (or list of specs); skips prompts
+        pretty: Write indented guidelines.json for hand editing
+    """
+    specs = _load_specs(from_file) if from_file else [_prompt_spec(_stdin_reader())]
+    folders = create_batch(specs, pretty=pretty)
+    
+    for spec, campaign_folder in zip(specs, folders):
+        print(f"\n✓ Campaign created: {campaign_folder}")
+        print(f"  Guidelines: {campaign_folder / 'guidelines.json'}")
     
-    print(f"\n✓ Campaign created: {campaign_folder}")
-    print(f"  Guidelines: {guidelines_file}")
     print(f"\nYou can now process videos for this campaign:")
-    print(f"  python campaign_processor.py process <video_url> {campaign_id}")
+    for spec in specs:
+        print(f"  python campaign_processor.py process <video_url> {spec['campaign_id']}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add a new Whop.com campaign")
+    parser.add_argument(
+        "--from-file",
+        help="JSON file with one campaign spec or a list of specs (skips prompts)"
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Write indented guidelines.json (compact by default)"
+    )
+    args = parser.parse_args()
+    
     try:
-        create_campaign()
+        create_campaign(from_file=args.from_file, pretty=args.pretty)
     except KeyboardInterrupt:
         print("\n\nCancelled")
     except Exception as e:
@@ -2,14 +2,27 @@
 Instagram Auto-Poster
 Automatically posts approved clips to Instagram using instagrapi
 """
-import json
+import asyncio
+import sys
+import shutil
 import logging
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 import time
 import random
 
+# Sibling modules (storage, json_io) must import even when run from another directory
+_MODULE_DIR = str(Path(__file__).parent)
+if _MODULE_DIR not in sys.path:
+    sys.path.insert(0, _MODULE_DIR)
+
+from json_io import read_json, write_json
+from storage import StorageManager
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -21,6 +34,16 @@ except ImportError:
     INSTAGRAPI_AVAILABLE = False
     logger.warning("instagrapi not installed. Install with: pip install instagrapi")
 
+# How long a saved session is trusted without re-running login()
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+# Fold posted.log into the metadata files once it grows past this many entries
+POSTED_LOG_COMPACT_ENTRIES = 50
+
+# Thumbnails are rendered with ffmpeg ahead of upload when it is on PATH
+FFMPEG_PATH = shutil.which("ffmpeg")
+THUMBNAIL_WORKERS = 2
+
 
 class AutoPoster:
     """Automatically posts clips to Instagram"""
@@ -42,7 +65,10 @@ class AutoPoster:
         self.username = username
         self.password = password
         self.session_file = Path(session_file)
+        self.session_meta_file = self.session_file.with_name(f"{self.session_file.stem}.meta.json")
         self.client = None
+        self._session_valid_until = self._load_session_meta()
+        self._storages: Dict[str, StorageManager] = {}
         
         if not INSTAGRAPI_AVAILABLE:
             raise ImportError("instagrapi is required. Install with: pip install instagrapi")
@@ -64,6 +90,14 @@ class AutoPoster:
         if not username or not password:
             raise ValueError("Username and password required for login")
         
+        # Kept so post_clip can log in again if the session is rejected
+        self.username = username
+        self.password = password
+        
+        # Reuse the client we already have while its session is trusted
+        if self.client and time.time() < self._session_valid_until:
+            return True
+        
         try:
             self.client = Client()
             
@@ -71,10 +105,15 @@ class AutoPoster:
             if self.session_file.exists():
                 try:
                     self.client.load_settings(self.session_file)
+                    if time.time() < self._session_valid_until:
+                        # Warm path: skip the login round trip entirely
+                        logger.info("✓ Reusing saved session")
+                        return True
                     self.client.login(username, password)
+                    self._save_session_meta()
                     logger.info("✓ Logged in using saved session")
                     return True
-                except:
+                except Exception:
                     logger.info("Saved session expired, logging in fresh...")
             
             # Fresh login
@@ -82,6 +121,7 @@ class AutoPoster:
             
             # Save session for next time
             self.client.dump_settings(self.session_file)
+            self._save_session_meta()
             logger.info("✓ Logged in and saved session")
             return True
             
@@ -99,7 +139,8 @@ class AutoPoster:
         self,
         video_path: str,
         caption: str,
-        delay_seconds: Optional[int] = None
+        delay_seconds: Optional[int] = None,
+        thumbnail: Optional[Path] = None
     ) -> Dict:
         """
         Post a single clip to Instagram
@@ -108,6 +149,7 @@ class AutoPoster:
             video_path: Path to video file
             caption: Caption text
             delay_seconds: Optional delay before posting (for scheduling)
+            thumbnail: Prebuilt cover image (Instagram auto-generates one if None)
             
         Returns:
             Dictionary with post result
@@ -127,11 +169,24 @@ class AutoPoster:
             logger.info(f"Posting clip: {video_path.name}")
             
             # Upload as Reel
-            media = self.client.clip_upload(
-                path=str(video_path),
-                caption=caption,
-                thumbnail=None  # Let Instagram auto-generate
-            )
+            try:
+                media = self.client.clip_upload(
+                    path=str(video_path),
+                    caption=caption,
+                    thumbnail=thumbnail
+                )
+            except LoginRequired:
+                # Cached session was rejected - do a full login and retry once
+                logger.info("Session rejected, logging in again...")
+                self._session_valid_until = 0
+                self.client = None
+                if not self.login():
+                    raise
+                media = self.client.clip_upload(
+                    path=str(video_path),
+                    caption=caption,
+                    thumbnail=thumbnail
+                )
             
             result = {
                 "status": "success",
@@ -152,33 +207,142 @@ class AutoPoster:
                 "video_path": str(video_path)
             }
     
-    def post_approved_clips(
+    def post_clip_batch(
         self,
-        storage_path: Optional[str] = None,
-        max_posts_per_run: int = 5,
+        jobs: List[Tuple[Path, str]],
         min_delay_minutes: int = 30,
-        max_delay_minutes: int = 120
+        max_delay_minutes: int = 120,
+        on_result: Optional[Callable[[int, Dict], None]] = None
     ) -> List[Dict]:
         """
-        Post all approved clips from storage
+        Post several clips back-to-back on the current session
+        
+        Paths are checked in one pass before anything is uploaded, and cover
+        thumbnails are rendered in the background while earlier posts upload
+        or wait out their delay.
         
         Args:
-            storage_path: Path to storage directory (defaults to today's output)
-            max_posts_per_run: Maximum clips to post in one run
-            min_delay_minutes: Minimum delay between posts (randomized)
-            max_delay_minutes: Maximum delay between posts (randomized)
+            jobs: (video_path, caption) pairs in posting order
+            min_delay_minutes: Minimum delay between posts
+            max_delay_minutes: Maximum delay between posts
+            on_result: Called with (job index, result) as soon as each job finishes
             
         Returns:
-            List of posting results
+            Posting results in the same order as jobs
         """
-        import sys
-        from pathlib import Path
+        if not self.client:
+            raise ValueError("Not logged in. Call login() first.")
+        
+        jobs = [(Path(video_path), caption) for video_path, caption in jobs]
+        results: List[Optional[Dict]] = [None] * len(jobs)
         
-        # Add AI-Clipping-Project to path
-        sys.path.insert(0, str(Path(__file__).parent / "AI-Clipping-Project"))
-        from storage import StorageManager
+        ready = []
+        for i, (video_path, caption) in enumerate(jobs):
+            if video_path.exists():
+                ready.append(i)
+                continue
+            logger.error(f"Failed to post clip: Video not found: {video_path}")
+            results[i] = {
+                "status": "error",
+                "error": f"Video not found: {video_path}",
+                "video_path": str(video_path)
+            }
+            if on_result:
+                on_result(i, results[i])
+        
+        with ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS) as executor:
+            thumbnails = {i: executor.submit(self._make_thumbnail, jobs[i][0]) for i in ready}
+            
+            try:
+                for n, i in enumerate(ready):
+                    if n > 0:
+                        delay = self._jittered_delay(min_delay_minutes, max_delay_minutes)
+                        logger.info(f"Waiting {delay//60} minutes before next post...")
+                        time.sleep(delay)
+                    
+                    video_path, caption = jobs[i]
+                    results[i] = self.post_clip(video_path, caption, thumbnail=thumbnails[i].result())
+                    if on_result:
+                        on_result(i, results[i])
+            finally:
+                for future in thumbnails.values():
+                    future.add_done_callback(self._discard_thumbnail)
         
+        return results
+    
+    def _jittered_delay(self, min_delay_minutes: int, max_delay_minutes: int) -> int:
+        """
+        Seconds to wait between posts
+        
+        Exponential jitter above the minimum gives irregular, mostly short gaps
+        (mean halfway to the maximum) instead of a uniform spread.
+        """
+        low, high = min_delay_minutes * 60, max_delay_minutes * 60
+        if high <= low:
+            return low
+        return int(min(high, low + random.expovariate(2 / (high - low))))
+    
+    def _make_thumbnail(self, video_path: Path) -> Optional[Path]:
+        """Render a cover frame into a temporary directory with ffmpeg (None if unavailable)"""
+        if not FFMPEG_PATH:
+            return None
+        
+        # Removed by _discard_thumbnail once the upload has read it
+        thumbnail = Path(tempfile.mkdtemp(prefix="thumb_")) / f"{video_path.stem}.jpg"
+        try:
+            subprocess.run(
+                [
+                    FFMPEG_PATH, "-y", "-loglevel", "error",
+                    "-ss", "1", "-i", str(video_path),
+                    "-frames:v", "1", "-q:v", "2", str(thumbnail)
+                ],
+                check=True,
+                capture_output=True,
+                timeout=60
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"Could not render thumbnail for {video_path.name}: {e}")
+            shutil.rmtree(thumbnail.parent, ignore_errors=True)
+            return None
+        
+        # Clips shorter than the seek offset produce no frame
+        if not thumbnail.exists():
+            shutil.rmtree(thumbnail.parent, ignore_errors=True)
+            return None
+        return thumbnail
+    
+    @staticmethod
+    def _discard_thumbnail(future):
+        """Delete the temporary directory of a finished _make_thumbnail future"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        thumbnail = future.result()
+        if thumbnail is not None:
+            shutil.rmtree(thumbnail.parent, ignore_errors=True)
+    
+    def _load_session_meta(self) -> float:
+        """Read the saved session's expiry timestamp (0 if unknown)"""
+        try:
+            return float(read_json(self.session_meta_file).get('valid_until', 0))
+        except (OSError, ValueError, AttributeError):
+            return 0.0
+    
+    def _save_session_meta(self):
+        """Record that the saved session is trusted for the next SESSION_TTL_SECONDS"""
+        self._session_valid_until = time.time() + SESSION_TTL_SECONDS
+        try:
+            write_json(self.session_meta_file, {'valid_until': self._session_valid_until})
+        except OSError as e:
+            logger.warning(f"Could not save session metadata: {e}")
+    
+    def _load_approved_bundles(
+        self,
+        storage_path: Optional[str] = None,
+        max_posts_per_run: int = 5
+    ) -> List[Dict]:
+        """Load approved, not-yet-posted bundles from storage"""
         storage = StorageManager(base_path=Path(storage_path) if storage_path else None)
+        self._storages[str(storage.base_path)] = storage
         bundles = storage.get_all_post_ready_bundles()
         
         # Filter for approved clips
@@ -187,60 +351,190 @@ class AutoPoster:
             if b.get('approval_status') == 'approved' and not b.get('posted', False)
         ]
         
+        # Limit number of posts
+        return approved[:max_posts_per_run]
+    
+    def _build_caption(self, bundle: Dict) -> str:
+        """Build the post caption from a bundle's first caption and its hashtags"""
+        captions = bundle.get('captions', [])
+        if not captions:
+            return "Check this out! 🔥"
+        
+        caption_data = captions[0]
+        return f"{caption_data.get('caption', '')}\n\n{' '.join(caption_data.get('hashtags', []))}"
+    
+    def _build_jobs(self, bundles: List[Dict]) -> List[Tuple[Dict, str]]:
+        """Pair each bundle with its ready-to-post caption before any sleeping starts"""
+        return [(bundle, self._build_caption(bundle)) for bundle in bundles]
+    
+    def _post_bundle(self, bundle: Dict, caption: str, thumbnail: Optional[Path] = None) -> Dict:
+        """Post a single bundle with a prebuilt caption and record its posted marker"""
+        # Post clip
+        result = self.post_clip(
+            video_path=bundle['video_path'],
+            caption=caption,
+            thumbnail=thumbnail
+        )
+        
+        # Append to posted.log; folded into the metadata files by _flush_posted
+        if result['status'] == 'success':
+            self._mark_as_posted(bundle)
+        
+        return result
+    
+    def post_approved_clips(
+        self,
+        storage_path: Optional[str] = None,
+        max_posts_per_run: int = 5,
+        min_delay_minutes: int = 30,
+        max_delay_minutes: int = 120
+    ) -> List[Dict]:
+        """
+        Post all approved clips from storage
+        
+        Args:
+            storage_path: Path to storage directory (defaults to today's output)
+            max_posts_per_run: Maximum clips to post in one run
+            min_delay_minutes: Minimum delay between posts (randomized)
+            max_delay_minutes: Maximum delay between posts (randomized)
+            
+        Returns:
+            List of posting results
+        """
+        approved = self._load_approved_bundles(storage_path, max_posts_per_run)
+        
         if not approved:
             logger.info("No approved clips ready to post")
             return []
         
-        # Limit number of posts
-        approved = approved[:max_posts_per_run]
+        jobs = self._build_jobs(approved)
         
-        results = []
-        for i, bundle in enumerate(approved):
-            if i > 0:
-                # Random delay between posts (to avoid detection)
-                delay = random.randint(min_delay_minutes, max_delay_minutes) * 60
-                logger.info(f"Waiting {delay//60} minutes before next post...")
-                time.sleep(delay)
-            
-            # Get caption
-            captions = bundle.get('captions', [])
-            if captions:
-                caption_data = captions[0]
-                caption = f"{caption_data.get('caption', '')}\n\n{' '.join(caption_data.get('hashtags', []))}"
-            else:
-                caption = "Check this out! 🔥"
-            
-            # Post clip
-            result = self.post_clip(
-                video_path=bundle['video_path'],
-                caption=caption
-            )
-            
-            # Mark as posted in metadata
+        def record(index: int, result: Dict):
+            # Append to posted.log right away so a crash mid-batch can't repost
             if result['status'] == 'success':
-                self._mark_as_posted(bundle)
+                self._mark_as_posted(jobs[index][0])
+        
+        try:
+            results = self.post_clip_batch(
+                [(bundle['video_path'], caption) for bundle, caption in jobs],
+                min_delay_minutes=min_delay_minutes,
+                max_delay_minutes=max_delay_minutes,
+                on_result=record
+            )
+        finally:
+            # Flush even if interrupted so already-posted clips aren't posted again
+            self._flush_posted()
+        
+        logger.info(f"Posted {len([r for r in results if r['status'] == 'success'])} clip(s)")
+        return results
+    
+    async def post_approved_clips_async(
+        self,
+        storage_path: Optional[str] = None,
+        max_posts_per_run: int = 5,
+        min_delay_minutes: int = 30,
+        max_delay_minutes: int = 120,
+        queue: Optional[asyncio.Queue] = None
+    ) -> List[Dict]:
+        """
+        Async variant of post_approved_clips that sleeps without blocking the event loop
+        
+        Several AutoPoster instances (e.g. one per account) can run concurrently
+        on the same loop, optionally draining a shared queue of bundles.
+        
+        Args:
+            storage_path: Path to storage directory (defaults to today's output)
+            max_posts_per_run: Maximum clips to post in one run
+            min_delay_minutes: Minimum delay between posts (randomized)
+            max_delay_minutes: Maximum delay between posts (randomized)
+            queue: (bundle, caption) jobs to post; defaults to the approved
+                bundles in storage
             
-            results.append(result)
+        Returns:
+            List of posting results
+        """
+        loop = asyncio.get_running_loop()
+        
+        if queue is None:
+            approved = await loop.run_in_executor(
+                None, self._load_approved_bundles, storage_path, max_posts_per_run
+            )
+            queue = asyncio.Queue()
+            for job in self._build_jobs(approved):
+                queue.put_nowait(job)
+        
+        if queue.empty():
+            logger.info("No approved clips ready to post")
+            return []
+        
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS) as thumbnail_pool:
+                while len(results) < max_posts_per_run:
+                    try:
+                        bundle, caption = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    
+                    # Same as post_clip_batch: the cover renders while the delay runs
+                    video_path = Path(bundle['video_path'])
+                    thumbnail = None
+                    if video_path.exists():
+                        thumbnail = loop.run_in_executor(thumbnail_pool, self._make_thumbnail, video_path)
+                    
+                    try:
+                        if results:
+                            delay = self._jittered_delay(min_delay_minutes, max_delay_minutes)
+                            logger.info(f"Waiting {delay//60} minutes before next post...")
+                            await asyncio.sleep(delay)
+                        
+                        # Upload is blocking network I/O, keep it off the event loop
+                        result = await loop.run_in_executor(
+                            None, self._post_bundle, bundle, caption,
+                            await thumbnail if thumbnail is not None else None
+                        )
+                    finally:
+                        if thumbnail is not None:
+                            if thumbnail.done():
+                                self._discard_thumbnail(thumbnail)
+                            else:
+                                thumbnail.add_done_callback(self._discard_thumbnail)
+                    results.append(result)
+                    queue.task_done()
+        finally:
+            self._flush_posted()
         
         logger.info(f"Posted {len([r for r in results if r['status'] == 'success'])} clip(s)")
         return results
     
+    def _storage_for(self, metadata_path: str) -> StorageManager:
+        """Get the StorageManager owning a metadata file (base/metadata/<clip>.json)"""
+        base_path = Path(metadata_path).parent.parent
+        storage = self._storages.get(str(base_path))
+        if storage is None:
+            storage = StorageManager(base_path=base_path)
+            self._storages[str(base_path)] = storage
+        return storage
+    
     def _mark_as_posted(self, bundle: Dict):
-        """Mark bundle as posted in metadata"""
+        """Append a posted marker for the bundle to its storage's posted.log"""
+        metadata_path = bundle.get('metadata_path')
+        if not metadata_path:
+            return
         try:
-            metadata_path = bundle.get('metadata_path')
-            if metadata_path and Path(metadata_path).exists():
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                metadata['posted'] = True
-                metadata['posted_at'] = datetime.now().isoformat()
-                
-                with open(metadata_path, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
+            self._storage_for(metadata_path).record_posted(metadata_path)
         except Exception as e:
             logger.warning(f"Could not mark as posted: {e}")
     
+    def _flush_posted(self):
+        """Close posted.log handles and compact logs that have grown large"""
+        for storage in self._storages.values():
+            storage.close_posted_log()
+            try:
+                storage.compact_posted_log(min_entries=POSTED_LOG_COMPACT_ENTRIES)
+            except Exception as e:
+                logger.warning(f"Could not compact posted log: {e}")
+    
     def schedule_posts(
         self,
         posts_per_day: int = 3,
@@ -331,7 +625,7 @@ if __name__ == "__main__":
             print("✗ Login failed")
             sys.exit(1)
         
-        results = poster.post_approved_clips()
+        results = asyncio.run(poster.post_approved_clips_async())
         print(f"\nPosted {len([r for r in results if r['status'] == 'success'])} clip(s)")
     
     else:
@@ -2,19 +2,78 @@
 OpenClaw Gateway Bridge Module
 Connects to OpenClaw gateway to send WhatsApp messages for approval workflow
 """
+import asyncio
+import hashlib
+import httpx
 import requests
-import json
 import logging
+import time
+from contextlib import suppress
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from json_io import dumps
 from config import (
     OPENCLAW_GATEWAY_URL,
+    OPENCLAW_UPLOAD_MEDIA,
     WHATSAPP_APPROVAL_NUMBER,
 )
 
+try:
+    from requests_toolbelt import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How long a gateway health check result is reused before probing again
+HEALTH_CACHE_TTL_SECONDS = 30
+
+# Read size when hashing clips before upload
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Static parts of the approval message, built once
+_APPROVAL_HEADER = "🎬 *Content Approval Request*\n\n*Caption:*\n"
+_APPROVAL_FOOTER = (
+    "📋 *Reply with:*\n"
+    "✅ Approve - Post this clip\n"
+    "❌ Reject - Skip this clip\n"
+    "📝 Edit - Request caption revision"
+)
+
+
+def _file_chunks(path: Path, size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a file's contents in fixed-size chunks"""
+    with open(path, 'rb') as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+def _sha256_file(path: Path) -> str:
+    """Hex SHA-256 of a file, computed in chunks so the clip is never fully in memory"""
+    hasher = hashlib.sha256()
+    for chunk in _file_chunks(path):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _format_meta_block(metadata: Optional[Dict]) -> str:
+    """Format the source/duration/score lines of an approval message"""
+    if not metadata:
+        return ""
+    source_url = metadata.get('source_url')
+    duration = metadata.get('duration')
+    motion_score = metadata.get('motion_score')
+    return "".join((
+        f"*Source:* {source_url}\n" if source_url else "",
+        f"*Duration:* {duration:.1f}s\n" if duration else "",
+        f"*Action Score:* {motion_score:.2f}\n" if motion_score else "",
+        "\n",
+    ))
+
 
 class OpenClawBridge:
     """Bridge to OpenClaw gateway for WhatsApp messaging"""
@@ -22,7 +81,8 @@ class OpenClawBridge:
     def __init__(
         self,
         gateway_url: Optional[str] = None,
-        phone_number: Optional[str] = None
+        phone_number: Optional[str] = None,
+        upload_media: Optional[bool] = None
     ):
         """
         Initialize OpenClaw bridge
@@ -30,10 +90,47 @@ class OpenClawBridge:
         Args:
             gateway_url: OpenClaw gateway URL (defaults to config)
             phone_number: WhatsApp number for approvals (defaults to config)
+            upload_media: Upload the video file instead of sending its path (defaults to config)
         """
         self.gateway_url = gateway_url or OPENCLAW_GATEWAY_URL
         self.phone_number = phone_number or WHATSAPP_APPROVAL_NUMBER
+        self.upload_media = OPENCLAW_UPLOAD_MEDIA if upload_media is None else upload_media
         self.timeout = 30
+        # Cleared the first time the gateway answers the batch endpoint with 404
+        self._batch_supported = True
+        self._health_cached: Optional[bool] = None
+        # Async client for asend_approval_request, created on first use
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._health_cached_at = 0.0
+        
+        # One keep-alive session for all gateway calls instead of a new
+        # TCP/TLS connection per message. Retry only covers idempotent methods
+        # by default, so approval POSTs are never sent twice.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+    
+    def close(self):
+        """Close the underlying HTTP session"""
+        self._session.close()
+    
+    async def aclose(self):
+        """Close the async HTTP client used by asend_approval_request"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+    
+    def __enter__(self) -> 'OpenClawBridge':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
     def send_approval_request(
         self,
@@ -60,65 +157,234 @@ class OpenClawBridge:
             if not video_file.exists():
                 raise FileNotFoundError(f"Video file not found: {video_path}")
             
-            # Get absolute path for the gateway
-            abs_video_path = str(video_file.absolute())
+            payload = self._build_payload(video_file, caption, metadata, phone_number)
             
-            # Format message with caption and metadata
-            message = self._format_approval_message(caption, metadata)
-            
-            # Prepare payload for OpenClaw gateway
-            # Try multiple formats - adjust based on your OpenClaw API requirements
-            payload = {
-                "phone": phone_number or self.phone_number,
-                "message": message,
-                "media": abs_video_path,  # File path - OpenClaw may accept this directly
-                "media_type": "video",
-                "filename": video_file.name,
-                "metadata": metadata or {}
-            }
-            
-            # Alternative format (uncomment if your OpenClaw API requires this):
-            # payload = {
-            #     "phone": phone_number or self.phone_number,
-            #     "message": message,
-            #     "media": {
-            #         "type": "video",
-            #         "path": abs_video_path,
-            #         "filename": video_file.name
-            #     },
-            #     "metadata": metadata or {}
-            # }
-            
-            logger.info(f"Sending approval request to {phone_number or self.phone_number}")
+            logger.info(f"Sending approval request to {payload['phone']}")
             logger.info(f"Video: {video_file.name}")
             
             # Send request to OpenClaw gateway
-            response = requests.post(
-                self.gateway_url,
-                json=payload,
-                timeout=self.timeout,
-                headers={"Content-Type": "application/json"}
-            )
+            if self.upload_media:
+                response = self._upload_approval_request(video_file, payload)
+            else:
+                response = self._session.post(
+                    self.gateway_url,
+                    json=payload,
+                    timeout=self.timeout
+                )
             
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"✓ Approval request sent successfully")
-                return {
+            return self._parse_approval_response(response)
+                
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            return {
+                "status": "error",
+                "error": str(e),
+                "type": "file_not_found"
+            }
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request failed: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "type": "network_error"
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "type": "unknown"
+            }
+    
+    def send_approval_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Send several approval requests in a single gateway call
+        
+        Posts a {"requests": [...]} envelope to the gateway's batch endpoint. Falls
+        back to one send_approval_request per item when the gateway has no batch
+        endpoint, or when clips are uploaded (a JSON envelope cannot carry the files).
+        
+        Args:
+            items: send_approval_request keyword arguments
+                (video_path, caption and optionally metadata, phone_number)
+            
+        Returns:
+            Response dictionaries in the same order as items
+        """
+        if not self.upload_media and self._batch_supported:
+            results = self._send_batch(items)
+            if results is not None:
+                return results
+        
+        return [self.send_approval_request(**item) for item in items]
+    
+    def _send_batch(self, items: List[Dict]) -> Optional[List[Dict]]:
+        """
+        POST items to the batch endpoint
+        
+        Returns:
+            Per-item response dictionaries, or None if the gateway has no batch endpoint
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        batch = []  # (item index, payload)
+        for i, item in enumerate(items):
+            video_file = Path(item["video_path"])
+            if not video_file.exists():
+                error = f"Video file not found: {item['video_path']}"
+                logger.error(error)
+                results[i] = {"status": "error", "error": error, "type": "file_not_found"}
+                continue
+            batch.append((i, self._build_payload(
+                video_file, item["caption"], item.get("metadata"), item.get("phone_number")
+            )))
+        
+        if not batch:
+            return results
+        
+        logger.info(f"Sending {len(batch)} approval requests in one batch")
+        try:
+            response = self._session.post(
+                self.gateway_url.replace("/api/message", "/api/batch"),
+                json={"requests": [payload for _, payload in batch]},
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Batch request failed: {str(e)}")
+            for i, _ in batch:
+                results[i] = {"status": "error", "error": str(e), "type": "network_error"}
+            return results
+        
+        if response.status_code == 404:
+            logger.warning("⚠ Gateway has no batch endpoint - sending approval requests one by one")
+            self._batch_supported = False
+            return None
+        
+        if response.status_code != 200:
+            error_msg = f"Gateway returned status {response.status_code}: {response.text}"
+            logger.error(error_msg)
+            for i, _ in batch:
+                results[i] = {
+                    "status": "error",
+                    "code": response.status_code,
+                    "error": response.text,
+                    "details": error_msg
+                }
+            return results
+        
+        responses = response.json().get("responses", [])
+        for n, (i, _) in enumerate(batch):
+            result = responses[n] if n < len(responses) else {"error": "Missing from batch response"}
+            if result.get("error"):
+                results[i] = {"status": "error", "error": result["error"], "response": result}
+            else:
+                results[i] = {
                     "status": "success",
                     "message_id": result.get("id") or result.get("messageId"),
                     "timestamp": result.get("timestamp"),
                     "response": result
                 }
+        
+        logger.info(f"✓ Batch of {len(batch)} approval requests sent")
+        return results
+    
+    async def send_approval_request_many(
+        self,
+        items: List[Dict],
+        concurrency: int = 8
+    ) -> List[Dict]:
+        """
+        Send several approval requests concurrently over one async HTTP client
+        
+        Args:
+            items: send_approval_request keyword arguments
+                (video_path, caption and optionally metadata, phone_number)
+            concurrency: Maximum number of requests in flight
+            
+        Returns:
+            Response dictionaries in the same order as items
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        client = self._make_async_client(httpx.Limits(
+            max_keepalive_connections=concurrency,
+            max_connections=concurrency * 2
+        ))
+        
+        async def send_one(item: Dict) -> Dict:
+            async with semaphore:
+                return await self._asend_approval_request(client, **item)
+        
+        async with client:
+            return await asyncio.gather(*(send_one(item) for item in items))
+    
+    async def asend_approval_request(
+        self,
+        video_path: str,
+        caption: str,
+        metadata: Optional[Dict] = None,
+        phone_number: Optional[str] = None
+    ) -> Dict:
+        """
+        Async version of send_approval_request that does not block the event loop
+        
+        Uses a client shared for the bridge's lifetime; call aclose() when done.
+        The client belongs to the event loop it was first used on.
+        
+        Args:
+            video_path: Path to the clipped video file
+            caption: AI-generated caption text
+            metadata: Additional metadata (source URL, clip info, etc.)
+            phone_number: Override default phone number
+            
+        Returns:
+            Dictionary with response status and details
+        """
+        if self._aclient is None:
+            self._aclient = self._make_async_client(
+                httpx.Limits(max_keepalive_connections=8, max_connections=16)
+            )
+        return await self._asend_approval_request(
+            self._aclient, video_path, caption, metadata, phone_number
+        )
+    
+    def _make_async_client(self, limits: httpx.Limits) -> httpx.AsyncClient:
+        """Create an async client, over HTTP/2 when the h2 package is installed"""
+        try:
+            return httpx.AsyncClient(http2=True, limits=limits, timeout=self.timeout)
+        except ImportError:
+            return httpx.AsyncClient(limits=limits, timeout=self.timeout)
+    
+    async def _asend_approval_request(
+        self,
+        client: httpx.AsyncClient,
+        video_path: str,
+        caption: str,
+        metadata: Optional[Dict] = None,
+        phone_number: Optional[str] = None
+    ) -> Dict:
+        """Async counterpart of send_approval_request on a caller-owned httpx client"""
+        try:
+            video_file = Path(video_path)
+            # stat() can stall on network filesystems, so keep it off the event loop
+            if not await asyncio.to_thread(video_file.exists):
+                raise FileNotFoundError(f"Video file not found: {video_path}")
+            
+            payload = self._build_payload(video_file, caption, metadata, phone_number)
+            logger.info(f"Sending approval request to {payload['phone']}: {video_file.name}")
+            
+            if self.upload_media:
+                digest = await asyncio.to_thread(_sha256_file, video_file)
+                with open(video_file, 'rb') as media:
+                    response = await client.post(
+                        self.gateway_url,
+                        data={**payload, "media_sha256": digest},
+                        files={"media": (video_file.name, media, "video/mp4")},
+                        headers={"X-Content-SHA256": digest}
+                    )
             else:
-                error_msg = f"Gateway returned status {response.status_code}: {response.text}"
-                logger.error(error_msg)
-                return {
-                    "status": "error",
-                    "code": response.status_code,
-                    "error": response.text,
-                    "details": error_msg
-                }
-                
+                response = await client.post(self.gateway_url, json=payload)
+            
+            return self._parse_approval_response(response)
+        
         except FileNotFoundError as e:
             logger.error(str(e))
             return {
@@ -126,7 +392,7 @@ class OpenClawBridge:
                 "error": str(e),
                 "type": "file_not_found"
             }
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request failed: {str(e)}")
             return {
                 "status": "error",
@@ -141,6 +407,98 @@ class OpenClawBridge:
                 "type": "unknown"
             }
     
+    def _build_payload(
+        self,
+        video_file: Path,
+        caption: str,
+        metadata: Optional[Dict],
+        phone_number: Optional[str]
+    ) -> Dict:
+        """
+        Build the approval request body shared by the sync and async senders
+        
+        In upload mode these are the multipart form fields (the video is attached
+        separately); otherwise it is the JSON body pointing at the local file.
+        """
+        payload = {
+            "phone": phone_number or self.phone_number,
+            "message": self._format_approval_message(caption, metadata),
+            "media_type": "video",
+        }
+        if self.upload_media:
+            payload["metadata"] = dumps(metadata or {}).decode('utf-8')
+        else:
+            # Legacy mode: the gateway reads the clip from this machine's disk
+            payload["media"] = str(video_file.absolute())
+            payload["filename"] = video_file.name
+            payload["metadata"] = metadata or {}
+        return payload
+    
+    def _parse_approval_response(self, response) -> Dict:
+        """Turn a gateway response (requests or httpx) into a result dictionary"""
+        if response.status_code == 200:
+            result = response.json()
+            logger.info(f"✓ Approval request sent successfully")
+            return {
+                "status": "success",
+                "message_id": result.get("id") or result.get("messageId"),
+                "timestamp": result.get("timestamp"),
+                "response": result
+            }
+        
+        error_msg = f"Gateway returned status {response.status_code}: {response.text}"
+        logger.error(error_msg)
+        return {
+            "status": "error",
+            "code": response.status_code,
+            "error": response.text,
+            "details": error_msg
+        }
+    
+    def _upload_approval_request(
+        self,
+        video_file: Path,
+        fields: Dict
+    ) -> requests.Response:
+        """
+        POST the approval request as multipart form data with the video attached
+        
+        The clip's SHA-256 is hashed from disk first and sent both as a header and
+        a form field, so the gateway can verify the upload and recognise repeats.
+        
+        Args:
+            video_file: Clip to upload
+            fields: Form fields from _build_payload
+            
+        Returns:
+            Gateway response
+        """
+        digest = _sha256_file(video_file)
+        fields = {**fields, "media_sha256": digest}
+        
+        with open(video_file, 'rb') as media:
+            if TOOLBELT_AVAILABLE:
+                # Streams the file in chunks; files= builds the whole multipart body in memory
+                body = MultipartEncoder(fields={
+                    **fields,
+                    "media": (video_file.name, media, "video/mp4"),
+                })
+                return self._session.post(
+                    self.gateway_url,
+                    data=body,
+                    headers={"Content-Type": body.content_type, "X-Content-SHA256": digest},
+                    timeout=self.timeout
+                )
+            
+            # Drop the session's JSON content type so requests sets the multipart boundary
+            return self._session.post(
+                self.gateway_url,
+                data=fields,
+                files={"media": (video_file.name, media, "video/mp4")},
+                headers={"Content-Type": None, "X-Content-SHA256": digest},
+                timeout=self.timeout
+            )
+    
     def _format_approval_message(
         self,
         caption: str,
@@ -156,58 +514,26 @@ class OpenClawBridge:
         Returns:
             Formatted message string
         """
-        message_parts = [
-            "🎬 *Content Approval Request*",
-            "",
-            f"*Caption:*\n{caption}",
-            ""
-        ]
-        
-        if metadata:
-            if metadata.get('source_url'):
-                message_parts.append(f"*Source:* {metadata['source_url']}")
-            if metadata.get('duration'):
-                message_parts.append(f"*Duration:* {metadata['duration']:.1f}s")
-            if metadata.get('motion_score'):
-                message_parts.append(f"*Action Score:* {metadata['motion_score']:.2f}")
-            message_parts.append("")
-        
-        message_parts.extend([
-            "📋 *Reply with:*",
-            "✅ Approve - Post this clip",
-            "❌ Reject - Skip this clip",
-            "📝 Edit - Request caption revision"
-        ])
-        
-        return "\n".join(message_parts)
+        return f"{_APPROVAL_HEADER}{caption}\n\n{_format_meta_block(metadata)}{_APPROVAL_FOOTER}"
     
     def send_text_message(
         self,
-        message: str,
+        message: Union[str, bytes],
         phone_number: Optional[str] = None
     ) -> Dict:
         """
         Send a simple text message (no media)
         
         Args:
-            message: Text message to send
-            phone_number: Override default phone number
+            message: Text message to send, or a body from prebuild_text
+            phone_number: Override default phone number (ignored for prebuilt bodies)
             
         Returns:
             Response dictionary
         """
         try:
-            payload = {
-                "phone": phone_number or self.phone_number,
-                "message": message
-            }
-            
-            response = requests.post(
-                self.gateway_url,
-                json=payload,
-                timeout=self.timeout,
-                headers={"Content-Type": "application/json"}
-            )
+            body = message if isinstance(message, bytes) else self.prebuild_text(message, phone_number)
+            response = self._post_raw(body)
             
             if response.status_code == 200:
                 return {
@@ -228,29 +554,61 @@ class OpenClawBridge:
                 "error": str(e)
             }
     
-    def check_gateway_health(self) -> bool:
+    def prebuild_text(self, message: str, phone_number: Optional[str] = None) -> bytes:
+        """
+        Serialize a text message body once so repeated sends skip JSON encoding
+        
+        Args:
+            message: Text message to send
+            phone_number: Override default phone number
+            
+        Returns:
+            JSON body to pass to send_text_message
+        """
+        return dumps({"phone": phone_number or self.phone_number, "message": message})
+    
+    def _post_raw(self, body: bytes) -> requests.Response:
+        """POST an already-serialized JSON body (the session sets the content type)"""
+        return self._session.post(self.gateway_url, data=body, timeout=self.timeout)
+    
+    def check_gateway_health(self, force: bool = False) -> bool:
         """
         Check if OpenClaw gateway is accessible
         
+        The result is reused for HEALTH_CACHE_TTL_SECONDS so a burst of sends
+        only probes the gateway once; send failures still surface on their own.
+        
+        Args:
+            force: Probe the gateway even if a recent result is cached
+            
         Returns:
             True if gateway is reachable, False otherwise
         """
-        try:
-            # Try a simple health check endpoint or ping the main endpoint
-            health_url = self.gateway_url.replace("/api/message", "/health")
-            response = requests.get(health_url, timeout=5)
-            return response.status_code == 200
-        except:
-            # If health endpoint doesn't exist, try the main endpoint
-            try:
-                response = requests.get(
-                    self.gateway_url.replace("/api/message", ""),
-                    timeout=5
-                )
-                return True
-            except:
-                logger.warning("Could not verify gateway health - will attempt to send anyway")
-                return False
+        if (
+            not force
+            and self._health_cached is not None
+            and time.monotonic() - self._health_cached_at < HEALTH_CACHE_TTL_SECONDS
+        ):
+            return self._health_cached
+        
+        healthy = self._probe_gateway()
+        self._health_cached = healthy
+        self._health_cached_at = time.monotonic()
+        return healthy
+    
+    def _probe_gateway(self) -> bool:
+        """Hit the gateway's health endpoint, falling back to its root URL"""
+        endpoints = (
+            self.gateway_url.replace("/api/message", "/health"),
+            self.gateway_url.replace("/api/message", ""),
+        )
+        for url in endpoints:
+            with suppress(requests.exceptions.RequestException):
+                if self._session.get(url, timeout=5).ok:
+                    return True
+        
+        logger.warning("Could not verify gateway health - will attempt to send anyway")
+        return False
 
 
 # Test the bridge independently
@@ -2,15 +2,65 @@
 Campaign Manager
 Manages Whop.com campaigns with specific guidelines and rules
 """
-import json
+import os
+import re
 import logging
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 from datetime import datetime
 
+from json_io import loads, dumps, write_atomic
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    # google-re2: linear-time DFA matching with the same API as re
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+
+# How often validate_source_url re-stats guidelines files to pick up edits
+CAMPAIGNS_MTIME_POLL_SECONDS = 30
+
+_YT_ID_PATTERN = r'(?:youtube\.com/watch\?v=|youtube\.com/shorts/|youtu\.be/)([a-zA-Z0-9_-]{11})'
+_YT_ID_RE = (re2 if RE2_AVAILABLE else re).compile(_YT_ID_PATTERN)
+
+
+@lru_cache(maxsize=1024)
+def _extract_youtube_id(url: str) -> Optional[str]:
+    """Extract YouTube video ID from URL (memoized, approved URLs repeat across validations)"""
+    match = _YT_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=4096)
+def _url_key(url: str) -> Tuple[str, str]:
+    """
+    Normalize a URL to a (host, video-id-or-path) key for set lookups
+    
+    Watch URLs key on their video ID, everything else on its path, so
+    watch and Shorts links for the same ID stay distinct.
+    """
+    url = url.strip()
+    parsed = urlparse(url if "://" in url else f"//{url}")
+    host = parsed.netloc.lower()
+    if host.startswith(("www.", "m.")):
+        host = host.split(".", 1)[1]
+    path = parsed.path.rstrip("/")
+    
+    if host == "youtube.com" and path == "/watch":
+        video_id = _extract_youtube_id(url)
+        if video_id:
+            return host, video_id
+    return host, path
+
 
 class CampaignManager:
     """Manages multiple Whop.com campaigns with their specific rules"""
@@ -24,46 +74,167 @@ class CampaignManager:
         """
         self.campaigns_dir = Path(campaigns_dir)
         self.campaigns_dir.mkdir(exist_ok=True)
-        self.campaigns = self._load_all_campaigns()
+        self._index_path = self.campaigns_dir / "_index.json"
+        self._index_dirty = False
+        self._cache: Dict[str, Dict] = {}
+        self._source_indexes: Dict[str, Dict] = {}
+        self._summary_index: Optional[List[Dict]] = None
+        self._campaign_ids = self._discover_campaign_ids()
+        
+        if self._index_is_fresh():
+            self._cache = self._read_index()
+        
+        self._campaigns_mtime = self._stat_campaigns_mtime()
+        self._campaigns_mtime_checked = time.monotonic()
+        # Per-instance memo; the mtime argument invalidates entries when guidelines change
+        self._validate_cached = lru_cache(maxsize=4096)(self._validate_source_url)
+    
+    def _discover_campaign_ids(self) -> set:
+        """Find campaign folders that contain a guidelines.json"""
+        campaign_ids = set()
+        # DirEntry.is_dir() uses the dirent type, so only guidelines.json is stat'd
+        with os.scandir(self.campaigns_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if os.path.isfile(os.path.join(entry.path, "guidelines.json")):
+                    campaign_ids.add(entry.name)
+        return campaign_ids
+    
+    @property
+    def campaigns(self) -> Dict[str, Dict]:
+        """All campaigns keyed by ID (loads any not yet parsed)"""
+        return self._load_all_campaigns()
     
     def _load_all_campaigns(self) -> Dict[str, Dict]:
-        """Load all campaigns from the campaigns directory"""
-        campaigns = {}
+        """Load every campaign not already cached and rewrite the index if anything changed"""
+        missing = sorted(self._campaign_ids - self._cache.keys())
+        if missing:
+            # File reads and parsing release the GIL, so overlap them across folders
+            with ThreadPoolExecutor(max_workers=min(32, len(missing))) as executor:
+                results = list(executor.map(self._load_campaign, missing))
+            
+            for campaign_id, campaign in zip(missing, results):
+                if campaign is None:
+                    self._campaign_ids.discard(campaign_id)
+                else:
+                    self._cache[campaign_id] = campaign
         
-        if not self.campaigns_dir.exists():
+        if missing or self._index_dirty:
+            self._write_index(self._cache)
+        
+        return self._cache
+    
+    def _load_campaign(self, campaign_id: str) -> Optional[Dict]:
+        """Parse a single campaign's guidelines file"""
+        guidelines_file = self.campaigns_dir / campaign_id / "guidelines.json"
+        try:
+            campaign_data = loads(guidelines_file.read_bytes())
+            logger.info(f"Loaded campaign: {campaign_id}")
+            return campaign_data
+        except Exception as e:
+            logger.error(f"Failed to load campaign {campaign_id}: {e}")
+            return None
+    
+    def _read_index(self) -> Dict[str, Dict]:
+        """Read the consolidated campaign index, returning an empty cache if unreadable"""
+        try:
+            campaigns = loads(self._index_path.read_bytes())
+            logger.info(f"Loaded {len(campaigns)} campaign(s) from index")
             return campaigns
+        except Exception as e:
+            logger.warning(f"Campaign index unreadable, rebuilding: {e}")
+            return {}
+    
+    def _index_is_fresh(self) -> bool:
+        """Check that the index is newer than the campaigns directory and every guidelines file"""
+        try:
+            index_mtime = self._index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
         
-        for campaign_folder in self.campaigns_dir.iterdir():
-            if not campaign_folder.is_dir():
-                continue
-            
-            campaign_id = campaign_folder.name
-            guidelines_file = campaign_folder / "guidelines.json"
-            
-            if guidelines_file.exists():
-                try:
-                    with open(guidelines_file, 'r', encoding='utf-8') as f:
-                        campaign_data = json.load(f)
-                        campaigns[campaign_id] = campaign_data
-                        logger.info(f"Loaded campaign: {campaign_id}")
-                except Exception as e:
-                    logger.error(f"Failed to load campaign {campaign_id}: {e}")
+        if self.campaigns_dir.stat().st_mtime_ns > index_mtime:
+            return False
+        
+        for campaign_id in self._campaign_ids:
+            guidelines_file = self.campaigns_dir / campaign_id / "guidelines.json"
+            if guidelines_file.stat().st_mtime_ns > index_mtime:
+                return False
         
+        return True
+    
+    def _stat_campaigns_mtime(self) -> int:
+        """Newest modification time (ns) across all guidelines files"""
+        newest = 0
+        for campaign_id in self._campaign_ids:
+            try:
+                mtime = (self.campaigns_dir / campaign_id / "guidelines.json").stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            newest = max(newest, mtime)
+        return newest
+    
+    def _current_campaigns_mtime(self) -> int:
+        """Guidelines mtime, re-stat'd at most every CAMPAIGNS_MTIME_POLL_SECONDS"""
+        now = time.monotonic()
+        if now - self._campaigns_mtime_checked >= CAMPAIGNS_MTIME_POLL_SECONDS:
+            self._campaigns_mtime_checked = now
+            mtime = self._stat_campaigns_mtime()
+            if mtime != self._campaigns_mtime:
+                logger.info("Campaign guidelines changed on disk, reloading")
+                self._campaigns_mtime = mtime
+                self._refresh_index()
+        return self._campaigns_mtime
+    
+    def _refresh_index(self) -> Dict[str, Dict]:
+        """Drop the cache, re-parse every campaign folder and rewrite the index"""
+        self._cache = {}
+        self._source_indexes = {}
+        self._index_dirty = True
+        campaigns = self._load_all_campaigns()
+        self._summary_index = self._build_summary_index(campaigns)
         return campaigns
     
+    def _write_index(self, campaigns: Dict[str, Dict]):
+        """Atomically replace the consolidated campaign index"""
+        try:
+            write_atomic(self._index_path, dumps(campaigns))
+            # The rename bumps the directory mtime, so touch the index to keep it newer
+            os.utime(self._index_path)
+            self._index_dirty = False
+        except OSError as e:
+            logger.warning(f"Could not write campaign index: {e}")
+    
     def get_campaign(self, campaign_id: str) -> Optional[Dict]:
-        """Get campaign by ID"""
-        return self.campaigns.get(campaign_id)
+        """Get campaign by ID, parsing its guidelines on first access"""
+        campaign = self._cache.get(campaign_id)
+        if campaign is not None or campaign_id not in self._campaign_ids:
+            return campaign
+        
+        campaign = self._load_campaign(campaign_id)
+        if campaign is None:
+            # Don't retry a broken guidelines file on every lookup
+            self._campaign_ids.discard(campaign_id)
+            return None
+        
+        self._cache[campaign_id] = campaign
+        return campaign
     
     def list_campaigns(self) -> List[Dict]:
         """List all available campaigns"""
+        if self._summary_index is None:
+            self._summary_index = self._build_summary_index(self._load_all_campaigns())
+        return list(self._summary_index)
+    
+    def _build_summary_index(self, campaigns: Dict[str, Dict]) -> List[Dict]:
+        """Project campaigns down to the id/name/whop_url fields list_campaigns needs"""
         return [
             {
                 "id": campaign_id,
                 "name": data.get("campaign_name", campaign_id),
                 "whop_url": data.get("whop_campaign_url")
             }
-            for campaign_id, data in self.campaigns.items()
+            for campaign_id, data in campaigns.items()
         ]
     
     def validate_source_url(self, url: str, campaign_id: str) -> bool:
@@ -77,63 +248,51 @@ class CampaignManager:
         Returns:
             True if URL is approved
         """
+        return self._validate_cached(url, campaign_id, self._current_campaigns_mtime())
+    
+    def _validate_source_url(self, url: str, campaign_id: str, campaigns_mtime: int) -> bool:
+        """Uncached validation; campaigns_mtime only keys the memo in validate_source_url"""
         campaign = self.get_campaign(campaign_id)
         if not campaign:
             return False
         
-        approved = campaign.get("approved_sources", {})
+        index = self._source_indexes.get(campaign_id)
+        if index is None:
+            index = self._build_source_index(campaign)
+            self._source_indexes[campaign_id] = index
         
-        # Check all source types
-        for source_type, urls in approved.items():
-            for approved_url in urls:
-                # Check if URL matches or is from the same source
-                if self._url_matches(url, approved_url):
-                    return True
-        
-        return False
-    
-    def _url_matches(self, url: str, approved_url: str) -> bool:
-        """Check if URL matches approved source"""
-        # Extract base URLs for comparison
-        url_lower = url.lower()
-        approved_lower = approved_url.lower()
-        
-        # Direct match
-        if approved_url in url or url in approved_url:
-            return True
-        
-        # YouTube video ID match
-        if "youtube.com/watch" in url_lower and "youtube.com/watch" in approved_lower:
-            url_id = self._extract_youtube_id(url)
-            approved_id = self._extract_youtube_id(approved_url)
-            if url_id and approved_id and url_id == approved_id:
-                return True
-        
-        # YouTube Shorts match
-        if "youtube.com/shorts" in url_lower and "youtube.com/shorts" in approved_lower:
-            url_id = self._extract_youtube_id(url)
-            approved_id = self._extract_youtube_id(approved_url)
-            if url_id and approved_id and url_id == approved_id:
-                return True
+        host, key = _url_key(url)
         
         # Google Drive folder match
-        if "drive.google.com" in url_lower and "drive.google.com" in approved_lower:
-            # Same folder structure
+        if index["has_gdrive"] and host == "drive.google.com":
             return True
         
+        # Exact match, or the URL sits under an approved channel/playlist path
+        url_keys = index["url_keys"]
+        if (host, key) in url_keys:
+            return True
+        while key.count("/") > 1:
+            key = key.rsplit("/", 1)[0]
+            if (host, key) in url_keys:
+                return True
         return False
     
+    def _build_source_index(self, campaign: Dict) -> Dict:
+        """Precompute hash lookups for a campaign's approved sources"""
+        url_keys = frozenset(
+            _url_key(approved_url)
+            for urls in campaign.get("approved_sources", {}).values()
+            for approved_url in urls
+        )
+        
+        return {
+            "url_keys": url_keys,
+            "has_gdrive": any(host == "drive.google.com" for host, _ in url_keys)
+        }
+    
     def _extract_youtube_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID from URL"""
-        import re
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtube\.com\/shorts\/|youtu\.be\/)([a-zA-Z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        return _extract_youtube_id(url)
     
     def get_clipping_rules(self, campaign_id: str) -> Dict:
         """Get clipping rules for a campaign"""
@@ -159,13 +318,22 @@ class CampaignManager:
             "tone": caption_guidelines.get("tone", "")
         }
     
-    def create_campaign_folder(self, campaign_id: str, guidelines: Dict) -> Path:
+    def create_campaign_folder(
+        self,
+        campaign_id: str,
+        guidelines: Dict,
+        update_index: bool = True,
+        pretty: bool = False
+    ) -> Path:
         """
         Create a new campaign folder with guidelines
         
         Args:
             campaign_id: Unique campaign identifier
             guidelines: Campaign guidelines dictionary
+            update_index: Rewrite the campaign index now (pass False when
+                creating in bulk and call flush_index() afterwards)
+            pretty: Indent guidelines.json for hand editing (compact by default)
             
         Returns:
             Path to created campaign folder
@@ -174,12 +342,25 @@ class CampaignManager:
         campaign_folder.mkdir(exist_ok=True)
         
         guidelines_file = campaign_folder / "guidelines.json"
-        with open(guidelines_file, 'w', encoding='utf-8') as f:
-            json.dump(guidelines, f, indent=2, ensure_ascii=False)
+        write_atomic(guidelines_file, dumps(guidelines, indent=pretty))
+        
+        self._campaign_ids.add(campaign_id)
+        self._cache[campaign_id] = guidelines
+        self._source_indexes.pop(campaign_id, None)
+        self._summary_index = None
+        self._index_dirty = True
+        # Move the validation memo onto a new key without triggering a full reload
+        self._campaigns_mtime = max(self._campaigns_mtime, guidelines_file.stat().st_mtime_ns)
+        if update_index:
+            self.flush_index()
         
         logger.info(f"Created campaign folder: {campaign_folder}")
         return campaign_folder
     
+    def flush_index(self):
+        """Write the campaign index if campaigns changed since it was last saved"""
+        self._load_all_campaigns()
+    
     def get_campaign_output_path(self, campaign_id: str) -> Path:
         """Get output path for campaign-specific clips"""
         return Path("output") / "campaigns" / campaign_id / datetime.now().strftime("%Y-%m-%d")
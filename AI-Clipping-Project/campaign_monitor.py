@@ -2,64 +2,126 @@
 Campaign Monitor
 Monitors approved sources for campaigns and processes them
 """
-import sys
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
-import time
-import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 
-sys.path.insert(0, str(Path(__file__).parent / "AI-Clipping-Project"))
-
-from campaign_manager import CampaignManager
 from campaign_processor import CampaignProcessor
-import yt_dlp
+from json_io import loads, dumps, write_atomic
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_now = datetime.now
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Campaigns processed concurrently per monitoring pass (downloads and API calls are I/O bound)
+MONITOR_WORKERS = 4
+
+PROCESSED_FILE = Path("campaigns_processed.json")
+# Append-only record of IDs processed since the last save; folded into PROCESSED_FILE on save
+PROCESSED_LOG = Path("campaigns_processed.jsonl")
+
+_VIDEO_ID_RE = re.compile(r'(?:youtube\.com/watch\?v=|youtube\.com/shorts/|youtu\.be/)([a-zA-Z0-9_-]{11})')
+
 
 class CampaignMonitor:
     """Monitors campaign-approved sources for new content"""
     
     def __init__(self):
         """Initialize campaign monitor"""
-        self.campaign_manager = CampaignManager()
         self.processor = CampaignProcessor()
-        self.processed_content = self._load_processed()
+        # Share the processor's manager so each campaign is parsed once per process
+        self.campaign_manager = self.processor.campaign_manager
+        self._processed_sets = self._load_processed()
+        self._processed_lock = threading.Lock()
+        self._processed_log = None
+        # Anything replayed from the log still has to be folded into the JSON file
+        self._dirty = PROCESSED_LOG.exists()
+    
+    def _load_processed(self) -> Dict[str, Set[str]]:
+        """Load processed content tracking as per-campaign sets of video IDs"""
+        processed = {}
+        if PROCESSED_FILE.exists():
+            with open(PROCESSED_FILE, 'rb') as f:
+                if IJSON_AVAILABLE:
+                    # Stream one campaign's ID list at a time instead of materializing the whole document
+                    processed = {campaign_id: set(video_ids) for campaign_id, video_ids in ijson.kvitems(f, '')}
+                else:
+                    processed = {campaign_id: set(video_ids) for campaign_id, video_ids in loads(f.read()).items()}
+        
+        # Replay IDs appended since the last save
+        try:
+            with open(PROCESSED_LOG, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        # Blank line or a write torn by a crash
+                        continue
+                    processed.setdefault(entry['campaign'], set()).add(entry['video_id'])
+        except FileNotFoundError:
+            pass
+        return processed
     
-    def _load_processed(self) -> Dict[str, List[str]]:
-        """Load processed content tracking"""
-        processed_file = Path("campaigns_processed.json")
-        if processed_file.exists():
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+    def _mark_processed(self, campaign_id: str, video_id: str):
+        """Record a processed video in memory and append it to the processed log"""
+        with self._processed_lock:
+            video_ids = self._processed_sets.setdefault(campaign_id, set())
+            if video_id in video_ids:
+                return
+            video_ids.add(video_id)
+            self._dirty = True
+            
+            if self._processed_log is None:
+                self._processed_log = open(PROCESSED_LOG, 'ab')
+            self._processed_log.write(dumps({'campaign': campaign_id, 'video_id': video_id}) + b'\n')
+            self._processed_log.flush()
     
     def _save_processed(self):
-        """Save processed content tracking"""
-        processed_file = Path("campaigns_processed.json")
-        with open(processed_file, 'w', encoding='utf-8') as f:
-            json.dump(self.processed_content, f, indent=2)
+        """Fold the processed log into campaigns_processed.json (sets stored as sorted lists)"""
+        with self._processed_lock:
+            if not self._dirty:
+                return
+            processed = {campaign_id: sorted(video_ids) for campaign_id, video_ids in self._processed_sets.items()}
+            write_atomic(PROCESSED_FILE, dumps(processed, indent=True))
+            
+            # Everything in the log is now in the JSON file
+            if self._processed_log is not None:
+                self._processed_log.close()
+                self._processed_log = None
+            PROCESSED_LOG.unlink(missing_ok=True)
+            self._dirty = False
     
-    def check_campaign_sources(self, campaign_id: str) -> List[Dict]:
+    def check_campaign_sources(self, campaign_id: str, campaign: Optional[Dict] = None) -> List[Dict]:
         """
         Check approved sources for a campaign for processable content
         
         Args:
             campaign_id: Campaign to check
+            campaign: Already-loaded campaign guidelines (looked up by ID if omitted)
             
         Returns:
-            List of content items to process
+            List of content items to process, each carrying its parsed video_id
         """
-        campaign = self.campaign_manager.get_campaign(campaign_id)
+        if campaign is None:
+            campaign = self.campaign_manager.get_campaign(campaign_id)
         if not campaign:
             return []
         
         approved = campaign.get("approved_sources", {})
         new_content = []
-        processed = self.processed_content.get(campaign_id, [])
+        processed = self._processed_sets.get(campaign_id, set())
         
         # Check YouTube sources
         for source_type in ["youtube_longform", "youtube_shorts"]:
@@ -72,7 +134,8 @@ class CampaignMonitor:
                         "url": url,
                         "type": "youtube",
                         "campaign_id": campaign_id,
-                        "source_type": source_type
+                        "source_type": source_type,
+                        "video_id": video_id
                     })
         
         # Check Google Drive (would need Google Drive API)
@@ -83,31 +146,35 @@ class CampaignMonitor:
     
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID from URL"""
-        import re
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtube\.com\/shorts\/|youtu\.be\/)([a-zA-Z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
-    
-    def process_campaign_content(self, campaign_id: str, max_items: int = 5) -> List[Dict]:
+        match = _VIDEO_ID_RE.search(url)
+        return match.group(1) if match else None
+    
+    def process_campaign_content(
+        self,
+        campaign_id: str,
+        max_items: int = 5,
+        save: bool = True
+    ) -> List[Dict]:
         """
         Process new content for a campaign
         
         Args:
             campaign_id: Campaign to process
             max_items: Maximum items to process in one run
+            save: Write processed tracking when done (the monitor saves once per pass)
             
         Returns:
             List of processed bundles
         """
-        new_content = self.check_campaign_sources(campaign_id)
+        campaign = self.campaign_manager.get_campaign(campaign_id)
+        if not campaign:
+            logger.warning("⚠ Campaign '%s' not found", campaign_id)
+            return []
+        
+        new_content = self.check_campaign_sources(campaign_id, campaign)
         
         if not new_content:
-            logger.info(f"No new content found for campaign '{campaign_id}'")
+            logger.info("No new content found for campaign '%s'", campaign_id)
             return []
         
         # Limit processing
@@ -116,59 +183,80 @@ class CampaignMonitor:
         all_bundles = []
         for item in new_content:
             try:
-                logger.info(f"Processing: {item['url']} for campaign '{campaign_id}'")
+                logger.info("Processing: %s for campaign '%s'", item['url'], campaign_id)
                 
                 bundles = self.processor.process_for_campaign(
                     video_url=item['url'],
                     campaign_id=campaign_id,
-                    num_clips=3
+                    num_clips=3,
+                    campaign=campaign
                 )
                 
                 all_bundles.extend(bundles)
                 
                 # Mark as processed
-                video_id = self._extract_video_id(item['url'])
-                if video_id:
-                    if campaign_id not in self.processed_content:
-                        self.processed_content[campaign_id] = []
-                    self.processed_content[campaign_id].append(video_id)
+                self._mark_processed(campaign_id, item['video_id'])
                 
             except Exception as e:
-                logger.error(f"Failed to process {item['url']}: {e}")
+                logger.error("Failed to process %s: %s", item['url'], e)
                 continue
         
-        self._save_processed()
+        if save:
+            self._save_processed()
         return all_bundles
     
     def monitor_all_campaigns(self, check_interval_minutes: int = 60):
         """Monitor all campaigns continuously"""
         campaigns = self.campaign_manager.list_campaigns()
         
-        logger.info(f"Monitoring {len(campaigns)} campaign(s)")
-        logger.info(f"Check interval: {check_interval_minutes} minutes")
+        logger.info("Monitoring %d campaign(s)", len(campaigns))
+        logger.info("Check interval: %s minutes", check_interval_minutes)
         
-        while True:
-            try:
-                logger.info(f"Checking campaigns... ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
-                
-                for campaign in campaigns:
-                    campaign_id = campaign['id']
-                    logger.info(f"Checking campaign: {campaign_id}")
+        try:
+            asyncio.run(self._monitor_loop(campaigns, check_interval_minutes))
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped")
+    
+    async def _monitor_loop(self, campaigns: List[Dict], check_interval_minutes: int):
+        """Run a monitoring pass, then sleep without blocking, until interrupted"""
+        executor = ThreadPoolExecutor(max_workers=MONITOR_WORKERS)
+        try:
+            while True:
+                try:
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("Checking campaigns... (%s)", _now().strftime('%Y-%m-%d %H:%M:%S'))
+                    await self._monitor_pass(campaigns, executor)
                     
-                    bundles = self.process_campaign_content(campaign_id, max_items=3)
+                    logger.info("Sleeping for %s minutes...", check_interval_minutes)
+                    await asyncio.sleep(check_interval_minutes * 60)
                     
-                    if bundles:
-                        logger.info(f"✓ Processed {len(bundles)} clips for {campaign_id}")
-                
-                logger.info(f"Sleeping for {check_interval_minutes} minutes...")
-                time.sleep(check_interval_minutes * 60)
-                
-            except KeyboardInterrupt:
-                logger.info("Monitoring stopped")
-                break
-            except Exception as e:
-                logger.error(f"Error in monitoring: {e}")
-                time.sleep(60)
+                except Exception as e:
+                    logger.error("Error in monitoring: %s", e)
+                    await asyncio.sleep(60)
+        finally:
+            # Keep IDs from campaigns that finished before an interrupt
+            self._save_processed()
+            executor.shutdown(wait=False)
+    
+    async def _monitor_pass(self, campaigns: List[Dict], executor: ThreadPoolExecutor):
+        """Process every campaign concurrently and save processed tracking once"""
+        loop = asyncio.get_running_loop()
+        
+        tasks = []
+        for campaign in campaigns:
+            logger.info("Checking campaign: %s", campaign['id'])
+            tasks.append(loop.run_in_executor(
+                executor, self.process_campaign_content, campaign['id'], 3, False
+            ))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self._save_processed()
+        
+        for campaign, bundles in zip(campaigns, results):
+            if isinstance(bundles, Exception):
+                logger.error("Error checking %s: %s", campaign['id'], bundles)
+            elif bundles:
+                logger.info("✓ Processed %d clips for %s", len(bundles), campaign['id'])
 
 
 # CLI Interface
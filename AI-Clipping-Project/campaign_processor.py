@@ -2,14 +2,12 @@
 Campaign-Specific Processor
 Processes videos according to campaign-specific rules
 """
-import sys
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 import logging
 from typing import Dict, List, Optional
 
-# Add AI-Clipping-Project to path
-sys.path.insert(0, str(Path(__file__).parent / "AI-Clipping-Project"))
-
 from campaign_manager import CampaignManager
 from pipeline import ContentPipeline
 from processor import VideoProcessor
@@ -17,6 +15,7 @@ from caption_generator import CaptionGenerator
 from storage import StorageManager
 from bridge import OpenClawBridge
 from config import APPROVAL_ENABLED
+from json_io import dumps
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,7 +37,8 @@ class CampaignProcessor:
         self,
         video_url: str,
         campaign_id: str,
-        num_clips: int = 3
+        num_clips: int = 3,
+        campaign: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Process a video according to campaign-specific rules
@@ -47,12 +47,14 @@ class CampaignProcessor:
             video_url: URL of video to process
             campaign_id: Campaign ID to process for
             num_clips: Number of clips to extract
+            campaign: Already-loaded campaign guidelines (looked up by ID if omitted)
             
         Returns:
             List of processed clip bundles
         """
         # Validate campaign exists
-        campaign = self.campaign_manager.get_campaign(campaign_id)
+        if campaign is None:
+            campaign = self.campaign_manager.get_campaign(campaign_id)
         if not campaign:
             raise ValueError(f"Campaign '{campaign_id}' not found")
         
@@ -63,8 +65,8 @@ class CampaignProcessor:
                 f"Check campaign guidelines for approved sources."
             )
         
-        logger.info(f"Processing video for campaign: {campaign_id}")
-        logger.info(f"Video URL: {video_url}")
+        logger.info("Processing video for campaign: %s", campaign_id)
+        logger.info("Video URL: %s", video_url)
         
         # Get campaign-specific rules
         clipping_rules = self.campaign_manager.get_clipping_rules(campaign_id)
@@ -74,6 +76,7 @@ class CampaignProcessor:
         bundles = self._process_with_campaign_rules(
             video_url=video_url,
             campaign_id=campaign_id,
+            campaign=campaign,
             clipping_rules=clipping_rules,
             caption_requirements=caption_requirements,
             num_clips=num_clips
@@ -85,23 +88,26 @@ class CampaignProcessor:
         self,
         video_url: str,
         campaign_id: str,
+        campaign: Dict,
         clipping_rules: Dict,
         caption_requirements: Dict,
         num_clips: int
     ) -> List[Dict]:
         """Process video following campaign-specific rules"""
-        from scraper import VideoScraper
         from config import MIN_CLIP_LENGTH, MAX_CLIP_LENGTH
         
-        scraper = VideoScraper()
-        
-        # Download video
-        download_result = scraper.download_video(video_url)
+        # Download video (the pipeline's scraper keeps its YoutubeDL warm across videos)
+        download_result = self.pipeline.scraper.download_video(video_url)
         if not download_result.get('success'):
             raise Exception(f"Download failed: {download_result.get('error')}")
         
         video_path = download_result['video_path']
         video_title = download_result.get('title', 'Untitled')
+        source_info = {
+            'source_uploader': download_result.get('uploader', ''),
+            'source_upload_date': download_result.get('upload_date', ''),
+            'source_duration': download_result.get('duration', 0),
+        }
         
         # Detect segments (campaign-aware)
         # For ADDICTED: Focus on wins, reactions, high-stakes moments
@@ -127,100 +133,141 @@ class CampaignProcessor:
             }]
         
         # Process clips
-        bundles = []
         campaign_output = self.campaign_manager.get_campaign_output_path(campaign_id)
-        campaign_output.mkdir(parents=True, exist_ok=True)
+        # Create the output folders once, not once per clip
+        for subdir in ("clips", "captions", "metadata"):
+            (campaign_output / subdir).mkdir(parents=True, exist_ok=True)
+        selected = segments[:num_clips]
         
-        for i, segment in enumerate(segments[:num_clips]):
-            start = segment['start']
-            end = segment['end']
-            
-            # Generate clip name
-            clip_name = f"{campaign_id}_clip_{i+1:02d}_{segment.get('score', 0.5):.2f}.mp4"
-            clip_output_path = campaign_output / "clips" / clip_name
-            clip_output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Crop to vertical (9:16)
-            self.processor.crop_to_vertical(
-                video_path,
-                str(clip_output_path),
-                start,
-                end
-            )
-            
-            # Generate campaign-specific captions
-            caption_context = (
-                f"Campaign: {campaign_id}. "
-                f"Content: {video_title}. "
-                f"Tone: {caption_requirements.get('tone', 'exciting')}. "
-                f"Style: {caption_requirements.get('style', 'engaging')}"
-            )
-            
-            captions = self.caption_gen.generate_captions(
-                video_description=f"{video_title} - {campaign_id} campaign",
-                topic="viral content",
-                context=caption_context
-            )
-            
-            # Apply campaign-specific caption requirements
-            captions = self._apply_caption_requirements(captions, caption_requirements, "instagram")
-            
-            # Save captions
-            captions_dir = campaign_output / "captions"
-            captions_dir.mkdir(parents=True, exist_ok=True)
-            captions_file = captions_dir / f"{Path(clip_name).stem}_captions.json"
-            import json
-            with open(captions_file, 'w', encoding='utf-8') as f:
-                json.dump(captions, f, indent=2, ensure_ascii=False)
-            
-            # Create metadata
-            metadata = {
-                'campaign_id': campaign_id,
-                'campaign_name': self.campaign_manager.get_campaign(campaign_id).get('campaign_name'),
-                'source_url': video_url,
-                'source_title': video_title,
-                'clip_index': i + 1,
-                'start_time': start,
-                'end_time': end,
-                'duration': end - start,
-                'motion_score': segment.get('score', 0.5),
-                'clipping_rules_applied': clipping_rules,
-                'caption_requirements': caption_requirements,
-                'approval_status': 'pending',
-                'posted': False
-            }
-            
-            metadata_dir = campaign_output / "metadata"
-            metadata_dir.mkdir(parents=True, exist_ok=True)
-            metadata_file = metadata_dir / f"{Path(clip_name).stem}_metadata.json"
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
-            
-            # Send approval request
-            if self.bridge:
-                caption_text = self.caption_gen.format_for_instagram(captions[0] if captions else {})
-                approval_response = self.bridge.send_approval_request(
-                    video_path=str(clip_output_path),
-                    caption=caption_text,
-                    metadata=metadata
+        # One caption request covers every clip
+        caption_contexts = [
+            {
+                'video_description': f"{video_title} - {campaign_id} campaign",
+                'topic': "viral content",
+                'context': (
+                    f"Campaign: {campaign_id}. "
+                    f"Content: {video_title}. "
+                    f"Tone: {caption_requirements.get('tone', 'exciting')}. "
+                    f"Style: {caption_requirements.get('style', 'engaging')}"
                 )
-                metadata['approval_response'] = approval_response
-            
-            # Create bundle
-            bundle = {
-                'campaign_id': campaign_id,
-                'clip_id': Path(clip_name).stem,
-                'video_path': str(clip_output_path),
-                'captions_path': str(captions_file),
-                'metadata_path': str(metadata_file),
-                'captions': captions,
-                'metadata': metadata,
-                'timestamp': datetime.now().isoformat()
             }
-            
-            bundles.append(bundle)
+            for _ in selected
+        ]
         
-        return bundles
+        # Clips are independent and dominated by ffmpeg and HTTP waits, so run them
+        # side by side; the caption request runs while the crops encode
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(selected) + 1) as executor:
+            captions_future = executor.submit(self.caption_gen.generate_captions_batched, caption_contexts)
+            futures = {
+                executor.submit(
+                    self._process_single_clip,
+                    i,
+                    segment,
+                    captions_future=captions_future,
+                    video_path=video_path,
+                    video_url=video_url,
+                    video_title=video_title,
+                    source_info=source_info,
+                    campaign_id=campaign_id,
+                    campaign_name=campaign.get('campaign_name'),
+                    campaign_output=campaign_output,
+                    clipping_rules=clipping_rules,
+                    caption_requirements=caption_requirements
+                ): i
+                for i, segment in enumerate(selected)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        return [results[i] for i in sorted(results)]
+    
+    def _process_single_clip(
+        self,
+        i: int,
+        segment: Dict,
+        captions_future: Future,
+        video_path: str,
+        video_url: str,
+        video_title: str,
+        source_info: Dict,
+        campaign_id: str,
+        campaign_name: Optional[str],
+        campaign_output: Path,
+        clipping_rules: Dict,
+        caption_requirements: Dict
+    ) -> Dict:
+        """
+        Crop, caption, save and send one segment for approval, returning its bundle
+        
+        captions_future resolves to the batched caption lists for all clips.
+        """
+        start = segment['start']
+        end = segment['end']
+        
+        # Generate clip name
+        clip_name = f"{campaign_id}_clip_{i+1:02d}_{segment.get('score', 0.5):.2f}.mp4"
+        clip_output_path = campaign_output / "clips" / clip_name
+        
+        # Crop to vertical (9:16)
+        self.processor.crop_to_vertical(
+            video_path,
+            str(clip_output_path),
+            start,
+            end
+        )
+        
+        captions = captions_future.result()[i]
+        
+        # Apply campaign-specific caption requirements
+        captions = self._apply_caption_requirements(captions, caption_requirements, "instagram")
+        
+        # Save captions
+        captions_file = campaign_output / "captions" / f"{Path(clip_name).stem}_captions.json"
+        captions_file.write_bytes(dumps(captions, indent=True))
+        
+        # Create metadata
+        metadata = {
+            'campaign_id': campaign_id,
+            'campaign_name': campaign_name,
+            'source_url': video_url,
+            'source_title': video_title,
+            **source_info,
+            'clip_index': i + 1,
+            'start_time': start,
+            'end_time': end,
+            'duration': end - start,
+            'motion_score': segment.get('score', 0.5),
+            'clipping_rules_applied': clipping_rules,
+            'caption_requirements': caption_requirements,
+            'approval_status': 'pending',
+            'posted': False
+        }
+        
+        metadata_file = campaign_output / "metadata" / f"{Path(clip_name).stem}_metadata.json"
+        metadata_file.write_bytes(dumps(metadata, indent=True))
+        
+        # Send approval request
+        if self.bridge:
+            caption_text = self.caption_gen.format_for_instagram(captions[0] if captions else {})
+            approval_response = self.bridge.send_approval_request(
+                video_path=str(clip_output_path),
+                caption=caption_text,
+                metadata=metadata
+            )
+            metadata['approval_response'] = approval_response
+        
+        # Create bundle
+        return {
+            'campaign_id': campaign_id,
+            'clip_id': Path(clip_name).stem,
+            'video_path': str(clip_output_path),
+            'captions_path': str(captions_file),
+            'metadata_path': str(metadata_file),
+            'captions': captions,
+            'metadata': metadata,
+            'timestamp': datetime.now().isoformat()
+        }
     
     def _apply_caption_requirements(
         self,
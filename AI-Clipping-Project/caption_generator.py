@@ -2,9 +2,13 @@
 Caption Generator Module
 Generates viral Instagram Reel captions using Cursor API client library
 """
-import json
 import logging
-from typing import List, Dict, Optional
+import re
+import threading
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, List, Dict, Optional, Tuple
+import httpx
 from openai import OpenAI
 from config import (
     CURSOR_API_KEY,
@@ -12,11 +16,179 @@ from config import (
     NUM_CAPTIONS,
     MAX_CAPTION_LENGTH,
     HASHTAG_COUNT,
+    CAPTION_MODEL,
 )
+from json_io import loads
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One pooled client per (api_key, api_base), shared by every CaptionGenerator
+_CLIENTS: Dict[Tuple[str, str], OpenAI] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_client(api_key: str, api_base: str) -> OpenAI:
+    """
+    Get the shared OpenAI client for an API key and base URL
+    
+    The underlying httpx client keeps connections alive (and multiplexes them
+    over HTTP/2 when the h2 package is installed), so repeated and parallel
+    caption requests skip the TCP/TLS handshake.
+    """
+    key = (api_key, api_base)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            limits = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            try:
+                http_client = httpx.Client(http2=True, limits=limits)
+            except ImportError:
+                http_client = httpx.Client(limits=limits)
+            
+            client = OpenAI(api_key=api_key, base_url=api_base, http_client=http_client)
+            _CLIENTS[key] = client
+        return client
+
+
+_DEFAULT_HASHTAGS = ('#viral', '#trending', '#reels', '#fyp', '#foryou')
+_PAD_CAPTION = "Check out this amazing content! 🔥"
+_FALLBACK_TEMPLATES = (
+    "Wait for it... 🔥 This {topic} content is INSANE!",
+    "You won't believe this! 😱 {description_50}...",
+    "Obsessed with this! 💯 Tag someone who needs to see this 👇",
+    "Game changer! 🎯 Save this for later! {description_40}...",
+    "This is why I'm obsessed! 🔥 What do you think? Comment below! 👇",
+)
+
+
+@lru_cache(maxsize=128)
+def _render_fallback_captions(video_description: str, topic: str) -> Tuple[str, ...]:
+    """Fill the fallback caption templates (memoized, failures tend to repeat per video)"""
+    return tuple(
+        template.format(
+            topic=topic,
+            description_50=video_description[:50],
+            description_40=video_description[:40]
+        )
+        for template in _FALLBACK_TEMPLATES[:NUM_CAPTIONS]
+    )
+
+
+# Prompt text that depends only on config constants, rendered once at import;
+# the per-call builders just splice the clip description in between
+_PROMPT_HEAD = f"Generate exactly {NUM_CAPTIONS} viral, highly engaging Instagram Reel captions."
+_PROMPT_REQUIREMENTS = f"""
+
+Requirements for each caption:
+1. Hook the viewer in the first 3-5 words
+2. Keep main caption under {MAX_CAPTION_LENGTH} characters (excluding hashtags)
+3. Include {HASHTAG_COUNT} relevant, trending hashtags
+4. Use 2-4 strategic emojis
+5. Include a call-to-action (question, tag someone, save/share prompt)
+6. Make it shareable and relatable
+7. Use power words: "viral", "wait for it", "obsessed", "game changer", etc.
+8. Match trending Reels algorithm preferences
+
+"""
+_PROMPT_TAIL = _PROMPT_REQUIREMENTS + """Return as JSON with this exact structure:
+{
+  "captions": [
+    {
+      "caption": "Your engaging caption text here with emojis 🎯",
+      "hashtags": ["#hashtag1", "#hashtag2", "#hashtag3", "#hashtag4", "#hashtag5"]
+    },
+    ...
+  ]
+}
+
+Make each caption unique and optimized for maximum engagement."""
+_BATCHED_PROMPT_TAIL = _PROMPT_REQUIREMENTS + """Return as JSON with this exact structure, one entry per clip using its number as "index":
+{
+  "clips": [
+    {
+      "index": 1,
+      "captions": [
+        {
+          "caption": "Your engaging caption text here with emojis 🎯",
+          "hashtags": ["#hashtag1", "#hashtag2", "#hashtag3", "#hashtag4", "#hashtag5"]
+        },
+        ...
+      ]
+    },
+    ...
+  ]
+}
+
+Make each caption unique and optimized for maximum engagement."""
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_CAP_RE = re.compile(r'"caption":\s*"([^"]+)"')
+_HASH_BLOCK_RE = re.compile(r'"hashtags":\s*\[(.*?)\]')
+_HASH_ITEM_RE = re.compile(r'"(#\w+)"')
+_HASHTAG_WORD_RE = re.compile(r'#\w+')
+_CLIP_INDEX_RE = re.compile(r'"index"\s*:')
+
+
+class _CaptionObjectScanner:
+    """Incrementally pull complete {"caption": ...} objects out of streamed JSON text"""
+    
+    def __init__(self):
+        self.buffer = ""
+        self.captions: List[Dict] = []
+        self._pos = 0
+        self._open_braces: List[int] = []
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, chunk: str):
+        """Scan a new chunk, tracking brace depth outside of JSON strings"""
+        self.buffer += chunk
+        for i in range(self._pos, len(self.buffer)):
+            char = self.buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._open_braces.append(i)
+            elif char == '}' and self._open_braces:
+                start = self._open_braces.pop()
+                try:
+                    obj = loads(self.buffer[start:i + 1])
+                except ValueError:
+                    continue
+                if isinstance(obj, dict) and 'caption' in obj:
+                    self.captions.append(obj)
+        self._pos = len(self.buffer)
+
+
+def _extract_caption_list(result) -> List:
+    """Pull the caption list out of the response shapes the model tends to return"""
+    if isinstance(result, dict):
+        if 'captions' in result:
+            return result['captions']
+        if 'data' in result:
+            return result['data']
+        # Assume the dict itself contains caption data
+        return [result] if 'caption' in result else []
+    if isinstance(result, list):
+        return result
+    return []
+
+
+SYSTEM_PROMPT = (
+    "You are a viral content strategist specializing in Instagram Reels. "
+    "Your captions maximize engagement, shares, and comments. "
+    "You understand trending formats, hooks, and hashtag strategies. "
+    "Always return valid JSON format."
+)
+
 
 class CaptionGenerator:
     """Generates engaging Instagram Reel captions using Cursor API"""
@@ -35,11 +207,8 @@ class CaptionGenerator:
         if not self.api_key:
             raise ValueError("CURSOR_API_KEY is required. Set it in .env file or pass as parameter.")
         
-        # Initialize OpenAI client (Cursor API is OpenAI-compatible)
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.api_base
-        )
+        # Shared OpenAI client (Cursor API is OpenAI-compatible)
+        self.client = _get_client(self.api_key, self.api_base)
     
     def generate_captions(
         self, 
@@ -63,47 +232,18 @@ class CaptionGenerator:
             
             logger.info("Generating captions via Cursor API...")
             
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a viral content strategist specializing in Instagram Reels. "
-                            "Your captions maximize engagement, shares, and comments. "
-                            "You understand trending formats, hooks, and hashtag strategies. "
-                            "Always return valid JSON format."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.8,
-                max_tokens=2000
-            )
+            scanner = _CaptionObjectScanner()
+            content = self._complete(prompt, max_tokens=2000, scanner=scanner, stop_after=NUM_CAPTIONS)
             
-            # Parse response
-            content = response.choices[0].message.content
+            # Enough captions arrived in the stream, no need for the full response
+            if len(scanner.captions) >= NUM_CAPTIONS:
+                formatted_captions = self._format_captions(scanner.captions)
+                logger.info(f"✓ Generated {len(formatted_captions)} captions")
+                return formatted_captions
             
             try:
                 # Try to parse as JSON
-                result = json.loads(content)
-                
-                # Handle different response formats
-                if isinstance(result, dict):
-                    if 'captions' in result:
-                        captions = result['captions']
-                    elif 'data' in result:
-                        captions = result['data']
-                    else:
-                        # Assume the dict itself contains caption data
-                        captions = [result] if 'caption' in result else []
-                elif isinstance(result, list):
-                    captions = result
-                else:
-                    captions = []
+                captions = _extract_caption_list(loads(content))
                 
                 # Validate and format captions
                 formatted_captions = self._format_captions(captions)
@@ -111,7 +251,7 @@ class CaptionGenerator:
                 logger.info(f"✓ Generated {len(formatted_captions)} captions")
                 return formatted_captions
                 
-            except json.JSONDecodeError:
+            except ValueError:
                 logger.warning("Could not parse JSON response, attempting fallback parsing")
                 return self._parse_fallback_response(content)
                 
@@ -119,6 +259,155 @@ class CaptionGenerator:
             logger.error(f"Caption generation failed: {str(e)}")
             return self._generate_fallback_captions(video_description, topic)
     
+    def generate_captions_batched(self, clip_contexts: List[Dict]) -> List[List[Dict]]:
+        """
+        Generate captions for several clips with a single API call
+        
+        Args:
+            clip_contexts: One dict per clip with 'video_description' and
+                optional 'topic' / 'context' keys (same as generate_captions)
+            
+        Returns:
+            One caption list per clip, in the same order as clip_contexts
+        """
+        if not clip_contexts:
+            return []
+        
+        try:
+            prompt = self._build_batched_prompt(clip_contexts)
+            
+            logger.info(f"Generating captions for {len(clip_contexts)} clip(s) via Cursor API...")
+            
+            # Per-clip budget of generate_captions, capped at the model's output limit
+            content = self._complete(prompt, max_tokens=min(4096, 2000 * len(clip_contexts)))
+            
+            try:
+                try:
+                    result = loads(content)
+                except ValueError:
+                    # The JSON is often just wrapped in prose or code fences
+                    match = _JSON_OBJECT_RE.search(content)
+                    if not match:
+                        raise
+                    result = loads(match.group(0))
+                clips = result.get('clips', []) if isinstance(result, dict) else result
+                
+                by_index = {}
+                for position, clip in enumerate(clips if isinstance(clips, list) else [], start=1):
+                    if isinstance(clip, dict):
+                        # Models sometimes return the index as a string ("1")
+                        try:
+                            index = int(clip.get('index'))
+                        except (TypeError, ValueError):
+                            index = position
+                        by_index[index] = clip.get('captions', [])
+                
+                batched = []
+                for index, clip_context in enumerate(clip_contexts, start=1):
+                    if index in by_index:
+                        batched.append(self._format_captions(by_index[index]))
+                    else:
+                        batched.append(self._generate_fallback_captions(
+                            clip_context.get('video_description', ''),
+                            clip_context.get('topic', 'viral content')
+                        ))
+                
+                logger.info(f"✓ Generated captions for {len(batched)} clip(s)")
+                return batched
+                
+            except ValueError:
+                logger.warning("Could not parse JSON response, attempting fallback parsing")
+                # Each clip's block starts at its "index" key
+                sections = _CLIP_INDEX_RE.split(content)[1:] or [content]
+                return [
+                    self._parse_fallback_response(sections[i]) if i < len(sections)
+                    else self._format_captions([])
+                    for i in range(len(clip_contexts))
+                ]
+                
+        except Exception as e:
+            logger.error(f"Caption generation failed: {str(e)}")
+            return [
+                self._generate_fallback_captions(
+                    clip_context.get('video_description', ''),
+                    clip_context.get('topic', 'viral content')
+                )
+                for clip_context in clip_contexts
+            ]
+    
+    def _complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        scanner: Optional[_CaptionObjectScanner] = None,
+        stop_after: int = 0
+    ) -> str:
+        """
+        Stream one chat completion and return the text received
+        
+        Args:
+            prompt: User prompt
+            max_tokens: Completion token limit
+            scanner: Fed each streamed chunk to collect finished caption objects
+            stop_after: Close the stream once the scanner has this many captions
+            
+        Returns:
+            Response text (partial if stopped early)
+        """
+        stream = self.client.chat.completions.create(
+            model=CAPTION_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.8,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                
+                parts.append(delta)
+                if scanner is not None:
+                    scanner.feed(delta)
+                    if stop_after and len(scanner.captions) >= stop_after:
+                        break
+        finally:
+            stream.response.close()
+        
+        return "".join(parts)
+    
+    def _build_batched_prompt(self, clip_contexts: List[Dict]) -> str:
+        """Build one prompt asking for captions for every clip"""
+        clip_lines = []
+        for index, clip_context in enumerate(clip_contexts, start=1):
+            context = clip_context.get('context')
+            context_text = f"\n   Additional Context: {context}" if context else ""
+            clip_lines.append(
+                f"{index}. Video Description: {clip_context.get('video_description', '')}\n"
+                f"   Topic/Category: {clip_context.get('topic', 'viral content')}{context_text}"
+            )
+        clips_text = "\n".join(clip_lines)
+        
+        return (
+            f"Generate exactly {NUM_CAPTIONS} viral, highly engaging Instagram Reel captions "
+            f"for EACH of the following {len(clip_contexts)} clips.\n\nClips:\n{clips_text}"
+            + _BATCHED_PROMPT_TAIL
+        )
+    
     def _build_prompt(
         self, 
         video_description: str, 
@@ -128,35 +417,13 @@ class CaptionGenerator:
         """Build the prompt for caption generation"""
         context_text = f"\nAdditional Context: {context}" if context else ""
         
-        return f"""Generate exactly {NUM_CAPTIONS} viral, highly engaging Instagram Reel captions.
-
-Video Description: {video_description}
-Topic/Category: {topic}{context_text}
-
-Requirements for each caption:
-1. Hook the viewer in the first 3-5 words
-2. Keep main caption under {MAX_CAPTION_LENGTH} characters (excluding hashtags)
-3. Include {HASHTAG_COUNT} relevant, trending hashtags
-4. Use 2-4 strategic emojis
-5. Include a call-to-action (question, tag someone, save/share prompt)
-6. Make it shareable and relatable
-7. Use power words: "viral", "wait for it", "obsessed", "game changer", etc.
-8. Match trending Reels algorithm preferences
-
-Return as JSON with this exact structure:
-{{
-  "captions": [
-    {{
-      "caption": "Your engaging caption text here with emojis 🎯",
-      "hashtags": ["#hashtag1", "#hashtag2", "#hashtag3", "#hashtag4", "#hashtag5"]
-    }},
-    ...
-  ]
-}}
-
-Make each caption unique and optimized for maximum engagement."""
+        return (
+            f"{_PROMPT_HEAD}\n\nVideo Description: {video_description}\n"
+            f"Topic/Category: {topic}{context_text}"
+            + _PROMPT_TAIL
+        )
     
-    def _format_captions(self, captions: List[Dict]) -> List[Dict]:
+    def _format_captions(self, captions: Iterable) -> List[Dict]:
         """
         Format and validate captions
         
@@ -168,7 +435,7 @@ Make each caption unique and optimized for maximum engagement."""
         """
         formatted = []
         
-        for i, cap in enumerate(captions[:NUM_CAPTIONS]):
+        for cap in islice(captions, NUM_CAPTIONS):
             if isinstance(cap, dict):
                 caption_text = cap.get('caption', '')
                 hashtags = cap.get('hashtags', [])
@@ -196,11 +463,11 @@ Make each caption unique and optimized for maximum engagement."""
         # Ensure we have exactly NUM_CAPTIONS
         while len(formatted) < NUM_CAPTIONS:
             formatted.append({
-                'caption': f"Check out this amazing content! 🔥",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
+                'caption': _PAD_CAPTION,
+                'hashtags': list(_DEFAULT_HASHTAGS)
             })
         
-        return formatted[:NUM_CAPTIONS]
+        return formatted
     
     def _parse_fallback_response(self, content: str) -> List[Dict]:
         """
@@ -212,35 +479,36 @@ Make each caption unique and optimized for maximum engagement."""
         Returns:
             List of caption dictionaries
         """
-        import re
+        # The JSON is often just wrapped in prose or code fences
+        match = _JSON_OBJECT_RE.search(content)
+        if match:
+            try:
+                captions = _extract_caption_list(loads(match.group(0)))
+                if captions:
+                    return self._format_captions(captions)
+            except ValueError:
+                pass
         
+        # Single pass over caption blocks, pairing each with the next hashtag block;
+        # islice stops the regex scan once NUM_CAPTIONS blocks have matched
         captions = []
-        
-        # Try to extract caption blocks
-        caption_pattern = r'"caption":\s*"([^"]+)"'
-        hashtag_pattern = r'"hashtags":\s*\[(.*?)\]'
-        
-        caption_matches = re.findall(caption_pattern, content)
-        hashtag_matches = re.findall(hashtag_pattern, content)
-        
-        for i, caption_text in enumerate(caption_matches[:NUM_CAPTIONS]):
-            hashtags = []
-            if i < len(hashtag_matches):
-                hashtag_str = hashtag_matches[i]
-                hashtags = re.findall(r'"(#\w+)"', hashtag_str)
+        hashtag_blocks = _HASH_BLOCK_RE.finditer(content)
+        for caption_match in islice(_CAP_RE.finditer(content), NUM_CAPTIONS):
+            hashtag_block = next(hashtag_blocks, None)
+            hashtags = _HASH_ITEM_RE.findall(hashtag_block.group(1)) if hashtag_block else []
             
             captions.append({
-                'caption': caption_text,
+                'caption': caption_match.group(1),
                 'hashtags': hashtags[:HASHTAG_COUNT]
             })
         
         # If no structured data found, split by lines
         if not captions:
-            lines = [l.strip() for l in content.split('\n') if l.strip()]
-            for line in lines[:NUM_CAPTIONS]:
+            lines = (l.strip() for l in content.splitlines())
+            for line in islice(filter(None, lines), NUM_CAPTIONS):
                 # Extract hashtags from line
-                hashtags = re.findall(r'#\w+', line)
-                caption = re.sub(r'#\w+', '', line).strip()
+                hashtags = _HASHTAG_WORD_RE.findall(line)
+                caption = _HASHTAG_WORD_RE.sub('', line).strip()
                 
                 captions.append({
                     'caption': caption or "Amazing content! 🔥",
@@ -266,30 +534,11 @@ Make each caption unique and optimized for maximum engagement."""
         """
         logger.warning("Using fallback captions")
         
-        base_captions = [
-            {
-                'caption': f"Wait for it... 🔥 This {topic} content is INSANE!",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
-            },
-            {
-                'caption': f"You won't believe this! 😱 {video_description[:50]}...",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
-            },
-            {
-                'caption': f"Obsessed with this! 💯 Tag someone who needs to see this 👇",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
-            },
-            {
-                'caption': f"Game changer! 🎯 Save this for later! {video_description[:40]}...",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
-            },
-            {
-                'caption': f"This is why I'm obsessed! 🔥 What do you think? Comment below! 👇",
-                'hashtags': ['#viral', '#trending', '#reels', '#fyp', '#foryou']
-            },
+        # Fresh dicts and hashtag lists, since callers append campaign tags in place
+        return [
+            {'caption': caption, 'hashtags': list(_DEFAULT_HASHTAGS)}
+            for caption in _render_fallback_captions(video_description, topic)
         ]
-        
-        return base_captions[:NUM_CAPTIONS]
     
     def format_for_instagram(self, caption_data: Dict) -> str:
         """
@@ -18,13 +18,18 @@ OUTPUT_FORMAT = "mp4"
 OUTPUT_CODEC = "libx264"
 OUTPUT_BITRATE = "5000k"
 OUTPUT_RESOLUTION = (1080, 1920)  # 9:16 vertical
+DROP_CLIP_PAGE_CACHE = False  # Linux only: flush finished clips and evict them from the page cache
 
 # Motion Detection Configuration
 MOTION_THRESHOLD = 0.15  # 0-1, higher = more sensitive
 FRAME_SAMPLE_RATE = 2  # Analyze every Nth frame for speed
+SEEK_ONLY_SAMPLING = False  # Seek to sampled frames instead of decoding every frame (pays off at high FRAME_SAMPLE_RATE, needs PyAV)
+MOTION_REFINE_TOP_K = 0  # Re-rank the best K frame-difference candidates with optical flow (0 = off)
+MOTION_ANALYSIS_WIDTH = 160  # Frames are downscaled to this width (4:3) before scoring
 OPTICAL_FLOW_PYR_SCALE = 0.5
-OPTICAL_FLOW_LEVELS = 3
-OPTICAL_FLOW_WINSIZE = 15
+OPTICAL_FLOW_LEVELS = 2  # One level fewer than at 320 px; the frame is already half size
+OPTICAL_FLOW_WINSIZE = 9  # Scaled with MOTION_ANALYSIS_WIDTH
+SPARSE_FLOW_GRID = 16  # CPU refinement tracks a GRID x GRID lattice with Lucas-Kanade (0 = dense Farneback)
 
 # Clipping API Configuration (optional - for advanced scene detection)
 CLIPPING_API_ENABLED = os.getenv("CLIPPING_API_ENABLED", "false").lower() == "true"
@@ -35,26 +40,39 @@ CLIPPING_API_URL = os.getenv("CLIPPING_API_URL", "https://api.vidyo.ai/v1/clips"
 NUM_CAPTIONS = 5
 MAX_CAPTION_LENGTH = 150  # characters excluding hashtags
 HASHTAG_COUNT = 5  # number of hashtags per caption
+CAPTION_MODEL = os.getenv("CAPTION_MODEL", "gpt-4o-mini")
 
 # Storage Configuration
 BASE_OUTPUT_DIR = Path("output")
-TODAY_OUTPUT = BASE_OUTPUT_DIR / datetime.now().strftime("%Y-%m-%d")
+
+
+def today_output() -> Path:
+    """Output folder for the current date (re-evaluated so long-running processes roll over at midnight)"""
+    return BASE_OUTPUT_DIR / datetime.now().strftime("%Y-%m-%d")
+
+
+# Snapshots taken at import time; prefer today_output(). Nothing is created on
+# import - StorageManager and VideoScraper create the folders they use.
+TODAY_OUTPUT = today_output()
 TEMP_DIR = TODAY_OUTPUT / "temp"
 CLIPS_DIR = TODAY_OUTPUT / "clips"
 CAPTIONS_DIR = TODAY_OUTPUT / "captions"
 METADATA_DIR = TODAY_OUTPUT / "metadata"
 
-# Ensure directories exist
-TODAY_OUTPUT.mkdir(parents=True, exist_ok=True)
-TEMP_DIR.mkdir(parents=True, exist_ok=True)
-CLIPS_DIR.mkdir(parents=True, exist_ok=True)
-CAPTIONS_DIR.mkdir(parents=True, exist_ok=True)
-METADATA_DIR.mkdir(parents=True, exist_ok=True)
+
+def ensure_output_dirs(base: Path = None):
+    """Create the temp/clips/captions/metadata folders under base (defaults to today's folder)"""
+    base = base or today_output()
+    for name in ("temp", "clips", "captions", "metadata"):
+        (base / name).mkdir(parents=True, exist_ok=True)
 
 # OpenClaw Gateway Configuration
 OPENCLAW_GATEWAY_URL = os.getenv("OPENCLAW_GATEWAY_URL", "http://127.0.0.1:18789/api/message")
 WHATSAPP_APPROVAL_NUMBER = os.getenv("WHATSAPP_APPROVAL_NUMBER", "+917705060708")
 APPROVAL_ENABLED = os.getenv("APPROVAL_ENABLED", "true").lower() == "true"
+# Send the local clip path in JSON (gateway shares this machine's filesystem);
+# "true" streams clips to the gateway as multipart instead
+OPENCLAW_UPLOAD_MEDIA = os.getenv("OPENCLAW_UPLOAD_MEDIA", "false").lower() == "true"
 
 # Logging Configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,71 @@
+"""
+JSON I/O helpers
+Picks the fastest available JSON library once at import (orjson > ujson > json)
+and works in UTF-8 bytes so callers can pair it with read_bytes/write_bytes
+"""
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+
+    def loads(data: bytes) -> Any:
+        """Parse JSON bytes"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 JSON bytes (compact unless indent is set)"""
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+except ImportError:
+    try:
+        import ujson
+
+        JSON_BACKEND = "ujson"
+
+        def loads(data: bytes) -> Any:
+            """Parse JSON bytes"""
+            return ujson.loads(data)
+
+        def dumps(obj: Any, indent: bool = False) -> bytes:
+            """Serialize to UTF-8 JSON bytes (compact unless indent is set)"""
+            return ujson.dumps(obj, indent=2 if indent else 0, ensure_ascii=False).encode('utf-8')
+
+    except ImportError:
+        import json
+
+        JSON_BACKEND = "json"
+
+        def loads(data: bytes) -> Any:
+            """Parse JSON bytes"""
+            return json.loads(data)
+
+        def dumps(obj: Any, indent: bool = False) -> bytes:
+            """Serialize to UTF-8 JSON bytes (compact unless indent is set)"""
+            if indent:
+                return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+            return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def read_json(path: Path) -> Any:
+    """Read and parse a JSON file"""
+    return loads(Path(path).read_bytes())
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write bytes to a temp file and rename it over path so readers never see a partial file"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: Path, obj: Any, indent: bool = False):
+    """Atomically write obj as JSON"""
+    write_atomic(path, dumps(obj, indent=indent))
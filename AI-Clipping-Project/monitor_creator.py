@@ -3,24 +3,110 @@ Creator Channel Monitor
 Monitors YouTube channels for new uploads and automatically processes them
 """
 import yt_dlp
-import json
+import httpx
+import asyncio
+import heapq
+import random
+import re
+import sqlite3
 import time
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
-import sys
-from pathlib import Path
-
-# Add AI-Clipping-Project to path for imports
-sys.path.insert(0, str(Path(__file__).parent / "AI-Clipping-Project"))
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from pipeline import ContentPipeline
-from storage import StorageManager
+from json_io import read_json, write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# Channel feeds fetched within this window are served from cache instead of YouTube
+FEED_CACHE_TTL_SECONDS = 900
+FEED_CACHE_DIR = Path(".cache") / "creator_feeds"
+
+# Channel uploads feed; supports conditional GETs, so unchanged channels cost a 304
+CHANNEL_RSS_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+RSS_TIMEOUT_SECONDS = 10
+
+# Channel IDs that can be read straight from the URL, no network needed
+_CHANNEL_ID_RE = re.compile(r'/channel/(UC[\w-]{22})')
+# Channel URL forms whose uploads live under a /videos tab
+_CHANNEL_PATH_RE = re.compile(r'/(?:channel|c|user)/')
+
+PROCESSED_DB = Path("processed_videos.db")
+# Pre-SQLite tracking file, imported once and then renamed to *.migrated
+LEGACY_PROCESSED_FILE = Path("processed_videos.json")
+
+# Most recent processed IDs kept in memory per creator, in front of the database
+RECENT_PROCESSED_IDS = 1000
+
+# Number of newest uploads inspected per channel check
+FEED_PLAYLIST_END = 5
+
+# Adaptive polling: after enough observed uploads, each creator is polled
+# ADAPTIVE_POLLS_PER_CYCLE times per expected gap between uploads, clamped to
+# [MIN_POLL_SECONDS, check interval * ADAPTIVE_MAX_FACTOR]
+ADAPTIVE_MIN_HISTORY = 5
+ADAPTIVE_POLLS_PER_CYCLE = 24
+ADAPTIVE_MAX_FACTOR = 4
+MIN_POLL_SECONDS = 300
+UPLOAD_HISTORY_SIZE = 20
+
+# Channel checks in flight at once; kept low so YouTube doesn't start rate-limiting the IP
+CREATOR_CHECK_CONCURRENCY = 2
+# Random delay before each check so requests don't go out in lockstep
+CHECK_JITTER_SECONDS = 5
+CHECK_TIMEOUT_SECONDS = 30
+
+# Retry delay after a failed poll: full jitter over an exponentially growing window,
+# so a rate-limited IP isn't hit again on a fixed beat
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+BACKOFF_MAX_FAILURES = 10
+
+
+def _feed_suffix(channel_url: str) -> str:
+    """Path to append to a channel URL to reach its uploads feed"""
+    return "/videos" if _CHANNEL_PATH_RE.search(channel_url) else ""
+
+
+def _backoff_delay(failures: int) -> float:
+    """Seconds to wait after the given number of consecutive failures"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** failures))
+
+
+class _RecentIds:
+    """Bounded set of the most recently added IDs (oldest evicted first)"""
+    
+    def __init__(self, ids: Iterable[str] = (), maxlen: int = RECENT_PROCESSED_IDS):
+        self._order = deque(maxlen=maxlen)
+        self._members = set()
+        for video_id in ids:
+            self.add(video_id)
+    
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._members
+    
+    def add(self, video_id: str):
+        if video_id in self._members:
+            return
+        if len(self._order) == self._order.maxlen:
+            self._members.discard(self._order[0])
+        self._order.append(video_id)
+        self._members.add(video_id)
+
 
 class CreatorMonitor:
     """Monitors YouTube channels and auto-processes new videos"""
@@ -34,15 +120,156 @@ class CreatorMonitor:
         """
         self.config_file = Path(config_file)
         self.config = self._load_config()
+        self._channel_ids = self.config.setdefault("url_to_channel_id", {})
+        # Seed from creators added before the URL map existed
+        for creator in self.config.get("creators", []):
+            if creator.get("channel_id"):
+                self._channel_ids.setdefault(creator["channel_url"], creator["channel_id"])
         self.pipeline = ContentPipeline()
-        self.storage = StorageManager()
-        self.processed_videos = self._load_processed_videos()
+        # Same output tree as the pipeline writes to; no second StorageManager
+        self.storage = self.pipeline.storage
+        self._db_lock = threading.Lock()
+        self._db = self._open_processed_db()
+        self._recent_processed: Dict[str, _RecentIds] = {}
+        self._local = threading.local()
+        # Persisted across restarts when diskcache is installed, in-memory otherwise
+        self._feed_cache = diskcache.Cache(str(FEED_CACHE_DIR)) if DISKCACHE_AVAILABLE else None
+        self._memory_feed_cache: Dict[str, tuple] = {}
+        self._last_top_ids: Dict[str, str] = {}
+        # channel_id -> conditional-request headers from the last RSS response,
+        # or None once a channel's feed turned out to send no validators
+        self._rss_validators: Dict[str, Optional[Dict[str, str]]] = {}
+        # Validators from a 200 not yet stored: channel_id -> validators, then
+        # (validators, video IDs still to process) once the feed has been scanned
+        self._fresh_validators: Dict[str, Optional[Dict[str, str]]] = {}
+        self._awaiting_processing: Dict[str, Tuple[Optional[Dict[str, str]], Set[str]]] = {}
+        try:
+            self._http = httpx.Client(http2=True, timeout=RSS_TIMEOUT_SECONDS)
+        except ImportError:
+            # h2 not installed
+            self._http = httpx.Client(timeout=RSS_TIMEOUT_SECONDS)
+    
+    def _get_ydl(self) -> yt_dlp.YoutubeDL:
+        """Get this thread's flat-extraction YoutubeDL, creating it on first use"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL({
+                'quiet': True,
+                'extract_flat': 'in_playlist',
+                'playlistend': FEED_PLAYLIST_END,
+                'skip_download': True
+            })
+            self._local.ydl = ydl
+        return ydl
+    
+    def _channel_rss_unchanged(self, channel_id: str) -> bool:
+        """
+        Ask the channel's RSS feed whether anything changed since the last check
+        
+        Sends If-None-Match / If-Modified-Since from the previous response; a 304
+        means no new uploads, so yt-dlp can be skipped entirely.
+        
+        Args:
+            channel_id: YouTube channel ID (UC...)
+            
+        Returns:
+            True only on a 304; False when changed, unknown or unsupported
+        """
+        headers = self._rss_validators.get(channel_id, {})
+        if headers is None:
+            return False
+        
+        try:
+            response = self._http.get(CHANNEL_RSS_URL.format(channel_id=channel_id), headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠ RSS check failed for {channel_id}: {e}")
+            return False
+        
+        if response.status_code == 304:
+            return True
+        
+        if response.status_code == 200:
+            validators = {}
+            if response.headers.get('ETag'):
+                validators['If-None-Match'] = response.headers['ETag']
+            if response.headers.get('Last-Modified'):
+                validators['If-Modified-Since'] = response.headers['Last-Modified']
+            # Without validators every probe would be a wasted full GET; stop probing.
+            # Only stored by _settle_rss_validators once the new uploads are processed,
+            # otherwise a failed video would hide behind 304s until the next upload
+            self._fresh_validators[channel_id] = validators or None
+        return False
+    
+    def _settle_rss_validators(self, channel_id: str, new_video_ids: Set[str]):
+        """Store validators from this check now, or once every new video is processed"""
+        if channel_id not in self._fresh_validators:
+            return
+        validators = self._fresh_validators.pop(channel_id)
+        if new_video_ids:
+            self._awaiting_processing[channel_id] = (validators, new_video_ids)
+        else:
+            self._rss_validators[channel_id] = validators
+    
+    def _validators_video_processed(self, channel_id: str, video_id: str):
+        """Store a channel's pending validators after its last outstanding video is processed"""
+        awaiting = self._awaiting_processing.get(channel_id)
+        if awaiting is None:
+            return
+        validators, video_ids = awaiting
+        video_ids.discard(video_id)
+        if not video_ids:
+            del self._awaiting_processing[channel_id]
+            self._rss_validators[channel_id] = validators
+    
+    def _fetch_feed_entries(self, feed_url: str, refresh: bool = False) -> List[Dict]:
+        """
+        Get the newest flat entries of a channel feed, cached for FEED_CACHE_TTL_SECONDS
+        
+        Args:
+            feed_url: Channel (videos tab) URL
+            refresh: Skip the cache (the feed is known to have changed)
+            
+        Returns:
+            List of {'id', 'title', 'upload_date'} dicts, newest first
+        """
+        key = f"feed:{feed_url}:{FEED_PLAYLIST_END}"
+        if not refresh:
+            if self._feed_cache is not None:
+                entries = self._feed_cache.get(key)
+                if entries is not None:
+                    return entries
+            else:
+                cached = self._memory_feed_cache.get(key)
+                if cached and cached[0] > time.monotonic():
+                    return cached[1]
+        
+        ydl = self._get_ydl()
+        # process=False returns the raw tab result whose entries are a lazy
+        # generator of flat {id, title, url} dicts; no per-video extraction happens
+        info = ydl.extract_info(feed_url, download=False, process=False)
+        if info.get('_type') in ('url', 'url_transparent'):
+            # Handle/short URLs redirect to the channel tab first
+            info = ydl.extract_info(info['url'], download=False, process=False)
+        entries = [
+            {
+                'id': entry.get('id'),
+                'title': entry.get('title', 'Untitled'),
+                # Usually absent from flat entries; the download fills it in later
+                'upload_date': entry.get('upload_date', '')
+            }
+            for entry in islice(info.get('entries') or [], FEED_PLAYLIST_END)
+        ]
+        
+        if self._feed_cache is not None:
+            self._feed_cache.set(key, entries, expire=FEED_CACHE_TTL_SECONDS)
+        else:
+            self._memory_feed_cache[key] = (time.monotonic() + FEED_CACHE_TTL_SECONDS, entries)
+        return entries
     
     def _load_config(self) -> Dict:
         """Load creator configuration"""
         if self.config_file.exists():
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return read_json(self.config_file)
         return {
             "creators": [],
             "check_interval_minutes": 60,
@@ -52,22 +279,102 @@ class CreatorMonitor:
     
     def _save_config(self):
         """Save configuration to file"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
-    
-    def _load_processed_videos(self) -> Dict[str, List[str]]:
-        """Load list of already processed videos per creator"""
-        processed_file = Path("processed_videos.json")
-        if processed_file.exists():
-            with open(processed_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def _save_processed_videos(self):
-        """Save processed videos list"""
-        processed_file = Path("processed_videos.json")
-        with open(processed_file, 'w', encoding='utf-8') as f:
-            json.dump(self.processed_videos, f, indent=2)
+        write_json(self.config_file, self.config, indent=True)
+    
+    def _open_processed_db(self) -> sqlite3.Connection:
+        """Open the processed-videos database, importing the legacy JSON file on first run"""
+        # Checks and processing run on executor threads; access is serialized by _db_lock
+        conn = sqlite3.connect(str(PROCESSED_DB), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "creator_id TEXT NOT NULL, video_id TEXT NOT NULL, "
+            "PRIMARY KEY (creator_id, video_id))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS failed ("
+            "creator_id TEXT NOT NULL, video_id TEXT NOT NULL, "
+            "PRIMARY KEY (creator_id, video_id))"
+        )
+        
+        if LEGACY_PROCESSED_FILE.exists():
+            legacy = read_json(LEGACY_PROCESSED_FILE)
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO processed (creator_id, video_id) VALUES (?, ?)",
+                    ((creator_id, video_id) for creator_id, video_ids in legacy.items() for video_id in video_ids)
+                )
+            LEGACY_PROCESSED_FILE.rename(LEGACY_PROCESSED_FILE.with_name(LEGACY_PROCESSED_FILE.name + ".migrated"))
+            logger.info(f"✓ Migrated {LEGACY_PROCESSED_FILE} to {PROCESSED_DB}")
+        
+        conn.commit()
+        return conn
+    
+    def _recent_ids(self, creator_id: str) -> _RecentIds:
+        """Get a creator's in-memory recent-ID set, loading it from the database once (call under _db_lock)"""
+        recent = self._recent_processed.get(creator_id)
+        if recent is None:
+            rows = self._db.execute(
+                "SELECT video_id FROM processed WHERE creator_id = ? ORDER BY rowid DESC LIMIT ?",
+                (creator_id, RECENT_PROCESSED_IDS)
+            ).fetchall()
+            # Oldest first so eviction order matches insertion order
+            recent = _RecentIds(video_id for (video_id,) in reversed(rows))
+            self._recent_processed[creator_id] = recent
+        return recent
+    
+    def _is_processed(self, creator_id: str, video_id: str) -> bool:
+        """Check whether a creator's video has already been processed"""
+        with self._db_lock:
+            recent = self._recent_ids(creator_id)
+            if video_id in recent:
+                return True
+            
+            # Older than the in-memory window: the database is authoritative
+            row = self._db.execute(
+                "SELECT 1 FROM processed WHERE creator_id = ? AND video_id = ?",
+                (creator_id, video_id)
+            ).fetchone()
+        return row is not None
+    
+    def _mark_processed(self, creator_id: str, video_id: str):
+        """Record a processed video (a single-row insert, not a file rewrite)"""
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO processed (creator_id, video_id) VALUES (?, ?)",
+                (creator_id, video_id)
+            )
+            self._db.execute(
+                "DELETE FROM failed WHERE creator_id = ? AND video_id = ?",
+                (creator_id, video_id)
+            )
+            self._recent_ids(creator_id).add(video_id)
+    
+    def _failed_ids(self, creator_id: str) -> Set[str]:
+        """Get the IDs of a creator's videos whose processing failed"""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT video_id FROM failed WHERE creator_id = ?",
+                (creator_id,)
+            ).fetchall()
+        return {video_id for (video_id,) in rows}
+    
+    def _mark_failed(self, creator_id: str, video_id: str):
+        """Record a video whose processing failed so later checks retry it"""
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO failed (creator_id, video_id) VALUES (?, ?)",
+                (creator_id, video_id)
+            )
+    
+    def _clear_failed(self, creator_id: str, video_ids: Set[str]):
+        """Stop retrying a creator's failed videos"""
+        with self._db_lock, self._db:
+            self._db.executemany(
+                "DELETE FROM failed WHERE creator_id = ? AND video_id = ?",
+                ((creator_id, video_id) for video_id in video_ids)
+            )
     
     def add_creator(
         self,
@@ -91,6 +398,7 @@ class CreatorMonitor:
             "name": creator_name,
             "channel_url": channel_url,
             "channel_id": self._extract_channel_id(channel_url),
+            "feed_suffix": _feed_suffix(channel_url),
             "instagram_account": instagram_account,
             "whop_link": whop_link,
             "num_clips_per_video": num_clips_per_video,
@@ -114,12 +422,27 @@ class CreatorMonitor:
         logger.info(f"Added creator: {creator_name}")
     
     def _extract_channel_id(self, channel_url: str) -> str:
-        """Extract channel ID from URL"""
+        """
+        Extract channel ID from URL
+        
+        /channel/UC... URLs are parsed directly; other forms (@handle, /c/, /user/)
+        are resolved once with yt-dlp and remembered in config['url_to_channel_id'].
+        """
+        match = _CHANNEL_ID_RE.search(channel_url)
+        if match:
+            return match.group(1)
+        
+        channel_id = self._channel_ids.get(channel_url)
+        if channel_id:
+            return channel_id
+        
         try:
-            ydl_opts = {'quiet': True, 'extract_flat': True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(channel_url, download=False)
-                return info.get('channel_id', '')
+            info = self._get_ydl().extract_info(channel_url, download=False)
+            channel_id = info.get('channel_id', '')
+            if channel_id:
+                # Persisted with the next config save (add_creator saves right after)
+                self._channel_ids[channel_url] = channel_id
+            return channel_id
         except Exception as e:
             logger.error(f"Failed to extract channel ID: {e}")
             return ""
@@ -133,61 +456,87 @@ class CreatorMonitor:
             
         Returns:
             List of new video dictionaries
+            
+        Raises:
+            Exception: If the feed could not be fetched (yt-dlp, network, blocked IP)
         """
         channel_url = creator["channel_url"]
         creator_id = creator["channel_id"]
+        if not creator_id:
+            # Resolution failed when the creator was added; retry (cached once it succeeds)
+            creator_id = creator["channel_id"] = self._extract_channel_id(channel_url)
         creator_name = creator["name"]
         
         try:
-            ydl_opts = {
-                'quiet': True,
-                'extract_flat': True,
-                'playlistend': 5  # Check last 5 videos
-            }
+            # Get channel videos feed (suffix classified once; older configs lack it)
+            if "feed_suffix" not in creator:
+                creator["feed_suffix"] = _feed_suffix(channel_url)
+            feed_url = channel_url + creator["feed_suffix"]
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Get channel videos feed
-                if '/channel/' in channel_url or '/c/' in channel_url or '/user/' in channel_url:
-                    feed_url = f"{channel_url}/videos"
-                else:
-                    feed_url = channel_url
-                
-                info = ydl.extract_info(feed_url, download=False)
-                entries = info.get('entries', [])
-                
-                if not entries:
+            # Cheap conditional RSS request first; yt-dlp only runs on a real change
+            refresh = False
+            if creator_id:
+                if self._channel_rss_unchanged(creator_id):
                     return []
+                # Any 200 means the feed changed; a cached copy may predate the upload
+                refresh = creator_id in self._fresh_validators
+            
+            entries = self._fetch_feed_entries(feed_url, refresh=refresh)
+            
+            if not entries:
+                self._settle_rss_validators(creator_id, set())
+                return []
+            
+            # Videos whose processing failed earlier are retried on every check
+            failed_ids = self._failed_ids(creator_id)
+            
+            # Newest upload unchanged since the last check: nothing new to scan for
+            top_id = entries[0]['id']
+            if top_id and not failed_ids and self._last_top_ids.get(creator_id) == top_id:
+                self._settle_rss_validators(creator_id, set())
+                return []
+            
+            new_videos = []
+            
+            # The feed is newest-first, so everything after the first processed
+            # video has been seen already, unless an older one failed
+            for entry in entries:
+                video_id = entry['id']
+                if not video_id:
+                    continue
                 
-                new_videos = []
-                processed = self.processed_videos.get(creator_id, [])
-                
-                for entry in entries:
-                    video_id = entry.get('id')
-                    if not video_id:
-                        continue
-                    
-                    # Check if already processed
-                    if video_id in processed:
-                        continue
-                    
-                    video_url = f"https://www.youtube.com/watch?v={video_id}"
-                    video_title = entry.get('title', 'Untitled')
-                    upload_date = entry.get('upload_date', '')
-                    
-                    new_videos.append({
-                        'video_id': video_id,
-                        'video_url': video_url,
-                        'title': video_title,
-                        'upload_date': upload_date,
-                        'creator_name': creator_name,
-                        'creator_id': creator_id
-                    })
+                if self._is_processed(creator_id, video_id):
+                    if not failed_ids:
+                        break
+                    continue
+                failed_ids.discard(video_id)
                 
-                return new_videos
+                video_url = f"https://www.youtube.com/watch?v={video_id}"
                 
-        except Exception as e:
-            logger.error(f"Error checking {creator_name}: {e}")
-            return []
+                new_videos.append({
+                    'video_id': video_id,
+                    'video_url': video_url,
+                    'title': entry['title'],
+                    'upload_date': entry['upload_date'],
+                    'creator_name': creator_name,
+                    'creator_id': creator_id
+                })
+            
+            if failed_ids:
+                # Failed videos that have dropped off the feed can no longer be retried
+                self._clear_failed(creator_id, failed_ids)
+            if not new_videos:
+                self._last_top_ids[creator_id] = top_id
+            self._settle_rss_validators(creator_id, {video['video_id'] for video in new_videos})
+            # Oldest first, so uploads are processed in the order they were published
+            new_videos.reverse()
+            return new_videos
+            
+        except Exception:
+            # Nothing was scanned, so the next poll must get a full response again.
+            # Re-raised so callers log it and the scheduler backs off this creator
+            self._fresh_validators.pop(creator_id, None)
+            raise
     
     def process_new_video(
         self,
@@ -217,29 +566,65 @@ class CreatorMonitor:
                 num_clips=num_clips,
                 video_description=f"{creator_name} - {video_info['title']}"
             )
-            
-            # Mark video as processed
-            creator_id = creator['channel_id']
-            if creator_id not in self.processed_videos:
-                self.processed_videos[creator_id] = []
-            
-            self.processed_videos[creator_id].append(video_info['video_id'])
-            self._save_processed_videos()
-            
-            # Add creator metadata to bundles
-            for bundle in bundles:
-                bundle['creator_name'] = creator_name
-                bundle['creator_whop_link'] = creator.get('whop_link')
-                bundle['source_video_url'] = video_url
-                bundle['source_video_title'] = video_info['title']
-            
-            logger.info(f"✓ Processed {len(bundles)} clips from {creator_name}")
-            return bundles
+            return self._finish_video(video_info, creator, bundles)
             
         except Exception as e:
             logger.error(f"Failed to process video: {e}")
+            self._mark_failed(creator['channel_id'], video_info['video_id'])
             return []
     
+    def process_new_videos(self, tasks: List[Tuple[Dict, Dict]]) -> List[List[Dict]]:
+        """
+        Process new videos, possibly from several creators, as one pipeline batch
+        
+        Segment detection for the batch runs in parallel worker processes.
+        
+        Args:
+            tasks: (video_info, creator) pairs
+            
+        Returns:
+            Bundle list per task, in order (empty where processing failed)
+        """
+        if not tasks:
+            return []
+        
+        for video_info, creator in tasks:
+            logger.info(f"Processing new video from {creator['name']}: {video_info['title']}")
+        
+        results = self.pipeline.process_videos(
+            [video_info['video_url'] for video_info, _ in tasks],
+            num_clips=[creator.get('num_clips_per_video', 3) for _, creator in tasks],
+            video_descriptions=[f"{creator['name']} - {video_info['title']}" for video_info, creator in tasks]
+        )
+        
+        # Failed videos are recorded so the next check retries them
+        finished = []
+        for (video_info, creator), bundles in zip(tasks, results):
+            if bundles is None:
+                self._mark_failed(creator['channel_id'], video_info['video_id'])
+                finished.append([])
+            else:
+                finished.append(self._finish_video(video_info, creator, bundles))
+        return finished
+    
+    def _finish_video(self, video_info: Dict, creator: Dict, bundles: List[Dict]) -> List[Dict]:
+        """Mark a video as processed and tag its bundles with creator metadata"""
+        creator_name = creator['name']
+        
+        # Mark video as processed
+        self._mark_processed(creator['channel_id'], video_info['video_id'])
+        self._validators_video_processed(creator['channel_id'], video_info['video_id'])
+        
+        # Add creator metadata to bundles
+        for bundle in bundles:
+            bundle['creator_name'] = creator_name
+            bundle['creator_whop_link'] = creator.get('whop_link')
+            bundle['source_video_url'] = video_info['video_url']
+            bundle['source_video_title'] = video_info['title']
+        
+        logger.info(f"✓ Processed {len(bundles)} clips from {creator_name}")
+        return bundles
+    
     def check_all_creators(self) -> Dict[str, List[Dict]]:
         """
         Check all active creators for new videos
@@ -247,71 +632,194 @@ class CreatorMonitor:
         Returns:
             Dictionary mapping creator names to lists of new videos
         """
-        results = {}
+        return asyncio.run(self.check_all_creators_async())
+    
+    async def check_all_creators_async(self) -> Dict[str, List[Dict]]:
+        """
+        Check all active creators for new videos, CREATOR_CHECK_CONCURRENCY at a time
+        
+        Returns:
+            Dictionary mapping creator names to lists of new videos
+        """
         active_creators = [c for c in self.config.get("creators", []) if c.get("active", True)]
+        semaphore = asyncio.Semaphore(CREATOR_CHECK_CONCURRENCY)
         
-        for creator in active_creators:
-            creator_name = creator["name"]
-            new_videos = self.check_creator_for_new_videos(creator)
-            
-            if new_videos:
-                results[creator_name] = new_videos
-                logger.info(f"Found {len(new_videos)} new video(s) from {creator_name}")
+        with ThreadPoolExecutor(max_workers=CREATOR_CHECK_CONCURRENCY) as executor:
+            checks = await asyncio.gather(
+                *(self._bounded_check(creator, semaphore, executor) for creator in active_creators),
+                return_exceptions=True
+            )
+        
+        results = {}
+        for creator, new_videos in zip(active_creators, checks):
+            if isinstance(new_videos, Exception):
+                logger.error(f"Error checking {creator['name']}: {new_videos!r}")
+            elif new_videos:
+                results[creator["name"]] = new_videos
+                logger.info(f"Found {len(new_videos)} new video(s) from {creator['name']}")
         
         return results
     
+    async def _bounded_check(
+        self,
+        creator: Dict,
+        semaphore: asyncio.Semaphore,
+        executor: ThreadPoolExecutor
+    ) -> List[Dict]:
+        """Run check_creator_for_new_videos off the event loop, jittered and time-limited"""
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            await asyncio.sleep(random.uniform(0, CHECK_JITTER_SECONDS))
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, self.check_creator_for_new_videos, creator),
+                timeout=CHECK_TIMEOUT_SECONDS
+            )
+    
+    def _record_upload(self, creator: Dict):
+        """Remember when new uploads were seen for a creator (persisted in the config)"""
+        history = creator.setdefault("upload_times", [])
+        history.append(int(time.time()))
+        del history[:-UPLOAD_HISTORY_SIZE]
+        self._save_config()
+    
+    def _next_poll_delay(self, creator: Dict, interval_seconds: float) -> float:
+        """
+        Seconds until a creator should be checked again
+        
+        Upload gaps are treated as memoryless (exponential), so the expected gap
+        is the mean of the observed ones and polls are spread evenly across it.
+        Creators with too little history use the configured interval.
+        
+        Args:
+            creator: Creator configuration
+            interval_seconds: Configured check interval
+            
+        Returns:
+            Delay in seconds
+        """
+        history = creator.get("upload_times", [])
+        if len(history) < ADAPTIVE_MIN_HISTORY:
+            return interval_seconds
+        
+        mean_gap = (history[-1] - history[0]) / (len(history) - 1)
+        delay = mean_gap / ADAPTIVE_POLLS_PER_CYCLE
+        return min(max(delay, MIN_POLL_SECONDS), interval_seconds * ADAPTIVE_MAX_FACTOR)
+    
+    def _process_new_videos(self, creator: Dict, new_videos: List[Dict]):
+        """Process new videos found for a creator and send notifications"""
+        creator_name = creator['name']
+        logger.info(f"Found {len(new_videos)} new video(s) from {creator_name}")
+        self._record_upload(creator)
+        
+        # One batch per poll: downloads share a warm YoutubeDL and detection runs in parallel
+        tasks = [(video_info, creator) for video_info in new_videos]
+        for video_info, bundles in zip(new_videos, self.process_new_videos(tasks)):
+            if bundles and self.config.get("notification_enabled"):
+                # Send notification (via bridge or WhatsApp)
+                self._send_notification(creator, video_info, bundles)
+    
     def run_monitoring_loop(self, check_interval_minutes: Optional[int] = None):
         """
         Run continuous monitoring loop
         
+        Each creator is rescheduled independently on a min-heap of due times,
+        so frequent uploaders are polled more often than the configured interval.
+        
         Args:
             check_interval_minutes: How often to check (defaults to config)
         """
         interval = check_interval_minutes or self.config.get("check_interval_minutes", 60)
-        interval_seconds = interval * 60
         
+        active_creators = [c for c in self.config.get("creators", []) if c.get("active", True)]
         logger.info(f"Starting monitoring loop (checking every {interval} minutes)")
-        logger.info(f"Monitoring {len(self.config.get('creators', []))} creator(s)")
+        logger.info(f"Monitoring {len(active_creators)} creator(s)")
+        if not active_creators:
+            logger.warning("⚠ No active creators to monitor")
+            return
         
-        while True:
-            try:
-                logger.info(f"Checking for new videos... ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
-                
-                new_videos_by_creator = self.check_all_creators()
-                
-                for creator_name, new_videos in new_videos_by_creator.items():
-                    # Find creator config
-                    creator = next(
-                        (c for c in self.config["creators"] if c["name"] == creator_name),
-                        None
-                    )
-                    
-                    if not creator:
-                        continue
-                    
-                    for video_info in new_videos:
-                        bundles = self.process_new_video(video_info, creator)
-                        
-                        if bundles and self.config.get("notification_enabled"):
-                            # Send notification (via bridge or WhatsApp)
-                            self._send_notification(creator, video_info, bundles)
-                
-                logger.info(f"Sleeping for {interval} minutes...")
-                time.sleep(interval_seconds)
+        try:
+            asyncio.run(self._scheduler(active_creators, interval * 60))
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped by user")
+    
+    async def _scheduler(self, creators: List[Dict], interval_seconds: float):
+        """Start each creator's poll when it falls due, never blocking the event loop"""
+        semaphore = asyncio.Semaphore(CREATOR_CHECK_CONCURRENCY)
+        # Pipeline runs (download, FFmpeg, captions) stay one video at a time
+        process_lock = asyncio.Lock()
+        executor = ThreadPoolExecutor(max_workers=CREATOR_CHECK_CONCURRENCY + 1)
+        
+        # (due time, tie-breaker, creator)
+        schedule = [(time.monotonic(), order, creator) for order, creator in enumerate(creators)]
+        heapq.heapify(schedule)
+        polls = set()
+        # Consecutive failed polls per creator, keyed by schedule order
+        failures = {}
+        
+        try:
+            while schedule or polls:
+                now = time.monotonic()
+                while schedule and schedule[0][0] <= now:
+                    _, order, creator = heapq.heappop(schedule)
+                    polls.add(asyncio.ensure_future(self._poll_creator(
+                        creator, order, schedule, failures, interval_seconds, semaphore, process_lock, executor
+                    )))
                 
-            except KeyboardInterrupt:
-                logger.info("Monitoring stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
+                # Wake for the next due creator, or earlier if a poll finishes and reschedules
+                timeout = max(schedule[0][0] - now, 0) if schedule else None
+                if polls:
+                    done, polls = await asyncio.wait(polls, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    logger.info(f"Next check: {schedule[0][2]['name']} in {timeout / 60:.1f} minutes")
+                    await asyncio.sleep(timeout)
+        finally:
+            for poll in polls:
+                poll.cancel()
+            executor.shutdown(wait=False)
+    
+    async def _poll_creator(
+        self,
+        creator: Dict,
+        order: int,
+        schedule: List,
+        failures: Dict[int, int],
+        interval_seconds: float,
+        semaphore: asyncio.Semaphore,
+        process_lock: asyncio.Lock,
+        executor: ThreadPoolExecutor
+    ):
+        """Check one creator, process anything new, then put it back on the schedule"""
+        loop = asyncio.get_running_loop()
+        delay = None
+        try:
+            logger.info(f"Checking {creator['name']} for new videos... ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+            new_videos = await self._bounded_check(creator, semaphore, executor)
+            if new_videos:
+                async with process_lock:
+                    await loop.run_in_executor(executor, self._process_new_videos, creator, new_videos)
+            failures.pop(order, None)
+        except Exception as e:
+            failures[order] = min(failures.get(order, 0) + 1, BACKOFF_MAX_FAILURES)
+            delay = _backoff_delay(failures[order])
+            logger.error(f"Error checking {creator['name']}: {e!r} (retrying in {delay:.0f}s)")
+        finally:
+            if delay is None:
+                delay = self._next_poll_delay(creator, interval_seconds)
+            heapq.heappush(schedule, (time.monotonic() + delay, order, creator))
+    
+    @cached_property
+    def _bridge(self) -> 'OpenClawBridge':
+        """Bridge for notifications, built on first use and kept for its HTTP session"""
+        # The pipeline already has one when approvals are enabled
+        if self.pipeline.bridge is not None:
+            return self.pipeline.bridge
+        from bridge import OpenClawBridge
+        return OpenClawBridge()
     
     def _send_notification(self, creator: Dict, video_info: Dict, bundles: List[Dict]):
         """Send notification about new processed clips"""
         try:
-            # Import from AI-Clipping-Project
-            from bridge import OpenClawBridge
-            bridge = OpenClawBridge()
+            bridge = self._bridge
             
             message = (
                 f"🎬 New clips ready from {creator['name']}!\n\n"
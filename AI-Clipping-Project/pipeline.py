@@ -2,26 +2,63 @@
 Content Pipeline Module
 Main orchestrator that coordinates all pipeline components
 """
+import atexit
 import logging
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from scraper import VideoScraper
-from processor import VideoProcessor
+from processor import Segment, VideoProcessor, init_detection_worker
 from caption_generator import CaptionGenerator
 from storage import StorageManager
 from bridge import OpenClawBridge
+from json_io import read_json
 from config import (
     MIN_CLIP_LENGTH,
     MAX_CLIP_LENGTH,
     TARGET_CLIP_LENGTH,
     NUM_CAPTIONS,
     APPROVAL_ENABLED,
+    ensure_output_dirs,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def start_log_listener():
+    """
+    Put the root logger's handlers behind a queue
+    
+    Worker threads (crop, captions) then only enqueue records; the actual
+    stderr/file writes happen on the listener's background thread. Called by
+    ContentPipeline rather than on import; forked detection workers restore
+    a plain handler in init_detection_worker.
+    """
+    root = logging.getLogger()
+    if any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    # Flush what's queued on interpreter exit
+    atexit.register(listener.stop)
+
+
+# Concurrent caption API requests per video
+MAX_CAPTION_WORKERS = 8
+# Downloaded videos allowed to wait for processing in process_multiple_urls
+DOWNLOAD_QUEUE_SIZE = 2
+# Concurrent clipping-API uploads when a batch uses the API for detection
+CLIPPING_API_CONCURRENCY = 4
+
+
 class ContentPipeline:
     """Main pipeline orchestrator"""
     
@@ -45,6 +82,7 @@ class ContentPipeline:
         )
         self.storage = StorageManager()
         self.bridge = OpenClawBridge() if APPROVAL_ENABLED else None
+        start_log_listener()
     
     def process_video(
         self,
@@ -66,25 +104,23 @@ class ContentPipeline:
         logger.info(f"Starting pipeline for {url}")
         
         try:
-            # Step 1: Validate and download
-            logger.info("[1/5] Validating and downloading video...")
-            if not self.scraper.validate_url(url):
-                raise ValueError(f"Unsupported URL: {url}")
-            
-            download_result = self.scraper.download_video(url)
-            if not download_result.get('success'):
-                raise Exception(f"Download failed: {download_result.get('error')}")
-            
-            video_path = download_result['video_path']
-            video_title = download_result.get('title', 'Untitled Video')
-            video_duration = download_result.get('duration', 0)
-            
-            logger.info(f"✓ Downloaded: {video_title} ({video_duration}s)")
-            
-            # Use provided description or generate from title
-            if not video_description:
-                video_description = f"{video_title} - {download_result.get('description', '')[:200]}"
-            
+            download_result = self._download(url)
+        except Exception as e:
+            logger.error(f"Pipeline failed: {str(e)}")
+            raise
+        
+        return self._process_download(url, download_result, num_clips, video_description)
+    
+    def _process_download(
+        self,
+        url: str,
+        download_result: Dict,
+        num_clips: int,
+        video_description: Optional[str]
+    ) -> List[Dict]:
+        """Run steps 2-6 on a downloaded video, deleting the download afterwards"""
+        video_path = download_result['video_path']
+        try:
             # Step 2: Detect high-action segments
             logger.info("[2/5] Detecting high-action segments...")
             segments = self.processor.detect_high_action_segments(
@@ -92,149 +128,284 @@ class ContentPipeline:
                 segment_duration=TARGET_CLIP_LENGTH
             )
             
-            if not segments:
-                logger.warning("No high-action segments found, using first portion of video")
-                # Use first portion as fallback
-                segments = [{
-                    'start': 0,
-                    'end': min(TARGET_CLIP_LENGTH, video_duration),
-                    'duration': min(TARGET_CLIP_LENGTH, video_duration),
-                    'score': 0.5,
-                    'confidence': 0.5
-                }]
+            return self._build_clips(url, download_result, segments, num_clips, video_description)
             
-            logger.info(f"✓ Detected {len(segments)} segments")
+        except Exception as e:
+            logger.error(f"Pipeline failed: {str(e)}")
+            raise
+        finally:
+            # Cleanup downloaded video
+            try:
+                self.scraper.cleanup(video_path)
+            except Exception as e:
+                logger.warning(f"Cleanup warning: {str(e)}")
+    
+    def process_videos(
+        self,
+        urls: List[str],
+        num_clips: Union[int, List[int]] = 3,
+        video_descriptions: Optional[List[Optional[str]]] = None
+    ) -> List[Optional[List[Dict]]]:
+        """
+        Pipeline for a batch of videos: download all, detect segments in parallel, then clip each
+        
+        Downloads share the scraper's long-lived YoutubeDL, and motion detection
+        (CPU-bound) runs in one worker process per video.
+        
+        Args:
+            urls: YouTube/TikTok URLs to process
+            num_clips: Number of clips to extract per video (or one count per URL)
+            video_descriptions: Optional description per URL for caption generation
             
-            # Step 3: Process and save clips
-            logger.info(f"[3/5] Processing {min(num_clips, len(segments))} clips...")
-            bundles = []
+        Returns:
+            Bundle list per URL, in order (None where that video failed)
+        """
+        clip_counts = num_clips if isinstance(num_clips, list) else [num_clips] * len(urls)
+        video_descriptions = video_descriptions or [None] * len(urls)
+        results: List[Optional[List[Dict]]] = [None] * len(urls)
+        
+        downloads = {}
+        for index, url in enumerate(urls):
+            try:
+                downloads[index] = self._download(url)
+            except Exception as e:
+                logger.error(f"Pipeline failed for {url}: {str(e)}")
+        
+        try:
+            logger.info(f"[2/5] Detecting high-action segments in {len(downloads)} video(s)...")
+            segments_by_index = {}
+            if len(downloads) > 1:
+                if self.processor.uses_clipping_api:
+                    # Uploads are network-bound: threads, capped to stay within the API's rate limits
+                    pool = ThreadPoolExecutor(max_workers=min(len(downloads), CLIPPING_API_CONCURRENCY))
+                else:
+                    workers = min(len(downloads), os.cpu_count() or 1)
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_detection_worker)
+                with pool:
+                    futures = {
+                        index: pool.submit(
+                            self.processor.detect_high_action_segments,
+                            download_result['video_path'],
+                            TARGET_CLIP_LENGTH
+                        )
+                        for index, download_result in downloads.items()
+                    }
+                    for index, future in futures.items():
+                        try:
+                            segments_by_index[index] = future.result()
+                        except Exception as e:
+                            logger.error(f"Segment detection failed for {urls[index]}: {str(e)}")
+            else:
+                for index, download_result in downloads.items():
+                    try:
+                        segments_by_index[index] = self.processor.detect_high_action_segments(
+                            download_result['video_path'],
+                            segment_duration=TARGET_CLIP_LENGTH
+                        )
+                    except Exception as e:
+                        logger.error(f"Segment detection failed for {urls[index]}: {str(e)}")
             
-            for i, segment in enumerate(segments[:num_clips]):
-                logger.info(f"  Processing clip {i+1}/{min(num_clips, len(segments))}...")
-                
-                # Ensure segment duration is within limits
-                start = segment['start']
-                end = segment['end']
-                duration = end - start
-                
-                if duration < MIN_CLIP_LENGTH:
-                    # Extend segment
-                    extension = (MIN_CLIP_LENGTH - duration) / 2
-                    start = max(0, start - extension)
-                    end = min(video_duration, end + extension)
-                elif duration > MAX_CLIP_LENGTH:
-                    # Trim segment
-                    end = start + MAX_CLIP_LENGTH
-                
-                # Generate clip name
-                clip_name = f"clip_{i+1:02d}_{segment.get('score', 0.5):.2f}.mp4"
-                clip_output_path = self.storage.clips_dir / clip_name
-                
-                # Crop to vertical
-                self.processor.crop_to_vertical(
-                    video_path,
-                    str(clip_output_path),
-                    start,
-                    end
-                )
-                
-                logger.info(f"  ✓ Processed clip {i+1}: {start:.2f}s - {end:.2f}s")
-                
-                # Step 4: Generate captions
-                logger.info(f"  [4/5] Generating captions for clip {i+1}...")
-                context = (
-                    f"High-action segment (motion score: {segment.get('score', 0.5):.2f}, "
-                    f"duration: {duration:.1f}s)"
-                )
-                
-                captions = self.caption_gen.generate_captions(
+            for index, segments in segments_by_index.items():
+                try:
+                    results[index] = self._build_clips(
+                        urls[index], downloads[index], segments, clip_counts[index], video_descriptions[index]
+                    )
+                except Exception as e:
+                    logger.error(f"Pipeline failed for {urls[index]}: {str(e)}")
+        finally:
+            for download_result in downloads.values():
+                try:
+                    self.scraper.cleanup(download_result['video_path'])
+                except Exception as e:
+                    logger.warning(f"Cleanup warning: {str(e)}")
+        
+        return results
+    
+    def _download(self, url: str) -> Dict:
+        """Validate and download a video (step 1), raising on failure"""
+        logger.info("[1/5] Validating and downloading video...")
+        if not self.scraper.validate_url(url):
+            raise ValueError(f"Unsupported URL: {url}")
+        
+        download_result = self.scraper.download_video(url)
+        if not download_result.get('success'):
+            raise Exception(f"Download failed: {download_result.get('error')}")
+        
+        logger.info(f"✓ Downloaded: {download_result.get('title', 'Untitled Video')} ({download_result.get('duration', 0)}s)")
+        return download_result
+    
+    def _download_all(self, urls: List[str], downloads: queue.Queue, stop: threading.Event):
+        """Producer for process_multiple_urls: queue (url, download result or exception) per URL, then None"""
+        for url in urls:
+            if stop.is_set():
+                break
+            try:
+                downloads.put((url, self._download(url)))
+            except Exception as e:
+                downloads.put((url, e))
+        downloads.put(None)
+    
+    def _build_clips(
+        self,
+        url: str,
+        download_result: Dict,
+        segments: List[Dict],
+        num_clips: int,
+        video_description: Optional[str]
+    ) -> List[Dict]:
+        """Crop, caption and store clips for detected segments (steps 3-6)"""
+        video_path = download_result['video_path']
+        video_title = download_result.get('title', 'Untitled Video')
+        video_duration = download_result.get('duration', 0)
+        
+        # Use provided description or generate from title
+        if not video_description:
+            video_description = f"{video_title} - {download_result.get('description', '')[:200]}"
+        
+        if not segments:
+            logger.warning("No high-action segments found, using first portion of video")
+            # Use first portion as fallback
+            segments = [{
+                'start': 0,
+                'end': min(TARGET_CLIP_LENGTH, video_duration),
+                'duration': min(TARGET_CLIP_LENGTH, video_duration),
+                'score': 0.5,
+                'confidence': 0.5
+            }]
+        
+        logger.info(f"✓ Detected {len(segments)} segments")
+        
+        selected = [Segment.from_dict(segment) for segment in segments[:num_clips]]
+        
+        # Step 3: Process and save clips
+        logger.info(f"[3/5] Processing {len(selected)} clips...")
+        
+        clip_plans = []
+        for i, segment in enumerate(selected):
+            # Ensure segment duration is within limits
+            start = segment.start
+            end = segment.end
+            duration = end - start
+            
+            if duration < MIN_CLIP_LENGTH:
+                # Extend segment
+                extension = (MIN_CLIP_LENGTH - duration) / 2
+                start = max(0, start - extension)
+                end = min(video_duration, end + extension)
+            elif duration > MAX_CLIP_LENGTH:
+                # Trim segment
+                end = start + MAX_CLIP_LENGTH
+            
+            # Generate clip name
+            clip_name = f"clip_{i+1:02d}_{segment.score:.2f}.mp4"
+            clip_plans.append((segment, clip_name, self.storage.clips_dir / clip_name, start, end, duration))
+        
+        # Crop every clip in one FFmpeg pass on a background thread while the
+        # (network-bound) caption requests for all clips run concurrently
+        caption_workers = min(len(clip_plans), MAX_CAPTION_WORKERS)
+        with ThreadPoolExecutor(max_workers=1 + caption_workers) as pool:
+            crop_future = pool.submit(
+                self.processor.crop_to_vertical_batch,
+                video_path,
+                [(str(clip_output_path), start, end) for _, _, clip_output_path, start, end, _ in clip_plans]
+            )
+            
+            # Step 4: Generate captions
+            logger.info("  [4/5] Generating captions for %d clip(s)...", len(clip_plans))
+            caption_futures = [
+                pool.submit(
+                    self.caption_gen.generate_captions,
                     video_description,
                     topic="viral content",
-                    context=context
+                    context=(
+                        f"High-action segment (motion score: {segment.score:.2f}, "
+                        f"duration: {duration:.1f}s)"
+                    )
                 )
+                for segment, _, _, _, _, duration in clip_plans
+            ]
+            
+            clip_captions = []
+            for (_, clip_name, _, _, _, _), caption_future in zip(clip_plans, caption_futures):
+                captions = caption_future.result()
                 
                 # Save captions
                 self.storage.save_captions(captions, clip_name)
-                logger.info(f"  ✓ Generated {len(captions)} captions")
-                
-                # Step 5: Send approval request via WhatsApp (if enabled)
-                approval_response = None
-                if self.bridge and APPROVAL_ENABLED:
-                    logger.info(f"  [5/6] Sending approval request for clip {i+1}...")
-                    
-                    # Format caption for approval (use first caption)
-                    caption_data = captions[0] if captions else {}
-                    caption_text = self.caption_gen.format_for_instagram(caption_data)
-                    
-                    # Send approval request
-                    approval_response = self.bridge.send_approval_request(
-                        video_path=str(clip_output_path),
-                        caption=caption_text,
-                        metadata={
-                            'source_url': url,
-                            'source_title': video_title,
-                            'clip_index': i + 1,
-                            'clip_name': clip_name,
-                            'start_time': start,
-                            'end_time': end,
-                            'duration': end - start,
-                            'motion_score': segment.get('score', 0.5),
-                            'confidence': segment.get('confidence', 0.5),
-                        }
-                    )
-                    
-                    if approval_response.get('status') == 'success':
-                        logger.info(f"  ✓ Approval request sent successfully")
-                    else:
-                        logger.warning(f"  ⚠ Approval request failed: {approval_response.get('error', 'Unknown error')}")
+                logger.debug("  ✓ Generated %d captions for %s", len(captions), clip_name)
+                clip_captions.append(captions)
+            
+            crop_future.result()
+        
+        bundles = []
+        for i, ((segment, clip_name, clip_output_path, start, end, _), captions) in enumerate(zip(clip_plans, clip_captions)):
+            logger.info("  ✓ Processed clip %d: %.2fs - %.2fs", i + 1, start, end)
+            
+            # Step 5: Send approval request via WhatsApp (if enabled)
+            approval_response = None
+            if self.bridge and APPROVAL_ENABLED:
+                logger.debug("  [5/6] Sending approval request for clip %d...", i + 1)
                 
-                # Step 6: Create metadata
-                metadata = {
-                    'source_url': url,
-                    'source_title': video_title,
-                    'clip_index': i + 1,
-                    'start_time': start,
-                    'end_time': end,
-                    'duration': end - start,
-                    'motion_score': segment.get('score', 0.5),
-                    'confidence': segment.get('confidence', 0.5),
-                    'captions_count': len(captions),
-                    'format': 'instagram_reels',
-                    'aspect_ratio': '9:16',
-                    'resolution': '1080x1920',
-                    'approval_status': 'pending' if approval_response else 'not_required',
-                    'approval_response': approval_response if approval_response else None
-                }
+                # Format caption for approval (use first caption)
+                caption_data = captions[0] if captions else {}
+                caption_text = self.caption_gen.format_for_instagram(caption_data)
                 
-                self.storage.save_metadata(metadata, clip_name)
+                # Send approval request
+                approval_response = self.bridge.send_approval_request(
+                    video_path=str(clip_output_path),
+                    caption=caption_text,
+                    metadata={
+                        'source_url': url,
+                        'source_title': video_title,
+                        'clip_index': i + 1,
+                        'clip_name': clip_name,
+                        'start_time': start,
+                        'end_time': end,
+                        'duration': end - start,
+                        'motion_score': segment.score,
+                        'confidence': segment.confidence,
+                    }
+                )
                 
-                # Create post-ready bundle
-                bundle = self.storage.get_post_ready_bundle(clip_name)
-                bundle['approval_status'] = metadata['approval_status']
-                bundle['approval_response'] = metadata['approval_response']
-                bundles.append(bundle)
-                logger.info(f"  ✓ Bundle ready: {clip_name}")
-            
-            # Step 7: Create manifest
-            logger.info("[6/6] Creating posting manifest...")
-            manifest_path = self.storage.create_posting_manifest()
+                if approval_response.get('status') == 'success':
+                    logger.debug("  ✓ Approval request sent successfully")
+                else:
+                    logger.warning("  ⚠ Approval request failed: %s", approval_response.get('error', 'Unknown error'))
             
-            logger.info(f"✓ Pipeline complete! {len(bundles)} clips ready for posting")
-            logger.info(f"  Manifest: {manifest_path}")
-            logger.info(f"  Output directory: {self.storage.base_path}")
+            # Step 6: Create metadata
+            metadata = {
+                'source_url': url,
+                'source_title': video_title,
+                'clip_index': i + 1,
+                'start_time': start,
+                'end_time': end,
+                'duration': end - start,
+                'motion_score': segment.score,
+                'confidence': segment.confidence,
+                'captions_count': len(captions),
+                'format': 'instagram_reels',
+                'aspect_ratio': '9:16',
+                'resolution': '1080x1920',
+                'approval_status': 'pending' if approval_response else 'not_required',
+                'approval_response': approval_response if approval_response else None
+            }
             
-            return bundles
+            self.storage.save_metadata(metadata, clip_name)
             
-        except Exception as e:
-            logger.error(f"Pipeline failed: {str(e)}")
-            raise
-        finally:
-            # Cleanup downloaded video
-            try:
-                if 'video_path' in locals():
-                    self.scraper.cleanup(video_path)
-            except Exception as e:
-                logger.warning(f"Cleanup warning: {str(e)}")
+            # Create post-ready bundle from what was just saved, without reading it back;
+            # a clip created just now cannot be in posted.log, so skip reading it
+            bundle = self.storage.get_post_ready_bundle(clip_name, posted={}, metadata=metadata, captions=captions)
+            bundle['approval_status'] = metadata['approval_status']
+            bundle['approval_response'] = metadata['approval_response']
+            bundles.append(bundle)
+            # Step 7: Record in the manifest (manifest.json is rebuilt on demand by get_manifest)
+            self.storage.append_to_manifest(bundle)
+            logger.debug("  ✓ Bundle ready: %s", clip_name)
+        
+        logger.info(f"✓ Pipeline complete! {len(bundles)} clips ready for posting")
+        logger.info(f"  Manifest: {self.storage.manifest_ndjson_path}")
+        logger.info(f"  Output directory: {self.storage.base_path}")
+        
+        return bundles
     
     def process_multiple_urls(
         self,
@@ -253,17 +424,39 @@ class ContentPipeline:
         """
         all_bundles = []
         
-        for i, url in enumerate(urls, 1):
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Processing video {i}/{len(urls)}: {url}")
-            logger.info(f"{'='*60}\n")
-            
-            try:
-                bundles = self.process_video(url, num_clips_per_video)
-                all_bundles.extend(bundles)
-            except Exception as e:
-                logger.error(f"Failed to process {url}: {str(e)}")
-                continue
+        # Next videos download on a background thread while this one is processed;
+        # the bounded queue caps how many finished downloads wait on disk
+        downloads = queue.Queue(maxsize=DOWNLOAD_QUEUE_SIZE)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._download_all, args=(urls, downloads, stop), daemon=True)
+        producer.start()
+        
+        finished = False
+        try:
+            for i, item in enumerate(iter(downloads.get, None), 1):
+                url, download_result = item
+                logger.info(f"\n{'='*60}")
+                logger.info(f"Processing video {i}/{len(urls)}: {url}")
+                logger.info(f"{'='*60}\n")
+                
+                if isinstance(download_result, Exception):
+                    logger.error(f"Failed to process {url}: {str(download_result)}")
+                    continue
+                
+                try:
+                    bundles = self._process_download(url, download_result, num_clips_per_video, None)
+                    all_bundles.extend(bundles)
+                except Exception as e:
+                    logger.error(f"Failed to process {url}: {str(e)}")
+                    continue
+            finished = True
+        finally:
+            if not finished:
+                # Interrupted: stop downloading and delete whatever was left queued
+                stop.set()
+                for item in iter(downloads.get, None):
+                    if not isinstance(item[1], Exception):
+                        self.scraper.cleanup(item[1]['video_path'])
         
         logger.info(f"\n✓ Total: {len(all_bundles)} clips ready from {len(urls)} videos")
         return all_bundles
@@ -276,14 +469,15 @@ class ContentPipeline:
             Manifest dictionary
         """
         manifest_path = self.storage.base_path / 'manifest.json'
+        ndjson_path = self.storage.manifest_ndjson_path
         
-        if not manifest_path.exists():
-            # Create manifest if it doesn't exist
+        if not manifest_path.exists() or (
+            ndjson_path.exists() and ndjson_path.stat().st_mtime_ns > manifest_path.stat().st_mtime_ns
+        ):
+            # Create manifest if it doesn't exist or clips were added since it was built
             self.storage.create_posting_manifest()
         
-        import json
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json(manifest_path)
 
 
 # Main entry point
@@ -312,9 +506,10 @@ if __name__ == "__main__":
             sys.exit(1)
     
     # Run pipeline
+    ensure_output_dirs()
     pipeline = ContentPipeline()
     bundles = pipeline.process_video(url, num_clips)
     
     print(f"\n✓ Successfully processed {len(bundles)} clips!")
     print(f"  Output directory: {pipeline.storage.base_path}")
-    print(f"  Manifest: {pipeline.storage.base_path / 'manifest.json'}")
+    print(f"  Manifest: {pipeline.storage.manifest_ndjson_path}")
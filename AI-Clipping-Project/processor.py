@@ -5,14 +5,23 @@ Supports both motion detection and clipping API integration
 """
 import cv2
 import numpy as np
-from moviepy.editor import VideoFileClip
 import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
 import requests
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from typing import Iterator, List, NamedTuple, Tuple, Dict, Optional
 from config import (
     MOTION_THRESHOLD,
     FRAME_SAMPLE_RATE,
+    SEEK_ONLY_SAMPLING,
+    MOTION_REFINE_TOP_K,
+    MOTION_ANALYSIS_WIDTH,
     TARGET_ASPECT_RATIO,
     OUTPUT_RESOLUTION,
     MIN_CLIP_LENGTH,
@@ -20,17 +29,186 @@ from config import (
     TARGET_CLIP_LENGTH,
     OUTPUT_CODEC,
     OUTPUT_BITRATE,
+    DROP_CLIP_PAGE_CACHE,
     CLIPPING_API_ENABLED,
     CLIPPING_API_KEY,
     CLIPPING_API_URL,
     OPTICAL_FLOW_PYR_SCALE,
     OPTICAL_FLOW_LEVELS,
     OPTICAL_FLOW_WINSIZE,
+    SPARSE_FLOW_GRID,
 )
 
+# Optional: PyAV decodes with libav's own threads and scales to gray without OpenCV
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+# Optional: streaming multipart uploads to the clipping API
+try:
+    from requests_toolbelt import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Frame size used for motion scoring
+ANALYSIS_SIZE = (MOTION_ANALYSIS_WIDTH, MOTION_ANALYSIS_WIDTH * 3 // 4)
+# With seek-only sampling, targets closer than this to the last decoded frame
+# are reached by decoding forward; a seek restarts from the previous keyframe
+SEEK_MIN_GAP_SECONDS = 2.0
+# Decoded frames the reader thread may get ahead of optical flow
+FRAME_PREFETCH = 8
+# Farneback iterations, polynomial neighbourhood, polynomial sigma and flags
+# (identical for the CPU and CUDA implementations)
+FARNEBACK_FIXED_PARAMS = (3, 5, 1.2, 0)
+
+
+class Segment(NamedTuple):
+    """A detected high-action segment (attribute access, no per-instance dict)"""
+    start: float
+    end: float
+    score: float = 0.5
+    confidence: float = 0.5
+    
+    @classmethod
+    def from_dict(cls, segment: Dict) -> 'Segment':
+        """Build from a segment dict as returned by detect_high_action_segments"""
+        return cls(
+            segment['start'],
+            segment['end'],
+            segment.get('score', 0.5),
+            segment.get('confidence', 0.5)
+        )
+
+
+@lru_cache(maxsize=1)
+def _ffmpeg_binary() -> Optional[str]:
+    """Locate ffmpeg: system install first, then the binary shipped with imageio-ffmpeg"""
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _drop_page_cache(path: str):
+    """
+    Flush a finished file and evict it from the page cache (Linux)
+    
+    Encoded clips aren't read again by the pipeline; evicting them keeps the
+    source video and the next clip's data cached instead.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _prefetch(items: Iterator, depth: int) -> Iterator:
+    """
+    Iterate items on a background thread, up to depth ahead of the consumer
+    
+    Decoding (OpenCV/PyAV) and optical flow both release the GIL, so the
+    reader and the caller really do run in parallel.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+    
+    def reader():
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                buffer.put(item)
+        except Exception as e:
+            buffer.put(e)
+        buffer.put(done)
+    
+    threading.Thread(target=reader, daemon=True).start()
+    item = None
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if item is not done and not isinstance(item, Exception):
+            # Consumer stopped early: unblock the reader so it can exit and release the video
+            stop.set()
+            while buffer.get() is not done:
+                pass
+
+
+def _luma(frame: np.ndarray, height: int) -> Optional[np.ndarray]:
+    """
+    Gray image from a VideoCapture frame, which may be BGR or raw decoder output
+    
+    Args:
+        frame: Frame as returned by VideoCapture.read
+        height: Video height in pixels
+        
+    Returns:
+        Gray frame, or None for a raw layout that can't be interpreted
+    """
+    if frame.ndim == 3:
+        if frame.shape[2] == 2:
+            # Packed 4:2:2 (YUYV)
+            return cv2.cvtColor(frame, cv2.COLOR_YUV2GRAY_YUY2)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if frame.shape[0] == height:
+        return frame
+    if frame.shape[0] > height:
+        # Planar 4:2:0 (I420/NV12): the Y plane is the first `height` rows
+        return frame[:height]
+    return None
+
+
+def init_detection_worker():
+    """
+    ProcessPoolExecutor initializer for parallel segment detection
+    
+    Each worker process already takes a core, so OpenCV's own thread pool
+    would only oversubscribe the CPU. A forked worker also inherits the
+    parent's QueueHandler without the listener thread that drains it, so
+    logging goes straight to stderr instead.
+    """
+    cv2.setNumThreads(1)
+    
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    logging.getLogger().handlers = [handler]
+
+
+@lru_cache(maxsize=1)
+def _cuda_farneback():
+    """GPU Farneback matching the CPU parameters, or None without a CUDA-enabled OpenCV (created once per process)"""
+    try:
+        if cv2.cuda.getCudaEnabledDeviceCount() == 0:
+            return None
+        return cv2.cuda_FarnebackOpticalFlow.create(
+            OPTICAL_FLOW_LEVELS,
+            OPTICAL_FLOW_PYR_SCALE,
+            False,
+            OPTICAL_FLOW_WINSIZE,
+            *FARNEBACK_FIXED_PARAMS
+        )
+    except (AttributeError, cv2.error):
+        return None
+
 
 class VideoProcessor:
     """Handles video processing: motion detection, cropping, and clipping"""
@@ -39,10 +217,17 @@ class VideoProcessor:
         """Initialize the video processor"""
         self.motion_threshold = MOTION_THRESHOLD
         self.frame_sample_rate = FRAME_SAMPLE_RATE
+        self.seek_only = SEEK_ONLY_SAMPLING
+        self.refine_top_k = MOTION_REFINE_TOP_K
         self.use_clipping_api = CLIPPING_API_ENABLED
         self.clipping_api_key = CLIPPING_API_KEY
         self.clipping_api_url = CLIPPING_API_URL
     
+    @property
+    def uses_clipping_api(self) -> bool:
+        """Whether segment detection goes to the clipping API rather than local motion detection"""
+        return bool(self.use_clipping_api and self.clipping_api_key)
+    
     def detect_high_action_segments(
         self, 
         video_path: str, 
@@ -61,7 +246,7 @@ class VideoProcessor:
         if segment_duration is None:
             segment_duration = TARGET_CLIP_LENGTH
         
-        if self.use_clipping_api and self.clipping_api_key:
+        if self.uses_clipping_api:
             logger.info("Using clipping API for segment detection")
             return self._detect_segments_with_api(video_path, segment_duration)
         else:
@@ -82,7 +267,6 @@ class VideoProcessor:
         try:
             # Upload video to clipping API
             with open(video_path, 'rb') as video_file:
-                files = {'video': video_file}
                 headers = {'Authorization': f'Bearer {self.clipping_api_key}'}
                 data = {
                     'target_duration': segment_duration,
@@ -90,13 +274,26 @@ class VideoProcessor:
                     'max_duration': MAX_CLIP_LENGTH,
                 }
                 
-                response = requests.post(
-                    f"{self.clipping_api_url}/analyze",
-                    files=files,
-                    headers=headers,
-                    data=data,
-                    timeout=300
-                )
+                if TOOLBELT_AVAILABLE:
+                    # Streams the file in chunks; files= builds the whole multipart body in memory
+                    body = MultipartEncoder(fields={
+                        **{key: str(value) for key, value in data.items()},
+                        'video': (Path(video_path).name, video_file, 'video/mp4'),
+                    })
+                    response = requests.post(
+                        f"{self.clipping_api_url}/analyze",
+                        data=body,
+                        headers={**headers, 'Content-Type': body.content_type},
+                        timeout=300
+                    )
+                else:
+                    response = requests.post(
+                        f"{self.clipping_api_url}/analyze",
+                        files={'video': video_file},
+                        headers=headers,
+                        data=data,
+                        timeout=300
+                    )
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -121,7 +318,11 @@ class VideoProcessor:
     
     def _detect_segments_with_motion(self, video_path: str, segment_duration: int) -> List[Dict]:
         """
-        Detect high-action segments using optical flow motion detection
+        Detect high-action segments by frame differencing
+        
+        Candidates come from the mean absolute difference between sampled
+        frames; with refine_top_k set, the best ones are re-ranked by
+        Farneback optical flow.
         
         Args:
             video_path: Path to video file
@@ -131,76 +332,34 @@ class VideoProcessor:
             List of segment dictionaries
         """
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise ValueError(f"Could not open video: {video_path}")
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps, total_frames, frames = self._gray_frames(video_path)
             total_duration = total_frames / fps if fps > 0 else 0
             
             logger.info(f"Analyzing video: {fps:.2f} FPS, {total_frames} frames, {total_duration:.2f}s")
             
-            motion_scores = []
-            prev_frame = None
-            frame_idx = 0
-            
-            # Process frames
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Sample frames for speed
-                if frame_idx % self.frame_sample_rate != 0:
-                    frame_idx += 1
-                    continue
-                
-                # Resize for faster processing
-                frame_resized = cv2.resize(frame, (320, 240))
-                gray = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2GRAY)
-                
-                if prev_frame is not None:
-                    # Calculate optical flow for motion detection
-                    flow = cv2.calcOpticalFlowFarneback(
-                        prev_frame, gray, None,
-                        OPTICAL_FLOW_PYR_SCALE,
-                        OPTICAL_FLOW_LEVELS,
-                        OPTICAL_FLOW_WINSIZE,
-                        3, 5, 1.2, 0
-                    )
-                    
-                    # Calculate motion magnitude
-                    magnitude, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-                    motion_score = np.mean(magnitude)
-                    motion_scores.append({
-                        'frame': frame_idx,
-                        'time': frame_idx / fps,
-                        'score': motion_score
-                    })
-                
-                prev_frame = gray
-                frame_idx += 1
-            
-            cap.release()
+            # (frame index, score) rows straight into an array; no dict per sample
+            samples = np.array(
+                list(self._motion_scores(_prefetch(frames, FRAME_PREFETCH))),
+                dtype=np.float64
+            ).reshape(-1, 2)
             
-            if not motion_scores:
+            if not len(samples):
                 logger.warning("No motion data collected")
                 return []
             
-            # Normalize motion scores
-            scores = [m['score'] for m in motion_scores]
-            max_score = max(scores)
-            min_score = min(scores)
-            score_range = max_score - min_score if max_score > min_score else 1
+            times = samples[:, 0] / fps
+            scores = samples[:, 1]
             
-            for m in motion_scores:
-                m['normalized_score'] = (m['score'] - min_score) / score_range
+            # Normalize motion scores
+            score_range = np.ptp(scores) or 1
+            normalized_scores = (scores - scores.min()) / score_range
             
             # Extract segments with high motion
             segments = self._extract_segments_from_scores(
-                motion_scores, fps, segment_duration
+                times, normalized_scores, fps, segment_duration
             )
+            if self.refine_top_k and segments:
+                segments = self._refine_segments(video_path, segments, fps)
             
             logger.info(f"Detected {len(segments)} high-action segments")
             return segments
@@ -209,9 +368,298 @@ class VideoProcessor:
             logger.error(f"Motion detection failed: {str(e)}")
             return []
     
+    def _motion_scores(self, frames: Iterator[Tuple[int, np.ndarray]]) -> Iterator[Tuple[int, float]]:
+        """
+        Mean absolute difference between each sampled frame and the previous one
+        
+        One vectorized pass per frame pair; plenty to tell busy footage from still.
+        
+        Args:
+            frames: (frame index, gray frame) pairs
+            
+        Returns:
+            Iterator of (frame index, motion score), starting at the second frame
+        """
+        prev_frame = None
+        for frame_idx, gray in frames:
+            if prev_frame is not None:
+                yield frame_idx, cv2.mean(cv2.absdiff(prev_frame, gray))[0]
+            prev_frame = gray
+    
+    def _refine_segments(self, video_path: str, segments: List[Dict], fps: float) -> List[Dict]:
+        """
+        Re-rank the top refine_top_k segments by mean optical-flow magnitude
+        
+        Only the candidate ranges are decoded again. Refined scores are scaled
+        so the best candidate scores 1.0; the remaining segments keep their
+        order after the refined ones.
+        
+        Args:
+            video_path: Path to video file
+            segments: Segments sorted best first
+            fps: Video frame rate
+            
+        Returns:
+            Re-ranked segment list
+        """
+        candidates = segments[:self.refine_top_k]
+        flow_means = []
+        for segment in candidates:
+            _, _, frames = self._gray_frames(
+                video_path,
+                start_frame=int(segment['start'] * fps),
+                end_frame=int(segment['end'] * fps)
+            )
+            scores = [score for _, score in self._flow_scores(frames)]
+            flow_means.append(float(np.mean(scores)) if scores else 0.0)
+        
+        best = max(flow_means) or 1.0
+        refined = [
+            dict(segment, score=flow_mean / best, confidence=min(1.0, flow_mean / best * 1.5))
+            for segment, flow_mean in zip(candidates, flow_means)
+        ]
+        refined.sort(key=lambda x: x['score'], reverse=True)
+        return refined + segments[self.refine_top_k:]
+    
+    def _flow_scores(self, frames: Iterator[Tuple[int, np.ndarray]]) -> Iterator[Tuple[int, float]]:
+        """
+        Mean optical-flow magnitude between each sampled frame and the previous one
+        
+        Runs dense Farneback on the GPU when OpenCV has a CUDA device. On the CPU,
+        pyramidal Lucas-Kanade tracks a sparse grid of points instead (dense
+        Farneback when SPARSE_FLOW_GRID is 0); the mean speed of the grid is an
+        adequate motion proxy at a fraction of the cost.
+        
+        Args:
+            frames: (frame index, gray frame) pairs
+            
+        Returns:
+            Iterator of (frame index, motion score), starting at the second frame
+        """
+        farneback = _cuda_farneback()
+        if farneback is not None:
+            prev_gpu = None
+            for frame_idx, gray in frames:
+                cur_gpu = cv2.cuda_GpuMat()
+                cur_gpu.upload(gray)
+                if prev_gpu is not None:
+                    # Flow, magnitude and the reduction all stay on the device
+                    flow_x, flow_y = cv2.cuda.split(farneback.calc(prev_gpu, cur_gpu, None))
+                    magnitude = cv2.cuda.magnitude(flow_x, flow_y)
+                    yield frame_idx, cv2.cuda.sum(magnitude)[0] / gray.size
+                prev_gpu = cur_gpu
+            return
+        
+        if SPARSE_FLOW_GRID:
+            yield from self._sparse_flow_scores(frames)
+            return
+        
+        prev_frame = None
+        # Reused output buffer: without OPTFLOW_USE_INITIAL_FLOW its contents are ignored
+        flow = None
+        for frame_idx, gray in frames:
+            if prev_frame is not None:
+                # Calculate optical flow for motion detection
+                flow = cv2.calcOpticalFlowFarneback(
+                    prev_frame, gray, flow,
+                    OPTICAL_FLOW_PYR_SCALE,
+                    OPTICAL_FLOW_LEVELS,
+                    OPTICAL_FLOW_WINSIZE,
+                    *FARNEBACK_FIXED_PARAMS
+                )
+                
+                # Calculate motion magnitude (no angle needed, so no cartToPolar atan2)
+                yield frame_idx, cv2.mean(cv2.magnitude(flow[..., 0], flow[..., 1]))[0]
+            
+            prev_frame = gray
+    
+    def _sparse_flow_scores(self, frames: Iterator[Tuple[int, np.ndarray]]) -> Iterator[Tuple[int, float]]:
+        """Mean Lucas-Kanade speed of a SPARSE_FLOW_GRID x SPARSE_FLOW_GRID point lattice per frame pair"""
+        width, height = ANALYSIS_SIZE
+        margin = OPTICAL_FLOW_WINSIZE
+        xs = np.linspace(margin, width - 1 - margin, SPARSE_FLOW_GRID, dtype=np.float32)
+        ys = np.linspace(margin, height - 1 - margin, SPARSE_FLOW_GRID, dtype=np.float32)
+        grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 1, 2)
+        
+        prev_frame = None
+        for frame_idx, gray in frames:
+            if prev_frame is not None:
+                tracked, status, _ = cv2.calcOpticalFlowPyrLK(
+                    prev_frame, gray, grid, None,
+                    winSize=(OPTICAL_FLOW_WINSIZE, OPTICAL_FLOW_WINSIZE),
+                    maxLevel=OPTICAL_FLOW_LEVELS
+                )
+                found = status.ravel() == 1
+                if found.any():
+                    motion = (tracked - grid).reshape(-1, 2)[found]
+                    yield frame_idx, float(np.hypot(motion[:, 0], motion[:, 1]).mean())
+                else:
+                    # Every point lost: the picture changed completely
+                    yield frame_idx, float(max(width, height))
+            
+            prev_frame = gray
+    
+    def _gray_frames(
+        self,
+        video_path: str,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None
+    ) -> Tuple[float, int, Iterator[Tuple[int, np.ndarray]]]:
+        """Open a video for motion analysis with PyAV if installed, otherwise OpenCV"""
+        if AV_AVAILABLE:
+            return self._gray_frames_av(video_path, start_frame, end_frame)
+        return self._gray_frames_cv2(video_path, start_frame, end_frame)
+    
+    def _gray_frames_av(
+        self,
+        video_path: str,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None
+    ) -> Tuple[float, int, Iterator[Tuple[int, np.ndarray]]]:
+        """
+        Open a video with PyAV for motion analysis
+        
+        Every frame is decoded and every frame_sample_rate-th kept, unless
+        seek_only is set: then the decoder seeks to each sampled frame, so cost
+        scales with the number of samples rather than the video length.
+        
+        Args:
+            video_path: Path to video file
+            start_frame: First frame to read
+            end_frame: Last frame to read (defaults to the end of the video)
+            
+        Returns:
+            (fps, total frame count, iterator of (frame index, downscaled gray frame)
+            for every frame_sample_rate-th frame)
+        """
+        container = av.open(video_path)
+        stream = container.streams.video[0]
+        # Slice threads inside libav; decoding also runs without the GIL
+        stream.thread_type = "SLICE"
+        stream.thread_count = 0
+        
+        fps = float(stream.average_rate or 0)
+        total_frames = stream.frames
+        if not total_frames and container.duration:
+            total_frames = int(container.duration / av.time_base * fps)
+        
+        def frames() -> Iterator[Tuple[int, np.ndarray]]:
+            width, height = ANALYSIS_SIZE
+            time_base = stream.time_base
+            start_time = float((stream.start_time or 0) * time_base)
+            frame_idx = None
+            try:
+                if start_frame:
+                    # Lands on the keyframe at or before start_frame
+                    container.seek(int((start_time + start_frame / fps) / time_base), stream=stream)
+                for frame in container.decode(stream):
+                    if frame_idx is None:
+                        frame_idx = round((frame.time - start_time) * fps) if start_frame and frame.time is not None else 0
+                    else:
+                        frame_idx += 1
+                    if frame_idx < start_frame:
+                        continue
+                    if end_frame is not None and frame_idx > end_frame:
+                        break
+                    # Sample frames for speed
+                    if (frame_idx - start_frame) % self.frame_sample_rate != 0:
+                        continue
+                    yield frame_idx, frame.reformat(width=width, height=height, format="gray8", interpolation="AREA").to_ndarray()
+            finally:
+                container.close()
+        
+        def seek_frames() -> Iterator[Tuple[int, np.ndarray]]:
+            width, height = ANALYSIS_SIZE
+            time_base = stream.time_base
+            start_time = float((stream.start_time or 0) * time_base)
+            decoded = None
+            position = None
+            try:
+                last_frame = total_frames if end_frame is None else min(end_frame + 1, total_frames)
+                for frame_idx in range(start_frame, last_frame, self.frame_sample_rate):
+                    target = start_time + frame_idx / fps
+                    if decoded is None or position < target - SEEK_MIN_GAP_SECONDS:
+                        # Jumps to the keyframe at or before target
+                        container.seek(int(target / time_base), stream=stream)
+                        decoded = container.decode(stream)
+                    # Decode forward from there; taking the keyframe itself would
+                    # repeat one picture for every sample in the GOP
+                    for frame in decoded:
+                        position = frame.time if frame.time is not None else target
+                        if position >= target - 0.5 / fps:
+                            break
+                    else:
+                        return
+                    yield frame_idx, frame.reformat(width=width, height=height, format="gray8", interpolation="AREA").to_ndarray()
+            finally:
+                container.close()
+        
+        if self.seek_only and fps > 0 and total_frames:
+            return fps, total_frames, seek_frames()
+        return fps, total_frames, frames()
+    
+    def _gray_frames_cv2(
+        self,
+        video_path: str,
+        start_frame: int = 0,
+        end_frame: Optional[int] = None
+    ) -> Tuple[float, int, Iterator[Tuple[int, np.ndarray]]]:
+        """
+        Open a video with OpenCV for motion analysis (used when PyAV is not installed)
+        
+        Args:
+            video_path: Path to video file
+            start_frame: First frame to read
+            end_frame: Last frame to read (defaults to the end of the video)
+            
+        Returns:
+            (fps, total frame count, iterator of (frame index, downscaled gray frame)
+            for every frame_sample_rate-th frame)
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Ask for the decoder's YUV output: its Y plane already is the gray image,
+        # so there is no BGR frame to build and convert back (ignored by some backends)
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        
+        def frames() -> Iterator[Tuple[int, np.ndarray]]:
+            frame_idx = start_frame
+            try:
+                if start_frame:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                # grab() only advances the decoder; pixels are fetched for sampled frames alone
+                while (end_frame is None or frame_idx <= end_frame) and cap.grab():
+                    # Sample frames for speed
+                    if (frame_idx - start_frame) % self.frame_sample_rate == 0:
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        gray = _luma(frame, height)
+                        if gray is None:
+                            # Raw layout not understood: switch back to BGR and fetch
+                            # the same grabbed frame again
+                            cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+                            ret, frame = cap.retrieve()
+                            if not ret:
+                                break
+                            gray = _luma(frame, height)
+                        # Resize for faster processing
+                        yield frame_idx, cv2.resize(gray, ANALYSIS_SIZE, interpolation=cv2.INTER_AREA)
+                    frame_idx += 1
+            finally:
+                cap.release()
+        
+        return fps, total_frames, frames()
+    
     def _extract_segments_from_scores(
         self, 
-        motion_scores: List[Dict], 
+        times: np.ndarray, 
+        scores: np.ndarray, 
         fps: float, 
         segment_duration: int
     ) -> List[Dict]:
@@ -219,56 +667,53 @@ class VideoProcessor:
         Extract continuous high-motion segments from motion scores
         
         Args:
-            motion_scores: List of motion score dictionaries
+            times: Time in seconds of each sampled frame
+            scores: Normalized (0-1) motion score of each sampled frame
             fps: Video frame rate
             segment_duration: Target segment duration
             
         Returns:
             List of segment dictionaries
         """
-        if not motion_scores:
+        if not len(scores):
             return []
         
         # Calculate threshold (mean + std)
-        normalized_scores = [m['normalized_score'] for m in motion_scores]
-        mean_score = np.mean(normalized_scores)
-        std_score = np.std(normalized_scores)
-        threshold = mean_score + (std_score * 0.5)
-        
-        # Find high-motion regions
-        segments = []
-        in_segment = False
-        segment_start = None
-        segment_scores = []
+        threshold = scores.mean() + (scores.std() * 0.5)
         
         window_size = int(fps * segment_duration / self.frame_sample_rate)
         step_size = window_size // 2
         
-        for i in range(0, len(motion_scores) - window_size, step_size):
-            window = motion_scores[i:i + window_size]
-            avg_score = np.mean([m['normalized_score'] for m in window])
+        # Every window mean from one prefix sum instead of a slice + mean per step
+        window_starts = np.arange(0, len(scores) - window_size, step_size)
+        prefix = np.concatenate(([0.0], np.cumsum(scores)))
+        window_means = (prefix[window_starts + window_size] - prefix[window_starts]) / window_size
+        
+        # Find high-motion regions
+        segments = []
+        for i in np.flatnonzero(window_means > threshold):
+            first = window_starts[i]
+            avg_score = float(window_means[i])
+            start_time = float(times[first])
+            end_time = float(times[first + window_size - 1])
+            duration = end_time - start_time
             
-            if avg_score > threshold:
-                start_time = window[0]['time']
-                end_time = window[-1]['time']
+            # Ensure duration is within limits
+            if duration < MIN_CLIP_LENGTH:
+                # Extend segment
+                extension = (MIN_CLIP_LENGTH - duration) / 2
+                start_time = max(0, start_time - extension)
+                end_time = min(float(times[-1]), end_time + extension)
                 duration = end_time - start_time
-                
-                # Ensure duration is within limits
-                if duration < MIN_CLIP_LENGTH:
-                    # Extend segment
-                    extension = (MIN_CLIP_LENGTH - duration) / 2
-                    start_time = max(0, start_time - extension)
-                    end_time = min(motion_scores[-1]['time'], end_time + extension)
-                    duration = end_time - start_time
-                
-                if duration >= MIN_CLIP_LENGTH and duration <= MAX_CLIP_LENGTH:
-                    segments.append({
-                        'start': start_time,
-                        'end': end_time,
-                        'duration': duration,
-                        'score': avg_score,
-                        'confidence': min(1.0, avg_score * 1.5)
-                    })
+            
+            if duration >= MIN_CLIP_LENGTH and duration <= MAX_CLIP_LENGTH:
+                segments.append({
+                    'start': start_time,
+                    'end': end_time,
+                    'duration': duration,
+                    'score': avg_score,
+                    'confidence': min(1.0, avg_score * 1.5)
+                })
         
         # Sort by score (highest first) and remove overlaps
         segments = sorted(segments, key=lambda x: x['score'], reverse=True)
@@ -277,21 +722,30 @@ class VideoProcessor:
         return segments
     
     def _remove_overlapping_segments(self, segments: List[Dict]) -> List[Dict]:
-        """Remove overlapping segments, keeping highest scoring ones"""
+        """
+        Remove overlapping segments, keeping highest scoring ones
+        
+        Segments are taken in the given (best-first) order. Kept segments never
+        overlap, so sorted by start they are sorted by end too, and a new segment
+        only has to be checked against its two neighbours: O(log N) per segment.
+        """
         if not segments:
             return []
         
         non_overlapping = []
+        kept_starts = []
+        kept_ends = []
         for seg in segments:
-            overlaps = False
-            for existing in non_overlapping:
-                # Check if segments overlap
-                if not (seg['end'] <= existing['start'] or seg['start'] >= existing['end']):
-                    overlaps = True
-                    break
+            # Check if segments overlap
+            pos = bisect_right(kept_starts, seg['start'])
+            if pos > 0 and kept_ends[pos - 1] > seg['start']:
+                continue
+            if pos < len(kept_starts) and kept_starts[pos] < seg['end']:
+                continue
             
-            if not overlaps:
-                non_overlapping.append(seg)
+            kept_starts.insert(pos, seg['start'])
+            kept_ends.insert(pos, seg['end'])
+            non_overlapping.append(seg)
         
         return non_overlapping
     
@@ -314,62 +768,69 @@ class VideoProcessor:
         Returns:
             Path to output video
         """
-        try:
-            logger.info(f"Cropping segment {start_time:.2f}s - {end_time:.2f}s to 9:16")
-            
-            # Load video clip
-            clip = VideoFileClip(video_path)
-            
-            # Extract segment
-            segment = clip.subclip(start_time, end_time)
-            
-            # Get dimensions
-            w, h = segment.size
-            target_w, target_h = OUTPUT_RESOLUTION
-            
-            # Calculate crop dimensions for 9:16 aspect ratio
-            target_aspect = target_w / target_h  # 9/16 = 0.5625
-            
-            if w / h > target_aspect:
-                # Video is wider than target - crop width (center crop)
-                new_w = int(h * target_aspect)
-                x_offset = (w - new_w) // 2
-                cropped = segment.crop(x1=x_offset, y1=0, x2=x_offset + new_w, y2=h)
-            else:
-                # Video is taller than target - crop height (center crop)
-                new_h = int(w / target_aspect)
-                y_offset = (h - new_h) // 2
-                cropped = segment.crop(x1=0, y1=y_offset, x2=w, y2=y_offset + new_h)
-            
-            # Resize to exact output resolution
-            final = cropped.resize(height=target_h)
-            
-            # Set standard frame rate
-            final = final.set_fps(30)
-            
-            # Write video file
-            final.write_videofile(
-                output_path,
-                codec=OUTPUT_CODEC,
-                audio_codec='aac',
-                bitrate=OUTPUT_BITRATE,
-                verbose=False,
-                logger=None,
-                preset='medium'
-            )
-            
-            # Clean up
-            segment.close()
-            cropped.close()
-            final.close()
-            clip.close()
+        logger.info(f"Cropping segment {start_time:.2f}s - {end_time:.2f}s to 9:16")
+        return self.crop_to_vertical_batch(video_path, [(output_path, start_time, end_time)])[0]
+    
+    def crop_to_vertical_batch(
+        self,
+        video_path: str,
+        clips: List[Tuple[str, float, float]]
+    ) -> List[str]:
+        """
+        Crop several segments of one video to 9:16 in a single FFmpeg run
+        
+        Each segment is its own fast-seeked input (input seeking is still frame
+        accurate when re-encoding), so only the clip ranges are decoded, and
+        decode, crop, scale and encode all stay inside one FFmpeg process.
+        
+        Args:
+            video_path: Path to input video
+            clips: (output_path, start_time, end_time) for each clip
             
-            logger.info(f"✓ Cropped video saved: {output_path}")
-            return output_path
+        Returns:
+            Output paths, in the same order as clips
             
-        except Exception as e:
-            logger.error(f"Crop failed: {str(e)}")
+        Raises:
+            RuntimeError: If no ffmpeg binary is available (there is no per-clip fallback;
+                crop_to_vertical goes through this method as well)
+            subprocess.CalledProcessError: If FFmpeg fails
+        """
+        ffmpeg = _ffmpeg_binary()
+        if not ffmpeg:
+            raise RuntimeError("ffmpeg not found: install it or the imageio-ffmpeg package")
+        
+        target_w, target_h = OUTPUT_RESOLUTION
+        # Center crop to the target aspect ratio, then scale to the exact output size
+        video_filter = (
+            f"crop=w='min(iw,ih*{target_w}/{target_h})':h='min(ih,iw*{target_h}/{target_w})',"
+            f"scale={target_w}:{target_h},setsar=1,fps=30"
+        )
+        
+        cmd = [ffmpeg, '-y', '-loglevel', 'error']
+        for _, start_time, end_time in clips:
+            cmd += ['-ss', f"{start_time:.3f}", '-t', f"{end_time - start_time:.3f}", '-i', video_path]
+        cmd += ['-filter_complex', ';'.join(f"[{i}:v]{video_filter}[v{i}]" for i in range(len(clips)))]
+        for i, (output_path, _, _) in enumerate(clips):
+            cmd += [
+                '-map', f"[v{i}]", '-map', f"{i}:a?",
+                '-c:v', OUTPUT_CODEC, '-b:v', OUTPUT_BITRATE, '-preset', 'medium',
+                '-c:a', 'aac',
+                output_path
+            ]
+        
+        logger.info(f"Cropping {len(clips)} segment(s) to 9:16 in one FFmpeg pass")
+        try:
+            subprocess.run(cmd, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Crop failed: {e.stderr.decode('utf-8', 'replace').strip()}")
             raise
+        
+        if DROP_CLIP_PAGE_CACHE and hasattr(os, 'posix_fadvise'):
+            for output_path, _, _ in clips:
+                _drop_page_cache(output_path)
+        
+        logger.info(f"✓ Cropped {len(clips)} clip(s)")
+        return [output_path for output_path, _, _ in clips]
 
 
 # Test the processor independently
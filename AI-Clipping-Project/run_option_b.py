@@ -4,10 +4,6 @@ Orchestrates monitoring, processing, and posting
 """
 import sys
 import logging
-from pathlib import Path
-
-# Add AI-Clipping-Project to path
-sys.path.insert(0, str(Path(__file__).parent / "AI-Clipping-Project"))
 
 from monitor_creator import CreatorMonitor
 from auto_poster import AutoPoster
@@ -69,21 +65,21 @@ class OptionBOrchestrator:
             logger.info("No new videos found")
             return
         
-        # Process each new video
-        for creator_name, new_videos in new_videos_by_creator.items():
-            creator = next(
-                (c for c in self.monitor.config["creators"] if c["name"] == creator_name),
-                None
-            )
-            
-            if not creator:
-                continue
-            
-            for video_info in new_videos:
-                # Process video
-                bundles = self.monitor.process_new_video(video_info, creator)
-                
+        # Gather every new video first so they are processed as one batch
+        # (segment detection then runs across worker processes)
+        creators_by_name = {c["name"]: c for c in self.monitor.config["creators"]}
+        tasks = [
+            (video_info, creators_by_name[creator_name])
+            for creator_name, new_videos in new_videos_by_creator.items()
+            if creator_name in creators_by_name
+            for video_info in new_videos
+        ]
+        
+        # One whop_config.json write for the whole batch of payment links
+        with self.whop.bulk():
+            for (video_info, creator), bundles in zip(tasks, self.monitor.process_new_videos(tasks)):
                 if bundles:
+                    creator_name = creator["name"]
                     # Generate Whop.com payment link
                     whop_link = self.whop.create_payment_link(
                         creator_name=creator_name,
@@ -91,9 +87,9 @@ class OptionBOrchestrator:
                         num_clips=len(bundles),
                         pricing_type="per_video"
                     )
-                    
+                
                     logger.info(f"Payment link for {creator_name}: {whop_link}")
-                    
+                
                     # Send notification with payment link
                     self.monitor._send_notification(creator, video_info, bundles)
         
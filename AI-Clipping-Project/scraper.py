@@ -3,15 +3,72 @@ Video Scraper Module
 Downloads highest quality vertical videos from YouTube/TikTok using yt-dlp
 """
 import yt_dlp
+import atexit
+import copy
 import os
 import logging
+import shutil
+import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import Optional, Dict
-from config import TEMP_DIR
+from config import today_output
+
+# Optional: persist extracted video info across restarts
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# Optional: accurate available-memory figure for the tmpfs download guard
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Direct-URL YouTube formats come from the player response; the DASH/HLS
+# manifests are extra round-trips (very slow for long or live videos)
+EXTRACTOR_ARGS = {'youtube': {'skip': ['dash', 'hls']}}
+
+# Extracted info is reused on retries and re-runs; kept short because the
+# stream URLs inside it expire after a few hours
+INFO_CACHE_TTL_SECONDS = 3600
+INFO_CACHE_DIR = Path(".cache") / "ytdlp_info"
+
+# Downloads go to RAM-backed tmpfs when there is room, so the repeated reads
+# during detection and cropping never touch the disk
+RAM_DIR_ROOT = Path('/dev/shm')
+# Available memory must exceed the estimated download size by this factor
+RAM_HEADROOM_FACTOR = 2
+
+
+def _available_memory() -> Optional[int]:
+    """Bytes of memory available to new allocations, or None if unknown"""
+    if PSUTIL_AVAILABLE:
+        return psutil.virtual_memory().available
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _estimated_size(info: Dict) -> Optional[int]:
+    """Expected download size in bytes from yt-dlp's selected formats, or None if unknown"""
+    formats = info.get('requested_formats') or [info]
+    total = 0
+    for fmt in formats:
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size:
+            return None
+        total += size
+    return total
+
 
 class VideoScraper:
     """Handles video downloads from YouTube and TikTok"""
@@ -21,10 +78,104 @@ class VideoScraper:
         Initialize the video scraper
         
         Args:
-            output_dir: Directory to save downloaded videos (defaults to TEMP_DIR)
+            output_dir: Directory to save downloaded videos (defaults to today's temp folder)
         """
-        self.output_dir = output_dir or TEMP_DIR
+        self.output_dir = output_dir or today_output() / "temp"
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ram_dir = self._make_ram_dir()
+        self._local = threading.local()
+        # Persisted across restarts when diskcache is installed, in-memory otherwise
+        self._info_cache = diskcache.Cache(str(INFO_CACHE_DIR)) if DISKCACHE_AVAILABLE else None
+        self._memory_info_cache: Dict[str, tuple] = {}
+    
+    @staticmethod
+    def _make_ram_dir() -> Optional[Path]:
+        """Create a private tmpfs directory for downloads (removed at exit), or None if there is no tmpfs"""
+        if not RAM_DIR_ROOT.is_dir():
+            return None
+        try:
+            ram_dir = Path(tempfile.mkdtemp(prefix='clipping-', dir=RAM_DIR_ROOT))
+        except OSError:
+            return None
+        atexit.register(shutil.rmtree, ram_dir, ignore_errors=True)
+        return ram_dir
+    
+    def _download_dir(self, info: Dict) -> Path:
+        """Pick tmpfs when the video comfortably fits in free memory, otherwise the temp directory"""
+        if self.ram_dir is None:
+            return self.output_dir
+        size = _estimated_size(info)
+        available = _available_memory()
+        if size is None or available is None or available <= RAM_HEADROOM_FACTOR * size:
+            return self.output_dir
+        # tmpfs is usually capped below total RAM, so it needs its own check
+        if shutil.disk_usage(self.ram_dir).free <= size:
+            return self.output_dir
+        return self.ram_dir
+    
+    def _get_ydl(self, output_dir: Optional[Path] = None) -> yt_dlp.YoutubeDL:
+        """
+        Get this thread's YoutubeDL instance for output_dir, creating it on first use
+        
+        Building YoutubeDL loads extractors and ffmpeg postprocessors, so one
+        instance is reused per thread and directory (YoutubeDL itself is not thread-safe).
+        """
+        output_dir = output_dir or self.output_dir
+        instances = getattr(self._local, 'ydl', None)
+        if instances is None:
+            instances = self._local.ydl = {}
+        ydl = instances.get(output_dir)
+        if ydl is None:
+            # Configure yt-dlp options for highest quality vertical video
+            ydl_opts = {
+                'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
+                'outtmpl': str(output_dir / '%(id)s.%(ext)s'),
+                'quiet': False,
+                'no_warnings': False,
+                'merge_output_format': 'mp4',
+                'extractor_args': EXTRACTOR_ARGS,
+                'postprocessors': [{
+                    'key': 'FFmpegVideoConvertor',
+                    'preferedformat': 'mp4',
+                }],
+            }
+            ydl = yt_dlp.YoutubeDL(ydl_opts)
+            instances[output_dir] = ydl
+        return ydl
+    
+    def _extract_info(self, url: str) -> Dict:
+        """
+        Extract a video's info without downloading, cached for INFO_CACHE_TTL_SECONDS
+        
+        Args:
+            url: Video URL
+            
+        Returns:
+            yt-dlp info dict (sanitized so it can be cached)
+        """
+        key = f"info:{url}"
+        if self._info_cache is not None:
+            info = self._info_cache.get(key)
+            if info is not None:
+                return info
+        else:
+            cached = self._memory_info_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                # Downloading fills in the dict, so hand out a copy
+                return copy.deepcopy(cached[1])
+        
+        ydl = self._get_ydl()
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        
+        if self._info_cache is not None:
+            self._info_cache.set(key, info, expire=INFO_CACHE_TTL_SECONDS)
+        else:
+            now = time.monotonic()
+            # Drop expired entries so a long-running monitor doesn't accumulate them
+            for stale_key in [k for k, (expires, _) in self._memory_info_cache.items() if expires <= now]:
+                self._memory_info_cache.pop(stale_key, None)
+            self._memory_info_cache[key] = (now + INFO_CACHE_TTL_SECONDS, copy.deepcopy(info))
+        return info
     
     def validate_url(self, url: str) -> bool:
         """
@@ -62,6 +213,8 @@ class VideoScraper:
                 'video_id': str,
                 'title': str,
                 'duration': float,
+                'uploader': str,
+                'upload_date': str,
                 'error': str (if failed)
             }
         """
@@ -71,49 +224,53 @@ class VideoScraper:
             return {'success': False, 'error': error_msg}
         
         try:
-            # Configure yt-dlp options for highest quality vertical video
-            ydl_opts = {
-                'format': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best',
-                'outtmpl': str(self.output_dir / '%(id)s.%(ext)s'),
-                'quiet': False,
-                'no_warnings': False,
-                'merge_output_format': 'mp4',
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',
-                }],
-            }
+            # Extract first so the size of the selected formats decides where the file goes
+            # (yt-dlp itself skips the download when the output file is already there)
+            info = self._extract_info(url)
+            download_dir = self._download_dir(info)
+            ydl = self._get_ydl(download_dir)
+            logger.info(f"Downloading video from {url}")
+            info = ydl.process_ie_result(info, download=True)
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                logger.info(f"Downloading video from {url}")
-                info = ydl.extract_info(url, download=True)
-                
-                video_id = info.get('id', video_id or 'unknown')
+            video_id = info.get('id', video_id or 'unknown')
+            
+            # The merged/converted output path is reported by yt-dlp itself,
+            # so prefer it over guessing extensions on disk
+            downloads = info.get('requested_downloads') or []
+            video_path = downloads[0].get('filepath') if downloads else None
+            if not video_path:
                 video_path = ydl.prepare_filename(info)
-                
-                # Ensure file exists
-                if not os.path.exists(video_path):
-                    # Try alternative extension
-                    for ext in ['mp4', 'webm', 'mkv']:
-                        alt_path = str(self.output_dir / f"{video_id}.{ext}")
-                        if os.path.exists(alt_path):
-                            video_path = alt_path
-                            break
-                
-                result = {
-                    'success': True,
-                    'video_path': video_path,
-                    'video_id': video_id,
-                    'title': info.get('title', 'Untitled'),
-                    'duration': info.get('duration', 0),
-                    'width': info.get('width', 0),
-                    'height': info.get('height', 0),
-                    'description': info.get('description', ''),
-                }
-                
-                logger.info(f"✓ Downloaded: {result['title']} ({result['duration']}s)")
-                return result
-                
+            
+            # Ensure file exists
+            if not os.path.exists(video_path):
+                # Try alternative extension
+                for ext in ['mp4', 'webm', 'mkv']:
+                    alt_path = str(download_dir / f"{video_id}.{ext}")
+                    if os.path.exists(alt_path):
+                        video_path = alt_path
+                        break
+            
+            # extract_info already carries the full metadata, so fill every
+            # field callers need here rather than querying the URL again
+            result = {
+                'success': True,
+                'video_path': video_path,
+                'video_id': video_id,
+                'title': info.get('title', 'Untitled'),
+                'duration': info.get('duration', 0),
+                'width': info.get('width', 0),
+                'height': info.get('height', 0),
+                'description': info.get('description', ''),
+                'uploader': info.get('uploader') or info.get('channel', ''),
+                'channel_id': info.get('channel_id', ''),
+                'upload_date': info.get('upload_date', ''),
+                'webpage_url': info.get('webpage_url', url),
+                'fps': info.get('fps', 0),
+            }
+            
+            logger.info(f"✓ Downloaded: {result['title']} ({result['duration']}s)")
+            return result
+            
         except Exception as e:
             error_msg = f"Download failed: {str(e)}"
             logger.error(error_msg)
@@ -131,12 +288,12 @@ class VideoScraper:
                 os.remove(video_path)
                 logger.info(f"Cleaned up: {video_path}")
             elif video_path is None:
-                # Clear entire temp directory
-                import shutil
-                if self.output_dir.exists():
-                    shutil.rmtree(self.output_dir)
-                    self.output_dir.mkdir(parents=True, exist_ok=True)
-                    logger.info(f"Cleaned up temp directory: {self.output_dir}")
+                # Clear entire temp directory (and the tmpfs one)
+                for directory in filter(None, (self.output_dir, self.ram_dir)):
+                    if directory.exists():
+                        shutil.rmtree(directory)
+                        directory.mkdir(parents=True, exist_ok=True)
+                        logger.info(f"Cleaned up temp directory: {directory}")
         except Exception as e:
             logger.warning(f"Cleanup failed: {str(e)}")
 
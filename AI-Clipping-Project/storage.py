@@ -4,23 +4,94 @@ Organizes processed clips, captions, and metadata into structured folders
 Formats output for instagrapi and clawdbot automation
 """
 import os
-import json
 import shutil
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 import logging
-from config import (
-    TODAY_OUTPUT,
-    CLIPS_DIR,
-    CAPTIONS_DIR,
-    METADATA_DIR,
-)
+from json_io import loads, dumps, write_json
+from config import today_output
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows: posted.log appends and compaction are not serialized across processes
+    FCNTL_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ClipPaths(NamedTuple):
+    """Files belonging to one clip"""
+    stem: str
+    video: Path
+    captions: Path
+    metadata: Path
+
+
+def _lock_file(f):
+    """Take an exclusive advisory lock on an open file, where supported"""
+    if FCNTL_AVAILABLE:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    """Release a lock taken by _lock_file"""
+    if FCNTL_AVAILABLE:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _fast_copy(src: Path, dst: Path, prefer_hardlink: bool = True):
+    """
+    Copy src to dst with the cheapest mechanism the filesystem supports
+    
+    Tries a hardlink (no data copied), then an in-kernel copy_file_range (a
+    reflink on btrfs/xfs), and finally shutil.copy2. The copy is made under a
+    temporary name and renamed over dst, so an existing dst survives failures.
+    """
+    if dst.exists() and os.path.samefile(src, dst):
+        # Already in place; unlinking dst would delete the only copy
+        return
+    
+    tmp_path = dst.with_name(f"{dst.name}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    
+    try:
+        if prefer_hardlink:
+            try:
+                os.link(src, tmp_path)
+                os.replace(tmp_path, dst)
+                return
+            except OSError:
+                # Different filesystem (EXDEV) or links not permitted
+                pass
+        
+        if hasattr(os, 'copy_file_range'):
+            try:
+                with open(src, 'rb') as s, open(tmp_path, 'wb') as d:
+                    remaining = os.fstat(s.fileno()).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(s.fileno(), d.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                if remaining == 0:
+                    shutil.copystat(src, tmp_path)
+                    os.replace(tmp_path, dst)
+                    return
+            except OSError:
+                pass
+        
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
 class StorageManager:
     """Manages file organization and metadata storage"""
     
@@ -29,24 +100,39 @@ class StorageManager:
         Initialize storage manager
         
         Args:
-            base_path: Base output directory (defaults to TODAY_OUTPUT from config)
+            base_path: Base output directory (defaults to today's folder from config)
         """
-        self.base_path = base_path or TODAY_OUTPUT
+        self.base_path = base_path or today_output()
         self.clips_dir = self.base_path / "clips"
         self.captions_dir = self.base_path / "captions"
         self.metadata_dir = self.base_path / "metadata"
+        self.posted_log_path = self.base_path / "posted.log"
+        self.manifest_ndjson_path = self.base_path / "manifest.ndjson"
+        self._posted_log = None
+        # Parsed caption/metadata sidecars keyed by path, valid while st_mtime_ns matches
+        self._sidecar_cache: Dict[Path, Tuple[int, Any]] = {}
+        self._clip_paths: Dict[str, ClipPaths] = {}
+        # Sidecars written by this instance, known to exist without a stat
+        self._written: Set[Path] = set()
         
         # Ensure directories exist
         for dir_path in [self.clips_dir, self.captions_dir, self.metadata_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
     
-    def save_clip(self, video_path: str, clip_name: Optional[str] = None) -> str:
+    def save_clip(
+        self,
+        video_path: str,
+        clip_name: Optional[str] = None,
+        prefer_hardlink: bool = True
+    ) -> str:
         """
         Save processed clip to structured folder
         
         Args:
             video_path: Path to processed video file
             clip_name: Optional custom name for the clip
+            prefer_hardlink: Hardlink when possible; pass False if the saved clip
+                must not share its data with video_path
             
         Returns:
             Path to saved clip
@@ -59,11 +145,11 @@ class StorageManager:
         if not clip_name.endswith('.mp4'):
             clip_name = f"{Path(clip_name).stem}.mp4"
         
-        output_path = self.clips_dir / clip_name
+        output_path = self._paths_for(clip_name).video
         
         try:
             # Copy video file
-            shutil.copy2(video_path, output_path)
+            _fast_copy(Path(video_path), output_path, prefer_hardlink)
             logger.info(f"✓ Clip saved: {output_path}")
             return str(output_path)
         except Exception as e:
@@ -81,14 +167,11 @@ class StorageManager:
         Returns:
             Path to saved captions file
         """
-        # Generate caption filename from clip name
-        clip_stem = Path(clip_name).stem
-        caption_filename = f"{clip_stem}_captions.json"
-        output_path = self.captions_dir / caption_filename
+        output_path = self._paths_for(clip_name).captions
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(captions_list, f, indent=2, ensure_ascii=False)
+            write_json(output_path, captions_list, indent=True)
+            self._written.add(output_path)
             logger.info(f"✓ Captions saved: {output_path}")
             return str(output_path)
         except Exception as e:
@@ -110,67 +193,161 @@ class StorageManager:
         Returns:
             Path to saved metadata file
         """
-        clip_stem = Path(clip_name).stem
-        metadata_filename = f"{clip_stem}_metadata.json"
-        output_path = self.metadata_dir / metadata_filename
+        output_path = self._paths_for(clip_name).metadata
         
         try:
             # Add timestamp and format info
             metadata['timestamp'] = datetime.now().isoformat()
             metadata['clip_filename'] = clip_name
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            write_json(output_path, metadata, indent=True)
+            self._written.add(output_path)
             logger.info(f"✓ Metadata saved: {output_path}")
             return str(output_path)
         except Exception as e:
             logger.error(f"Failed to save metadata: {str(e)}")
             raise
     
-    def get_post_ready_bundle(self, clip_name: str) -> Dict:
+    def get_post_ready_bundle(
+        self,
+        clip_name: str,
+        posted: Optional[Dict[str, str]] = None,
+        metadata: Optional[Dict] = None,
+        captions: Optional[List[Dict]] = None,
+        clip_entry: Optional[os.DirEntry] = None
+    ) -> Dict:
         """
         Get structured bundle ready for instagrapi/clawdbot automation
         
         Args:
             clip_name: Name of the clip
+            posted: Pre-read posted log (read from disk if not given)
+            metadata: Metadata just saved for this clip (read from disk if not given)
+            captions: Captions just saved for this clip (read from disk if not given)
+            clip_entry: Directory entry of the clip from _iter_clip_entries
             
         Returns:
             Dictionary with all paths and data needed for posting
         """
-        clip_stem = Path(clip_name).stem
+        paths = self._paths_for(clip_name)
         
         # Load captions
-        captions_path = self.captions_dir / f"{clip_stem}_captions.json"
-        captions = []
-        if captions_path.exists():
-            with open(captions_path, 'r', encoding='utf-8') as f:
-                captions = json.load(f)
+        captions_path = paths.captions
+        if captions is None:
+            # The load already stats the file, so reuse it as the existence check
+            loaded = self._load_json(captions_path)
+            has_captions = loaded is not None
+            captions = list(loaded or [])
+        else:
+            has_captions = captions_path in self._written or captions_path.exists()
         
         # Load metadata
-        metadata_path = self.metadata_dir / f"{clip_stem}_metadata.json"
-        metadata = {}
-        if metadata_path.exists():
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+        metadata_path = paths.metadata
+        if metadata is None:
+            loaded = self._load_json(metadata_path)
+            has_metadata = loaded is not None
+            # Copied because the posted state is merged into it below
+            metadata = dict(loaded or {})
+        else:
+            has_metadata = metadata_path in self._written or metadata_path.exists()
         
         # Build bundle
         bundle = {
-            'clip_id': clip_stem,
-            'video_path': str(self.clips_dir / clip_name),
-            'captions_path': str(captions_path) if captions_path.exists() else None,
-            'metadata_path': str(metadata_path) if metadata_path.exists() else None,
+            'clip_id': paths.stem,
+            'video_path': clip_entry.path if clip_entry is not None else str(paths.video),
+            'captions_path': str(captions_path) if has_captions else None,
+            'metadata_path': str(metadata_path) if has_metadata else None,
             'captions': captions,
             'metadata': metadata,
             'timestamp': datetime.now().isoformat(),
             'date_folder': self.base_path.name,
         }
         
+        self._apply_posted(bundle, self._read_posted_log() if posted is None else posted)
         return bundle
     
+    def _paths_for(self, clip_name: str) -> ClipPaths:
+        """Get the video and sidecar paths for a clip, derived once per name"""
+        paths = self._clip_paths.get(clip_name)
+        if paths is None:
+            stem = Path(clip_name).stem
+            paths = ClipPaths(
+                stem=stem,
+                video=self.clips_dir / clip_name,
+                captions=self.captions_dir / f"{stem}_captions.json",
+                metadata=self.metadata_dir / f"{stem}_metadata.json",
+            )
+            self._clip_paths[clip_name] = paths
+        return paths
+    
+    def _load_json(self, path: Path) -> Any:
+        """
+        Parse a JSON sidecar, reusing the previous parse while the file is unchanged
+        
+        Returns:
+            Parsed data, or None if the file does not exist
+        """
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._sidecar_cache.pop(path, None)
+            return None
+        
+        cached = self._sidecar_cache.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        data = loads(path.read_bytes())
+        self._sidecar_cache[path] = (mtime_ns, data)
+        return data
+    
+    def append_to_manifest(self, bundle: Dict):
+        """
+        Append one bundle as a line of manifest.ndjson
+        
+        Preferred over create_posting_manifest: each clip costs one small append
+        and readers can stream the file with iter_manifest. Records are keyed on
+        the bundle's clip_id; a later line for the same clip supersedes earlier ones.
+        
+        Args:
+            bundle: Post-ready bundle from get_post_ready_bundle
+        """
+        with open(self.manifest_ndjson_path, 'ab') as f:
+            f.write(dumps(bundle) + b'\n')
+    
+    def iter_manifest(self) -> Iterator[Dict]:
+        """
+        Yield the bundles recorded in manifest.ndjson, oldest first
+        
+        Clip files are overwritten when a later video reuses a clip name, so only
+        the latest record for each clip_id is yielded.
+        
+        Returns:
+            Iterator of bundle dictionaries
+        """
+        latest: Dict[str, Dict] = {}
+        try:
+            with open(self.manifest_ndjson_path, 'rb') as f:
+                for line in f:
+                    try:
+                        bundle = loads(line)
+                    except ValueError:
+                        # Blank line or a write torn by a crash
+                        continue
+                    # Re-insert so a replaced clip moves to its newest position
+                    latest.pop(bundle.get('clip_id'), None)
+                    latest[bundle.get('clip_id')] = bundle
+        except FileNotFoundError:
+            return
+        yield from latest.values()
+    
     def create_posting_manifest(self) -> str:
         """
         Create a manifest file listing all ready-to-post items
         
+        Rebuilds manifest.json from every clip on disk; kept for consumers of that
+        file. New code should read the incremental manifest via iter_manifest.
+        
         Returns:
             Path to manifest file
         """
@@ -181,16 +358,16 @@ class StorageManager:
         }
         
         # Find all clips
-        for clip_file in self.clips_dir.glob('*.mp4'):
-            bundle = self.get_post_ready_bundle(clip_file.name)
+        posted = self._read_posted_log()
+        for entry in self._iter_clip_entries():
+            bundle = self.get_post_ready_bundle(entry.name, posted, clip_entry=entry)
             manifest['clips'].append(bundle)
         
         manifest['total_count'] = len(manifest['clips'])
         
         # Save manifest
         manifest_path = self.base_path / 'manifest.json'
-        with open(manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        write_json(manifest_path, manifest, indent=True)
         
         logger.info(f"✓ Manifest created: {manifest_path} ({manifest['total_count']} clips)")
         return str(manifest_path)
@@ -203,12 +380,146 @@ class StorageManager:
             List of bundle dictionaries
         """
         bundles = []
+        posted = self._read_posted_log()
         
-        for clip_file in self.clips_dir.glob('*.mp4'):
-            bundle = self.get_post_ready_bundle(clip_file.name)
+        for entry in self._iter_clip_entries():
+            bundle = self.get_post_ready_bundle(entry.name, posted, clip_entry=entry)
             bundles.append(bundle)
         
         return bundles
+    
+    def _iter_clip_entries(self) -> Iterator[os.DirEntry]:
+        """Yield directory entries for the .mp4 clips, keeping scandir's cached file type"""
+        with os.scandir(self.clips_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.mp4') and entry.is_file():
+                    yield entry
+    
+    def record_posted(
+        self,
+        metadata_path: str,
+        posted_at: Optional[str] = None
+    ):
+        """
+        Append a posted marker to posted.log instead of rewriting the metadata file
+        
+        Args:
+            metadata_path: Metadata path of the posted bundle
+            posted_at: ISO timestamp (defaults to now)
+        """
+        if self._posted_log is None:
+            self._posted_log = open(self.posted_log_path, 'ab')
+        
+        posted_at = posted_at or datetime.now().isoformat()
+        entry = {'path': str(metadata_path), 'at': posted_at}
+        # Locked so a compaction in another process cannot drop this marker
+        _lock_file(self._posted_log)
+        try:
+            self._posted_log.write(dumps(entry) + b'\n')
+            self._posted_log.flush()
+        finally:
+            _unlock_file(self._posted_log)
+    
+    def close_posted_log(self):
+        """Close the posted.log append handle if open"""
+        if self._posted_log is not None:
+            self._posted_log.close()
+            self._posted_log = None
+    
+    def _read_posted_log(self) -> Dict[str, str]:
+        """Read posted.log into a {metadata_path: posted_at} map"""
+        try:
+            with open(self.posted_log_path, 'rb') as f:
+                return self._parse_posted_log(f)
+        except FileNotFoundError:
+            return {}
+    
+    @staticmethod
+    def _parse_posted_log(f) -> Dict[str, str]:
+        """Parse posted.log lines from an open binary file"""
+        posted = {}
+        for line in f:
+            try:
+                entry = loads(line)
+            except ValueError:
+                # Blank line or a write torn by a crash
+                continue
+            posted[entry['path']] = entry['at']
+        return posted
+    
+    def _apply_posted(self, bundle: Dict, posted: Dict[str, str]):
+        """Merge the posted state from the log into a bundle in memory"""
+        metadata = bundle['metadata']
+        posted_at = posted.get(bundle['metadata_path'])
+        if posted_at:
+            metadata['posted'] = True
+            metadata['posted_at'] = posted_at
+        bundle['posted'] = metadata.get('posted', False)
+    
+    def compact_posted_log(self, min_entries: int = 0) -> int:
+        """
+        Fold posted.log into the metadata files and truncate it
+        
+        The log stays locked from the read to the truncate, so markers appended
+        by another poster process in between are not lost.
+        
+        Args:
+            min_entries: Skip compaction while the log has fewer entries than this
+            
+        Returns:
+            Number of metadata files updated
+        """
+        self.close_posted_log()
+        
+        try:
+            log = open(self.posted_log_path, 'r+b')
+        except FileNotFoundError:
+            return 0
+        
+        with log:
+            _lock_file(log)
+            posted = self._parse_posted_log(log)
+            if not posted or len(posted) < min_entries:
+                return 0
+            
+            updated = 0
+            remaining = {}
+            # Sorting groups files by directory so writes stay sequential per folder
+            for metadata_path, posted_at in sorted(posted.items()):
+                metadata_file = Path(metadata_path)
+                try:
+                    # Re-read so edits made since the bundle was loaded are kept
+                    metadata = self._load_json(metadata_file)
+                    if metadata is None:
+                        # Clip was removed; nothing left to mark
+                        continue
+                    
+                    metadata = dict(metadata)
+                    metadata['posted'] = True
+                    metadata['posted_at'] = posted_at
+                    
+                    # Machine-read file, so skip indentation
+                    write_json(metadata_file, metadata)
+                    updated += 1
+                except FileNotFoundError:
+                    # Removed while compacting
+                    continue
+                except Exception as e:
+                    logger.warning(f"Could not compact posted marker for {metadata_path}: {e}")
+                    remaining[metadata_path] = posted_at
+            
+            # Truncated in place rather than replaced: other processes keep appending
+            # to this file through their open handles. Failed entries are kept for a retry
+            log.seek(0)
+            log.truncate()
+            log.write(b''.join(
+                dumps({'path': metadata_path, 'at': posted_at}) + b'\n'
+                for metadata_path, posted_at in remaining.items()
+            ))
+            log.flush()
+        
+        logger.info(f"✓ Compacted posted log ({updated} metadata file(s) updated)")
+        return updated
 
 
 # Test the storage manager independently
@@ -247,7 +558,7 @@ if __name__ == "__main__":
     # Test getting bundle
     bundle = storage.get_post_ready_bundle("test_clip_001.mp4")
     print(f"\n✓ Post-ready bundle:")
-    print(json.dumps(bundle, indent=2))
+    print(dumps(bundle, indent=True).decode('utf-8'))
     
     # Test manifest
     manifest_path = storage.create_posting_manifest()
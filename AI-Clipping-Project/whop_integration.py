@@ -2,11 +2,12 @@
 Whop.com Integration
 Manages creator payments and tracking for clipping service
 """
-import json
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from json_io import read_json, write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,12 +25,34 @@ class WhopIntegration:
         """
         self.config_file = Path(config_file)
         self.config = self._load_config()
+        # Unsaved changes; written immediately unless inside bulk()
+        self._dirty = False
+        self._autosave = True
+        # creator -> {payment link -> indices in payment_links}; kept in memory only
+        self._link_index: Dict[str, Dict[str, List[int]]] = {
+            name: self._index_links(creator["payment_links"])
+            for name, creator in self.config["creators"].items()
+        }
+    
+    @staticmethod
+    def _index_links(payment_links: List[Dict]) -> Dict[str, List[int]]:
+        """Map each payment link to the positions of its records (the same video can be billed twice)"""
+        index = {}
+        for i, payment in enumerate(payment_links):
+            index.setdefault(payment["link"], []).append(i)
+        return index
     
     def _load_config(self) -> Dict:
         """Load Whop configuration"""
         if self.config_file.exists():
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            config = read_json(self.config_file)
+            for creator in config["creators"].values():
+                # Configs from older versions have no running counters yet
+                if "pending_count" not in creator:
+                    statuses = [p["status"] for p in creator["payment_links"]]
+                    creator["pending_count"] = statuses.count("pending")
+                    creator["completed_count"] = statuses.count("completed")
+            return config
         return {
             "whop_account": None,
             "default_pricing": {
@@ -42,8 +65,38 @@ class WhopIntegration:
     
     def _save_config(self):
         """Save configuration"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
+        write_json(self.config_file, self.config, indent=True)
+    
+    def _mark_dirty(self):
+        """Record an unsaved change, saving right away unless inside bulk()"""
+        self._dirty = True
+        if self._autosave:
+            self._flush()
+    
+    def _flush(self):
+        """Save the configuration if it has unsaved changes"""
+        if self._dirty:
+            self._save_config()
+            self._dirty = False
+    
+    @contextmanager
+    def bulk(self):
+        """
+        Defer config writes until the block exits
+        
+        Example:
+            with whop.bulk():
+                for video in videos:
+                    whop.create_payment_link(...)
+        """
+        previous = self._autosave
+        self._autosave = False
+        try:
+            yield self
+        finally:
+            self._autosave = previous
+            if previous:
+                self._flush()
     
     def create_payment_link(
         self,
@@ -79,8 +132,11 @@ class WhopIntegration:
             self.config["creators"][creator_name] = {
                 "payment_links": [],
                 "total_earned": 0.00,
-                "total_clips": 0
+                "total_clips": 0,
+                "pending_count": 0,
+                "completed_count": 0
             }
+            self._link_index[creator_name] = {}
         
         # Generate payment link (this would integrate with Whop API)
         # For now, return a template link
@@ -99,9 +155,12 @@ class WhopIntegration:
             "status": "pending"
         }
         
-        self.config["creators"][creator_name]["payment_links"].append(payment_record)
+        payment_links = self.config["creators"][creator_name]["payment_links"]
+        payment_links.append(payment_record)
+        self._link_index[creator_name].setdefault(payment_link, []).append(len(payment_links) - 1)
         self.config["creators"][creator_name]["total_clips"] += num_clips
-        self._save_config()
+        self.config["creators"][creator_name]["pending_count"] += 1
+        self._mark_dirty()
         
         logger.info(f"Created payment link for {creator_name}: ${amount}")
         return payment_link
@@ -116,35 +175,61 @@ class WhopIntegration:
             }
         
         creator = self.config["creators"][creator_name]
-        pending = len([p for p in creator["payment_links"] if p["status"] == "pending"])
         
         return {
             "total_earned": creator["total_earned"],
             "total_clips": creator["total_clips"],
-            "pending_payments": pending,
+            "pending_payments": creator["pending_count"],
             "payment_links": creator["payment_links"]
         }
     
     def mark_payment_completed(self, creator_name: str, payment_link: str):
         """Mark a payment as completed"""
-        if creator_name not in self.config["creators"]:
-            return
-        
-        for payment in self.config["creators"][creator_name]["payment_links"]:
-            if payment["link"] == payment_link:
-                payment["status"] = "completed"
-                payment["completed_at"] = datetime.now().isoformat()
-                self.config["creators"][creator_name]["total_earned"] += payment["amount"]
-                self._save_config()
-                logger.info(f"Payment completed for {creator_name}: ${payment['amount']}")
-                return
+        if self._complete_payment(creator_name, payment_link):
+            self._mark_dirty()
+    
+    def mark_payments_completed(self, updates: List[Tuple[str, str]]):
+        """
+        Mark several payments as completed and save the config once
+        
+        Args:
+            updates: (creator_name, payment_link) pairs
+        """
+        with self.bulk():
+            for creator_name, link in updates:
+                if self._complete_payment(creator_name, link):
+                    self._mark_dirty()
+    
+    def _complete_payment(self, creator_name: str, payment_link: str) -> bool:
+        """Update a payment record in memory; returns whether it was found"""
+        creator = self.config["creators"].get(creator_name)
+        indices = self._link_index.get(creator_name, {}).get(payment_link, [])
+        # Only pending records count; completing one twice would double the earnings
+        payment = next(
+            (creator["payment_links"][i] for i in indices
+             if creator["payment_links"][i]["status"] == "pending"),
+            None
+        )
+        if payment is None:
+            return False
+        
+        payment["status"] = "completed"
+        payment["completed_at"] = datetime.now().isoformat()
+        creator["total_earned"] += payment["amount"]
+        creator["pending_count"] -= 1
+        creator["completed_count"] += 1
+        logger.info(f"Payment completed for {creator_name}: ${payment['amount']}")
+        return True
 
 
 # CLI Interface
 if __name__ == "__main__":
+    import atexit
     import sys
     
     whop = WhopIntegration()
+    # Write anything still pending if the command exits early
+    atexit.register(whop._flush)
     
     if len(sys.argv) < 2:
         print("Usage:")